@@ -0,0 +1,289 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from asset_renderer import ASSET_NAMES, MAX_VARIANTS, render_variants
+from llm_backends import LLM_MAX_CONCURRENCY, classify_error
+from pipeline import CHANNEL_ASSETS, build_query
+from rag_pipeline import (
+    LLM_BACKEND, LLM_TEMPERATURE, PERSONA_STRATEGY, VECTOR_BACKEND, CampaignResponse, aask_question, warm_up
+)
+from scoring_engine import score_campaign
+from tracing import metrics, span, start_trace
+
+
+# -----------------------------------------
+# Settings
+# -----------------------------------------
+
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", 8000))
+# In-flight LLM generations; keep <= LLM_MAX_CONCURRENCY (the HTTP connection pool size)
+API_LLM_CONCURRENCY = int(os.getenv("API_LLM_CONCURRENCY", LLM_MAX_CONCURRENCY))
+API_EXECUTOR_THREADS = int(os.getenv("API_EXECUTOR_THREADS", 8))    # retrieval / cache I/O workers
+API_MAX_BATCH = int(os.getenv("API_MAX_BATCH", 100))
+
+
+class BadRequest(Exception):
+    pass
+
+
+# -----------------------------------------
+# Per-request Timing
+# -----------------------------------------
+# Every request runs inside a trace; its spans are summed per stage and
+# returned as a Server-Timing header (plus the trace id).
+
+def server_timing(trace, total_ms: float) -> str:
+    stages = {}
+    for record in trace.spans:
+        stages[record["name"]] = stages.get(record["name"], 0.0) + record["duration_ms"]
+
+    parts = [f"{name};dur={duration:.1f}" for name, duration in stages.items()]
+    parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+@web.middleware
+async def timing_middleware(request, handler):
+    start = time.perf_counter()
+
+    with start_trace(f"api {request.path}") as trace:
+        try:
+            response = await handler(request)
+        except BadRequest as e:
+            response = web.json_response({"error": str(e)}, status=400)
+        except web.HTTPException:
+            raise
+        except Exception as e:
+            # Provider still failing after retries -> 503, the client may retry later
+            status = 503 if classify_error(e) else 500
+            response = web.json_response({"error": str(e)}, status=status)
+
+    response.headers["Server-Timing"] = server_timing(trace, (time.perf_counter() - start) * 1000)
+    response.headers["X-Trace-Id"] = trace.id
+    return response
+
+
+# -----------------------------------------
+# Request Parsing
+# -----------------------------------------
+
+async def read_json(request) -> dict:
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise BadRequest("Request body must be JSON")
+
+    if not isinstance(body, dict):
+        raise BadRequest("Request body must be a JSON object")
+    return body
+
+
+def strategy_body(body: dict) -> dict:
+    """
+    The "strategy" object of /score and /assets. Fields may be missing, but
+    present ones must have their CampaignResponse type, since the scorer
+    and the templates call string methods on them.
+    """
+    strategy = body.get("strategy")
+    if not isinstance(strategy, dict):
+        raise BadRequest("'strategy' object is required")
+
+    for name, field in CampaignResponse.model_fields.items():
+        if name not in strategy:
+            continue
+
+        value = strategy[name]
+        item_type = (typing.get_args(field.annotation) or [None])[0]
+
+        if item_type is None and not isinstance(value, field.annotation):
+            raise BadRequest(f"'strategy.{name}' must be a string")
+        if item_type is not None and not (isinstance(value, list) and all(isinstance(v, item_type) for v in value)):
+            raise BadRequest(f"'strategy.{name}' must be a list of {'strings' if item_type is str else 'objects'}")
+
+    return strategy
+
+
+def strategy_request(body: dict) -> dict:
+    """
+    Normalizes {"config": {...}} or {"query": ..., "persona": ..., "customer_details": ...}
+    into ask_question arguments.
+    """
+    config = body.get("config")
+
+    if config is not None:
+        if not isinstance(config, dict):
+            raise BadRequest("'config' must be an object")
+        query = build_query(config)
+        persona = config.get("persona")
+        customer_details = config.get("customer_details")
+    else:
+        query = body.get("query")
+        persona = body.get("persona")
+        customer_details = body.get("customer_details")
+        if not query:
+            raise BadRequest("Provide either 'config' or 'query'")
+
+    if persona is not None and (not isinstance(persona, str) or persona not in PERSONA_STRATEGY):
+        raise BadRequest(f"Unknown persona: {persona}")
+
+    if customer_details is not None and not isinstance(customer_details, str):
+        raise BadRequest("'customer_details' must be a string")
+
+    temperature = body.get("temperature", LLM_TEMPERATURE)
+    if isinstance(temperature, bool) or not isinstance(temperature, (int, float)) or not 0 <= temperature <= 2:
+        raise BadRequest("'temperature' must be a number between 0 and 2")
+
+    return {
+        "query": query,
+        "persona": persona,
+        "config": config,
+        "customer_details": customer_details,
+        "temperature": float(temperature)
+    }
+
+
+# -----------------------------------------
+# Handlers
+# -----------------------------------------
+
+async def generate_strategy(app, params: dict) -> dict:
+    slots = app["llm_slots"]
+
+    with span("api.slot_wait"):
+        await slots.acquire()
+    try:
+        strategy = await aask_question(params["query"], params["persona"], temperature=params["temperature"],
+                                       customer_details=params["customer_details"])
+    finally:
+        slots.release()
+
+    result = {"strategy": strategy}
+
+    # Scoring is cheap; include it whenever there's a config to score against
+    if params["config"] is not None and "error" not in strategy:
+        result["score_result"] = score_campaign(strategy, params["config"])
+
+    return result
+
+
+async def handle_strategy(request):
+    params = strategy_request(await read_json(request))
+    return web.json_response(await generate_strategy(request.app, params))
+
+
+async def handle_score(request):
+    body = await read_json(request)
+    strategy = strategy_body(body)
+
+    config = body.get("config") or {}
+    if not isinstance(config, dict):
+        raise BadRequest("'config' must be an object")
+    if config.get("persona") is not None and not isinstance(config["persona"], str):
+        raise BadRequest("'config.persona' must be a string")
+
+    return web.json_response(score_campaign(strategy, config))
+
+
+async def handle_assets(request):
+    body = await read_json(request)
+    strategy = strategy_body(body)
+
+    names = body.get("assets") or CHANNEL_ASSETS.get(body.get("channel_focus"), ASSET_NAMES)
+    if not isinstance(names, list):
+        raise BadRequest("'assets' must be a list of asset names")
+
+    unknown = [name for name in names if name not in ASSET_NAMES]
+    if unknown:
+        raise BadRequest(f"Unknown assets: {unknown} (expected {ASSET_NAMES})")
+
+    variants = body.get("variants", 1)
+    if isinstance(variants, bool) or not isinstance(variants, int) or not 1 <= variants <= MAX_VARIANTS:
+        raise BadRequest(f"'variants' must be an integer between 1 and {MAX_VARIANTS}")
+
+    rendered = {name: render_variants(name, strategy, variants) for name in names}
+    result = {"assets": {name: texts[0] for name, texts in rendered.items()}}
+
+    # A/B variants (the first one is the default asset above)
+    if variants > 1:
+        result["variants"] = rendered
+
+    return web.json_response(result)
+
+
+async def handle_batch(request):
+    body = await read_json(request)
+    items = body.get("requests")
+
+    if not isinstance(items, list) or not items:
+        raise BadRequest("'requests' must be a non-empty list")
+    if len(items) > API_MAX_BATCH:
+        raise BadRequest(f"At most {API_MAX_BATCH} requests per batch")
+
+    async def run_one(item):
+        start = time.perf_counter()
+        try:
+            if not isinstance(item, dict):
+                raise BadRequest("Each request must be an object")
+            row = {"status": "ok", **await generate_strategy(request.app, strategy_request(item))}
+        except Exception as e:
+            row = {"status": "error", "error": str(e)}
+        row["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return row
+
+    # Items share the global LLM slots with every other request
+    results = await asyncio.gather(*(run_one(item) for item in items))
+    return web.json_response({"results": results})
+
+
+async def handle_health(request):
+    return web.json_response({"status": "ok", "llm_backend": LLM_BACKEND, "vector_backend": VECTOR_BACKEND})
+
+
+async def handle_metrics(request):
+    return web.Response(text=metrics.prometheus_text(), content_type="text/plain")
+
+
+# -----------------------------------------
+# App
+# -----------------------------------------
+
+async def on_startup(app):
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=API_EXECUTOR_THREADS, thread_name_prefix="api-io"))
+
+    # Embedding model, vectorstore and LLM client are loaded once and shared by all requests
+    await loop.run_in_executor(None, warm_up)
+
+
+def create_app(llm_concurrency: int = API_LLM_CONCURRENCY) -> web.Application:
+    app = web.Application(middlewares=[timing_middleware])
+    app["llm_slots"] = asyncio.Semaphore(llm_concurrency)
+
+    app.router.add_post("/strategy", handle_strategy)
+    app.router.add_post("/score", handle_score)
+    app.router.add_post("/assets", handle_assets)
+    app.router.add_post("/batch", handle_batch)
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+
+    app.on_startup.append(on_startup)
+    return app
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="NexFlow campaign pipeline HTTP API")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--llm-concurrency", type=int, default=API_LLM_CONCURRENCY)
+    args = parser.parse_args()
+
+    web.run_app(create_app(args.llm_concurrency), host=args.host, port=args.port)
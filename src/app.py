@@ -1,7 +1,11 @@
 import streamlit as st
-from rag_pipeline import ask_question
-from campaign_generator import generate_linkedin_post, generate_cold_email, generate_landing_hero, generate_paid_ad
-from scoring_engine import score_campaign
+from asset_renderer import ASSET_NAMES, MAX_VARIANTS, render_variants
+from campaign_store import STORE_ENABLED, get_campaign_store
+from llm_backends import classify_error
+from pipeline import CONFIG_OPTIONS, GENERATION_MODES, build_query, run_campaign_pipeline
+from rag_pipeline import stream_question, warm_up
+from response_cache import CACHE_ENABLED, get_response_cache
+from tracing import metrics, recent_traces, span, start_metrics_server, start_trace
 
 # PAGE SETUP
 st.set_page_config(page_title="NexFlow AI Growth Engine", layout="wide")
@@ -34,25 +38,32 @@ if 'strategy' not in st.session_state:
     st.session_state.strategy = None
 if 'score_result' not in st.session_state:
     st.session_state.score_result = None
-if 'generated' not in st.session_state:
-    st.session_state.generated = False
+if 'campaign_config' not in st.session_state:
+    st.session_state.campaign_config = None   # click ke time wala config, widgets ka live value nahi
+if 'force_refresh' not in st.session_state:
+    st.session_state.force_refresh = False
+    st.session_state.regenerate = False
+    st.session_state.failed_result = None   # memo mein nahi jata, isliye yahan rakha (tab switch par retry nahi)
+if 'stream_pending' not in st.session_state:
+    st.session_state.stream_pending = False
+
 
 # SIDEBAR
 st.sidebar.header("Campaign Configuration")
 
-persona = st.sidebar.selectbox("Target Persona", ["Enterprise CMO", "Startup Founder", "Marketing Manager"])
+persona = st.sidebar.selectbox("Target Persona", CONFIG_OPTIONS["persona"])
 
-campaign_type = st.sidebar.selectbox("Campaign Type", ["Awareness", "Lead Generation", "Product Launch", "Retargeting", "Event Promotion"])
+campaign_type = st.sidebar.selectbox("Campaign Type", CONFIG_OPTIONS["campaign_type"])
 
-industry = st.sidebar.selectbox("Target Industry", ["B2B SaaS", "FinTech", "Manufacturing", "Logistics", "Professional Services"])
+industry = st.sidebar.selectbox("Target Industry", CONFIG_OPTIONS["industry"])
 
-region = st.sidebar.selectbox("Target Region", ["DACH", "Europe", "United States", "Global"])
+region = st.sidebar.selectbox("Target Region", CONFIG_OPTIONS["region"])
 
-budget_level = st.sidebar.selectbox("Budget Level", ["Low Budget", "Mid-Range Budget", "Enterprise Budget"])
+budget_level = st.sidebar.selectbox("Budget Level", CONFIG_OPTIONS["budget_level"])
 
-channel_focus = st.sidebar.selectbox("Primary Channel Focus", ["LinkedIn Only", "Email Only", "Multi-Channel"])
+channel_focus = st.sidebar.selectbox("Primary Channel Focus", CONFIG_OPTIONS["channel_focus"])
 
-tone_preference = st.sidebar.selectbox("Tone Preference", ["Bold & Aggressive", "Executive & Strategic", "Conversational", "Analytical"])
+tone_preference = st.sidebar.selectbox("Tone Preference", CONFIG_OPTIONS["tone_preference"])
 
 customer_details = st.sidebar.text_area(
     "Customer Details (optional)",
@@ -60,13 +71,42 @@ customer_details = st.sidebar.text_area(
     height=100
 )
 
+generation_mode = st.sidebar.selectbox("Generation Mode", GENERATION_MODES)
+
+asset_variants = st.sidebar.slider("A/B variants per asset", 1, MAX_VARIANTS, 1)
+
+# Streaming draft sirf tab jab response cache on ho (warna LLM call double hogi)
+show_performance = st.sidebar.checkbox("Show Performance panel", value=False)
+
+stream_strategy = st.sidebar.checkbox("Stream strategy while generating", value=CACHE_ENABLED, disabled=not CACHE_ENABLED)
+
 if st.sidebar.button("Generate Campaign", type="primary"):
-    st.session_state.generated = True
+    # Sirf click par naya run - baad ke sidebar edits pipeline trigger nahi karte
+    clicked_config = {
+        "persona": persona,
+        "campaign_type": campaign_type,
+        "industry": industry,
+        "region": region,
+        "budget_level": budget_level,
+        "channel_focus": channel_focus,
+        "tone_preference": tone_preference,
+        "customer_details": customer_details,
+        "generation_mode": generation_mode
+    }
+    # Same config dobara click = regenerate, precomputed store bhi skip
+    st.session_state.regenerate = clicked_config == st.session_state.campaign_config
+    st.session_state.campaign_config = clicked_config
+    st.session_state.force_refresh = True
+    st.session_state.failed_result = None
     st.session_state.strategy = None  # reset
+    st.session_state.stream_pending = stream_strategy
     st.rerun()
 
-# TABS
+campaign_config = st.session_state.campaign_config
+
+# TABS (generated campaign ke channel ke hisaab se)
 tabs = ["Strategy", "Sources"]
+channel_focus = campaign_config["channel_focus"] if campaign_config else channel_focus
 
 if channel_focus in ["LinkedIn Only", "Multi-Channel"]:
     tabs.insert(1, "LinkedIn Post")
@@ -78,166 +118,311 @@ if channel_focus == "Multi-Channel":
     tabs.insert(-1, "Landing Hero")
     tabs.insert(-1, "Paid Ad")
 
-tab_objects = st.tabs(tabs)
+# Tab badalne par rerun - sirf khula tab render hota hai (tab.open)
+tab_objects = st.tabs(tabs, key="result_tabs", on_change="rerun")
 tab_dict = dict(zip(tabs, tab_objects))
 
+
+# SHARED RESOURCES (ek process mein sirf ek baar load)
+@st.cache_resource(show_spinner="Loading models...")
+def load_shared_resources():
+    warm_up()
+    start_metrics_server()
+    return True
+
+
+# PRECOMPUTED STORE (fresh entry ho to na model load, na LLM call)
+def stored_campaign(config: dict):
+    if not STORE_ENABLED:
+        return None
+    return get_campaign_store().get(config)
+
+
+class CampaignFailed(Exception):
+    """Raised out of cached_campaign so st.cache_data never memoizes a failed run."""
+
+    def __init__(self, result: dict):
+        super().__init__("Campaign generation failed")
+        self.result = result
+
+
+# CACHED PIPELINE (reruns sirf re-render karte hain)
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=256)
+def cached_campaign(config: dict):
+    result = run_campaign_pipeline(config)
+
+    if "error" in result["strategy"] or result["errors"]:
+        raise CampaignFailed(result)
+
+    # Live result bhi store mein - restart/deploy ke baad bhi instant
+    if STORE_ENABLED:
+        get_campaign_store().put(config, result, source="live")
+
+    return result
+
+
+# STREAMING DRAFT (fields aate hi cards dikhao)
+STREAM_CARDS = {
+    "key_insight": "Key Insight",
+    "value_proposition": "Value Proposition",
+    "strategic_campaign_angle": "Strategic Angle",
+    "supporting_proof_points": "Supporting Proof Points",
+}
+
+
+def stream_strategy_draft(query: str, persona: str, customer_details: str):
+    placeholders = {field: st.empty() for field in STREAM_CARDS}
+
+    for field in STREAM_CARDS:
+        placeholders[field].markdown(f"""
+        <div class="card">
+            <h3>{STREAM_CARDS[field]}</h3>
+            <p>...</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    # The completed response lands in the response cache, so the full
+    # pipeline below reuses it instead of calling the LLM again
+    for event, field, value in stream_question(user_query=query, persona=persona, customer_details=customer_details):
+        if event != "field" or field not in placeholders:
+            continue
+
+        if isinstance(value, list):
+            body = "<ul>" + "".join(f"<li>{p}</li>" for p in value) + "</ul>"
+        else:
+            body = f"<p>{value}</p>"
+
+        placeholders[field].markdown(f"""
+        <div class="card">
+            <h3>{STREAM_CARDS[field]}</h3>
+            {body}
+        </div>
+        """, unsafe_allow_html=True)
+
+
+# DISPLAY FRAGMENTS
+@st.fragment
+def render_strategy(strategy: dict, score_result: dict):
+    score = score_result['total_score']
+
+    # Color logic
+    if score >= 80:
+        color = "#22c55e"
+        label = "Excellent"
+    elif score >= 60:
+        color = "#eab308"
+        label = "Good"
+    elif score >= 40:
+        color = "#f97316"
+        label = "Needs Improvement"
+    else:
+        color = "#ef4444"
+        label = "Poor"
+
+    # Compact Score Card
+    st.markdown(f"""
+    <div style="background: #1e293b; padding: 20px; border-radius: 12px; text-align: center; margin: 15px 0;">
+        <h3 style="margin: 0; color: #e2e8f0; font-size: 22px;">Campaign Quality</h3>
+        <div style="font-size: 52px; font-weight: bold; color: {color}; margin: 10px 0;">
+            {score}/100
+        </div>
+        <div style="font-size: 18px; color: {color}; margin-bottom: 15px;">
+            {label}
+        </div>
+        <div style="background: #334155; height: 20px; border-radius: 10px; overflow: hidden;">
+            <div style="background: {color}; width: {score}%; height: 100%; transition: width 0.8s;"></div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # Breakdown (compact bars)
+    if "breakdown" in score_result:
+        st.subheader("Score Breakdown", divider="gray")
+        cols = st.columns(2)
+        i = 0
+        for key, val in score_result["breakdown"].items():
+            if key != "total":
+                percent = min(val / 20 * 100, 100)
+                bar_color = "#22c55e" if percent >= 75 else "#eab308" if percent >= 50 else "#f97316" if percent >= 25 else "#ef4444"
+
+                with cols[i % 2]:
+                    st.markdown(f"**{key.replace('_', ' ').title()}** ({val} pts)")
+                    st.progress(percent / 100)
+                    st.caption(f"{percent:.0f}%")
+                i += 1
+
+    # Main content (ek baar hi)
+    st.markdown(f"""
+    <div class="card">
+        <h3>Key Insight</h3>
+        <p>{strategy.get("key_insight", "No insight generated")}</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown(f"""
+    <div class="card">
+        <h3>Value Proposition</h3>
+        <p>{strategy.get("value_proposition", "No value prop")}</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown(f"""
+    <div class="card">
+        <h3>Strategic Angle</h3>
+        <p>{strategy.get("strategic_campaign_angle", "No angle generated")}</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    if "supporting_proof_points" in strategy and strategy["supporting_proof_points"]:
+        proof_html = "<ul>" + "".join(f"<li>{p}</li>" for p in strategy["supporting_proof_points"]) + "</ul>"
+        st.markdown(f"""
+        <div class="card">
+            <h3>Supporting Proof Points</h3>
+            {proof_html}
+        </div>
+        """, unsafe_allow_html=True)
+
+
+@st.fragment
+def render_asset(variants: list):
+    if len(variants) == 1:
+        st.code(variants[0], language="markdown")
+        return
+
+    for i, asset in enumerate(variants):
+        st.caption(f"Variant {chr(ord('A') + i)}")
+        st.code(asset, language="markdown")
+
+
+@st.fragment
+def render_sources(strategy: dict):
+    st.subheader("Retrieved Knowledge Sources")
+    for s in strategy.get("sources", []):
+        st.markdown(f"""
+        <div class="source-item">
+            **{s['source']}** ({s['category']})
+        </div>
+        """, unsafe_allow_html=True)
+
+
 # GENERATION
-if st.session_state.generated:
-
-    query = f"""
-Campaign Type: {campaign_type}
-Target Industry: {industry}
-Target Region: {region}
-Budget Level: {budget_level}
-Primary Channel Focus: {channel_focus}
-Tone Preference: {tone_preference}
-Customer Details: {customer_details}
-"""
-
-    if st.session_state.strategy is None:
-        with st.spinner("Generating..."):
-            try:
-                strategy = ask_question(user_query=query, persona=persona)
-                st.session_state.strategy = strategy
-            except Exception as e:
+if campaign_config:
+
+    persona = campaign_config["persona"]
+    generation_mode = campaign_config["generation_mode"]
+
+    result = None
+    draft = None
+    with st.spinner("Generating..."):
+        try:
+            stream_pending = st.session_state.stream_pending
+            st.session_state.stream_pending = False
+
+            # Generate click = fresh run, purana memo hatao (tab switch wale reruns memo use karte hain)
+            if st.session_state.force_refresh:
+                st.session_state.force_refresh = False
+                cached_campaign.clear(campaign_config)
+
+            if st.session_state.failed_result is not None:
+                result = st.session_state.failed_result
+            elif not st.session_state.regenerate:
+                with start_trace("campaign_store", persona=persona):
+                    result = stored_campaign(campaign_config)
+
+            if result is None:
+                load_shared_resources()
+
+                if stream_pending:
+                    with tab_dict["Strategy"]:
+                        draft = st.empty()
+                        with draft.container(), start_trace("stream_draft", persona=persona):
+                            stream_strategy_draft(build_query(campaign_config), persona, campaign_config["customer_details"])
+
+                with start_trace("campaign", persona=persona, mode=generation_mode):
+                    result = cached_campaign(campaign_config)
+        except CampaignFailed as failed:
+            result = st.session_state.failed_result = failed.result
+        except Exception as e:
+            # Retries ke baad bhi provider busy hai - user ko retry bolo, crash mat dikhao
+            if classify_error(e):
+                st.warning("The LLM provider is busy right now (rate limited or timing out). Please try again in a minute.")
+            else:
                 st.error(f"Generation error: {str(e)}")
 
-    strategy = st.session_state.strategy
+            # Agle rerun par khud retry mat karo - user Generate dabayega
+            st.session_state.campaign_config = None
+
+    if draft is not None:
+        draft.empty()
 
-    if strategy:
-        campaign_config = {"persona": persona, "industry": industry}
+    strategy = result["strategy"] if result else None
 
-        score_result = score_campaign(strategy, campaign_config)
+    if strategy and "error" in strategy:
+        st.error(f"Generation error: {strategy['error']}")
+    elif strategy:
+        score_result = result["score_result"]
 
-        refinement_count = 0
-        while score_result["total_score"] < 75 and refinement_count < 2:
-            st.info(f"Refining... (attempt {refinement_count + 1})")
-            try:
-                refinement_query = query + f"""
-Previous score low ({score_result['total_score']}/100).
-Improve significantly.
-"""
-                strategy = ask_question(user_query=refinement_query, persona=persona)
-                score_result = score_campaign(strategy, campaign_config)
-                refinement_count += 1
-            except Exception as e:
-                st.error(f"Refinement failed: {str(e)}")
-                break
+        for error in result["errors"]:
+            st.error(error)
 
         st.session_state.strategy = strategy
         st.session_state.score_result = score_result
 
-        st.success(f"Final Score: {score_result['total_score']}/100 (after {refinement_count} refinements)")
-
-        # Assets
-        linkedin_post = generate_linkedin_post(strategy) if "LinkedIn Post" in tabs else None
-        cold_email = generate_cold_email(strategy) if "Cold Email" in tabs else None
-        landing_hero = generate_landing_hero(strategy) if "Landing Hero" in tabs else None
-        paid_ad = generate_paid_ad(strategy) if "Paid Ad" in tabs else None
+        if "stored_at" in result:
+            st.success(f"Final Score: {score_result['total_score']}/100 (precomputed campaign)")
+        elif "candidates_evaluated" in result:
+            st.success(f"Final Score: {score_result['total_score']}/100 (best of {result['candidates_evaluated']} candidates)")
+        else:
+            st.success(f"Final Score: {score_result['total_score']}/100 (after {result['refinement_count']} refinements)")
 
         # DISPLAY
         with tab_dict["Strategy"]:
-            score = score_result['total_score']
-
-            # Color logic
-            if score >= 80:
-                color = "#22c55e"
-                label = "Excellent"
-            elif score >= 60:
-                color = "#eab308"
-                label = "Good"
-            elif score >= 40:
-                color = "#f97316"
-                label = "Needs Improvement"
-            else:
-                color = "#ef4444"
-                label = "Poor"
-
-            # Compact Score Card
-            st.markdown(f"""
-            <div style="background: #1e293b; padding: 20px; border-radius: 12px; text-align: center; margin: 15px 0;">
-                <h3 style="margin: 0; color: #e2e8f0; font-size: 22px;">Campaign Quality</h3>
-                <div style="font-size: 52px; font-weight: bold; color: {color}; margin: 10px 0;">
-                    {score}/100
-                </div>
-                <div style="font-size: 18px; color: {color}; margin-bottom: 15px;">
-                    {label}
-                </div>
-                <div style="background: #334155; height: 20px; border-radius: 10px; overflow: hidden;">
-                    <div style="background: {color}; width: {score}%; height: 100%; transition: width 0.8s;"></div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-
-            # Breakdown (compact bars)
-            if "breakdown" in score_result:
-                st.subheader("Score Breakdown", divider="gray")
-                cols = st.columns(2)
-                i = 0
-                for key, val in score_result["breakdown"].items():
-                    if key != "total":
-                        percent = min(val / 20 * 100, 100)
-                        bar_color = "#22c55e" if percent >= 75 else "#eab308" if percent >= 50 else "#f97316" if percent >= 25 else "#ef4444"
-
-                        with cols[i % 2]:
-                            st.markdown(f"**{key.replace('_', ' ').title()}** ({val} pts)")
-                            st.progress(percent / 100)
-                            st.caption(f"{percent:.0f}%")
-                        i += 1
-
-            # Main content (ek baar hi)
-            st.markdown(f"""
-            <div class="card">
-                <h3>Key Insight</h3>
-                <p>{strategy.get("key_insight", "No insight generated")}</p>
-            </div>
-            """, unsafe_allow_html=True)
-
-            st.markdown(f"""
-            <div class="card">
-                <h3>Value Proposition</h3>
-                <p>{strategy.get("value_proposition", "No value prop")}</p>
-            </div>
-            """, unsafe_allow_html=True)
-
-            st.markdown(f"""
-            <div class="card">
-                <h3>Strategic Angle</h3>
-                <p>{strategy.get("strategic_campaign_angle", "No angle generated")}</p>
-            </div>
-            """, unsafe_allow_html=True)
-
-            if "supporting_proof_points" in strategy and strategy["supporting_proof_points"]:
-                proof_html = "<ul>" + "".join(f"<li>{p}</li>" for p in strategy["supporting_proof_points"]) + "</ul>"
-                st.markdown(f"""
-                <div class="card">
-                    <h3>Supporting Proof Points</h3>
-                    {proof_html}
-                </div>
-                """, unsafe_allow_html=True)
-
-        # Other tabs
-        if linkedin_post:
-            with tab_dict["LinkedIn Post"]:
-                st.code(linkedin_post, language="markdown")
-
-        if cold_email:
-            with tab_dict["Cold Email"]:
-                st.code(cold_email, language="markdown")
-
-        if landing_hero:
-            with tab_dict["Landing Hero"]:
-                st.code(landing_hero, language="markdown")
-
-        if paid_ad:
-            with tab_dict["Paid Ad"]:
-                st.code(paid_ad, language="markdown")
+            render_strategy(strategy, score_result)
+
+        # Asset tabs: sirf jo tab khula hai wahi render (memoized by strategy content)
+        for asset_name in ASSET_NAMES:
+            if asset_name in tab_dict and tab_dict[asset_name].open:
+                with span("assets.render", asset=asset_name, variants=asset_variants):
+                    variants = render_variants(asset_name, strategy, asset_variants)
+                with tab_dict[asset_name]:
+                    render_asset(variants)
 
         with tab_dict["Sources"]:
-            st.subheader("Retrieved Knowledge Sources")
-            for s in strategy.get("sources", []):
-                st.markdown(f"""
-                <div class="source-item">
-                    **{s['source']}** ({s['category']})
-                </div>
-                """, unsafe_allow_html=True)
\ No newline at end of file
+            render_sources(strategy)
+
+
+# PERFORMANCE PANEL (optional)
+if show_performance:
+    with st.sidebar.expander("Performance", expanded=True):
+        if recent_traces:
+            last_trace = recent_traces[-1]
+            st.caption(f"Last trace: {last_trace['name']} ({last_trace['duration_ms']:.0f} ms)")
+            st.dataframe(
+                [
+                    {"stage": sp["name"], "ms": sp["duration_ms"], **sp["attrs"]}
+                    for sp in last_trace["spans"]
+                ],
+                hide_index=True
+            )
+        else:
+            st.caption("No traces yet. Generate a campaign (cached reruns are not traced).")
+
+        snapshot = metrics.snapshot()
+        st.markdown("**Stage totals**")
+        st.dataframe(
+            [{"stage": stage, **values} for stage, values in snapshot["stages"].items()],
+            hide_index=True
+        )
+
+        st.markdown("**Counters**")
+        st.json(snapshot["counters"], expanded=False)
+
+        st.markdown("**LLM queue**")
+        st.json(snapshot["gauges"], expanded=False)
+
+        st.markdown("**Response cache**")
+        st.json(get_response_cache().stats(), expanded=False)
+
+        if STORE_ENABLED:
+            st.markdown("**Campaign store**")
+            st.json(get_campaign_store().stats(), expanded=False)
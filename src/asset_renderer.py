@@ -0,0 +1,265 @@
+import json
+import os
+from functools import partial
+
+from retrieval_cache import LRUCache
+from tracing import increment
+
+
+# -----------------------------------------
+# Settings
+# -----------------------------------------
+
+ASSET_CACHE_SIZE = int(os.getenv("ASSET_CACHE_SIZE", 1024))
+
+
+# -----------------------------------------
+# Strategy Fields
+# -----------------------------------------
+# Each channel pulls the values it needs from the strategy once, as a
+# tuple in the order of its render function's arguments; every variant of
+# that channel is rendered from the same tuple.
+
+def proof_lines(proofs: list) -> str:
+    if not proofs:
+        return "- Strong strategic foundation\n"
+    return "".join(f"- {p}\n" for p in proofs)
+
+
+def linkedin_fields(strategy: dict) -> tuple:
+    return (
+        strategy.get("key_insight", ""),
+        strategy.get("value_proposition", ""),
+        strategy.get("strategic_campaign_angle", ""),
+        proof_lines(strategy.get("supporting_proof_points", [])),
+    )
+
+
+def email_fields(strategy: dict) -> tuple:
+    return (
+        strategy.get("key_insight", ""),
+        strategy.get("value_proposition", ""),
+        # Limit to 2 proofs for email brevity
+        proof_lines(strategy.get("supporting_proof_points", [])[:2]),
+    )
+
+
+def landing_fields(strategy: dict) -> tuple:
+    return (
+        strategy.get("key_insight", "Unlock Your Growth Potential")[:70].rstrip(" .,!?"),
+        strategy.get("value_proposition", "AI-powered marketing automation"),
+    )
+
+
+def paid_ad_fields(strategy: dict) -> tuple:
+    return (
+        strategy.get("strategic_campaign_angle", "AI-Driven Growth")[:50],
+        # 1 proof for a short ad
+        proof_lines(strategy.get("supporting_proof_points", [])[:1]).strip("- \n"),
+    )
+
+
+# -----------------------------------------
+# Channel Templates & A/B Variants
+# -----------------------------------------
+# One plain f-string function per channel: `copy` is the variant's static
+# text (subject lines, CTAs, hashtags), the other arguments are the
+# channel's strategy fields. Variant 0 is the original copy.
+
+def linkedin_post(copy: dict, key_insight: str, value_prop: str, strategic_angle: str, proof_text: str) -> str:
+    return f"""
+{key_insight}
+
+{value_prop}
+
+{copy["proof_header"]}
+{proof_text}
+
+Strategic Focus:
+{strategic_angle}
+
+{copy["hashtags"]}
+""".strip()
+
+
+def cold_email(copy: dict, key_insight: str, value_prop: str, proof_text: str) -> str:
+    return f"""
+Subject: {copy["subject"]}
+
+Hi [Name],
+
+{key_insight}
+
+{value_prop}
+
+{copy["proof_header"]}
+{proof_text}
+
+{copy["closing"]}
+
+Best,
+[Your Name]
+""".strip()
+
+
+def landing_hero(copy: dict, headline: str, value_prop: str) -> str:
+    return f"""
+Headline: {headline} – {copy["brand_line"]}
+Subheadline: {value_prop}. Join 150+ companies with 38% better leads.
+CTA: {copy["cta"]}
+"""
+
+
+def paid_ad(copy: dict, angle: str, proof_text: str) -> str:
+    return f"""
+Headline: {angle}... – {copy["tagline"]}
+Description: {proof_text} 38% more qualified leads. Proven in DACH region.
+CTA: {copy["cta"]}
+"""
+
+
+CHANNELS = {
+    "LinkedIn Post": {
+        "render": linkedin_post,
+        "fields": linkedin_fields,
+        "variants": [
+            {"proof_header": "Why this matters:", "hashtags": "#B2BMarketing #SaaS #Growth"},
+            {"proof_header": "What the data shows:", "hashtags": "#DemandGen #RevOps #AIMarketing"},
+            {"proof_header": "The proof:", "hashtags": "#MarketingAutomation #LeadGen #B2B"},
+        ],
+    },
+    "Cold Email": {
+        "render": cold_email,
+        "fields": email_fields,
+        "variants": [
+            {"subject": "Strategic Growth Opportunity", "proof_header": "Here’s what makes this powerful:",
+             "closing": "Let’s connect and explore how this can drive measurable results."},
+            {"subject": "A faster path to qualified pipeline", "proof_header": "A few numbers worth a look:",
+             "closing": "Open to a 20-minute call next week to see if this fits?"},
+            {"subject": "Quick idea for [Company]", "proof_header": "Why teams like yours switch:",
+             "closing": "Worth a short conversation? Happy to share a tailored walkthrough."},
+        ],
+    },
+    "Landing Hero": {
+        "render": landing_hero,
+        "fields": landing_fields,
+        "variants": [
+            {"brand_line": "Powered by NexFlow", "cta": "Start Free Trial Today"},
+            {"brand_line": "Built with NexFlow AI", "cta": "Book a Demo"},
+            {"brand_line": "Grow Faster with NexFlow", "cta": "See NexFlow in Action"},
+        ],
+    },
+    "Paid Ad": {
+        "render": paid_ad,
+        "fields": paid_ad_fields,
+        "variants": [
+            {"tagline": "Scale Smarter", "cta": "Get Started – Free Trial"},
+            {"tagline": "Grow Pipeline Faster", "cta": "Book a Demo"},
+            {"tagline": "Smarter Demand Gen", "cta": "Try NexFlow Free"},
+        ],
+    },
+}
+
+ASSET_NAMES = list(CHANNELS)
+MAX_VARIANTS = min(len(channel["variants"]) for channel in CHANNELS.values())
+
+
+# Built once at import: channel -> [variant 0 renderer, variant 1 renderer, ...], each taking the fields tuple
+COMPILED = {
+    name: [partial(channel["render"], variant) for variant in channel["variants"]]
+    for name, channel in CHANNELS.items()
+}
+
+
+def _render(name: str, fields: tuple, variants: int) -> list:
+    return [render(*fields) for render in COMPILED[name][:variants]]
+
+
+def _check(name: str, variants: int):
+    if name not in CHANNELS:
+        raise KeyError(f"Unknown asset: {name} (expected {ASSET_NAMES})")
+    if not 1 <= variants <= MAX_VARIANTS:
+        raise ValueError(f"variants must be between 1 and {MAX_VARIANTS}")
+
+
+# -----------------------------------------
+# Memoized Rendering
+# -----------------------------------------
+
+STRATEGY_FIELDS = ("key_insight", "value_proposition", "supporting_proof_points", "strategic_campaign_angle")
+
+asset_cache = LRUCache(maxsize=ASSET_CACHE_SIZE)
+
+
+def strategy_key(strategy: dict):
+    # Only the fields the templates read (sources/persona don't change the
+    # copy). A plain tuple hashes far faster than json + sha1, which would
+    # cost more than rendering the templates themselves.
+    proofs = strategy.get("supporting_proof_points")
+    key = (
+        strategy.get("key_insight"),
+        strategy.get("value_proposition"),
+        tuple(proofs) if isinstance(proofs, list) else proofs,
+        strategy.get("strategic_campaign_angle"),
+    )
+
+    try:
+        hash(key)
+    except TypeError:
+        # Unhashable values (e.g. dict proof points from an API client): key by their JSON
+        return json.dumps([strategy.get(field) for field in STRATEGY_FIELDS], sort_keys=True, default=str)
+    return key
+
+
+def render_variants(name: str, strategy: dict, variants: int = 1) -> list:
+    _check(name, variants)
+
+    key = (strategy_key(strategy), name, variants)
+    cached = asset_cache.get(key)
+    if cached is not None:
+        return list(cached)
+
+    rendered = _render(name, CHANNELS[name]["fields"](strategy), variants)
+    asset_cache.set(key, tuple(rendered))
+    return rendered
+
+
+def render_asset(name: str, strategy: dict, variant: int = 0) -> str:
+    return render_variants(name, strategy, variant + 1)[variant]
+
+
+# -----------------------------------------
+# Batch Rendering
+# -----------------------------------------
+
+def render_batch(strategies: list, names: list = None, variants: int = 1) -> list:
+    """
+    Renders `variants` A/B variants of each asset for many strategies.
+    Returns one {asset name: [variant texts]} dict per strategy. Identical
+    strategies are rendered once; the shared LRU cache is bypassed so a
+    large batch doesn't evict the interactive entries.
+    """
+    names = names or ASSET_NAMES
+    for name in names:
+        _check(name, variants)
+
+    # Lookups hoisted out of the loop: per asset it's one fields call plus one call per variant
+    plan = [(name, CHANNELS[name]["fields"], COMPILED[name][:variants]) for name in names]
+
+    seen = {}
+    results = []
+
+    for strategy in strategies:
+        key = strategy_key(strategy)
+        assets = seen.get(key)
+
+        if assets is None:
+            assets = seen[key] = {}
+            for name, fields_fn, renderers in plan:
+                fields = fields_fn(strategy)
+                assets[name] = [render(*fields) for render in renderers]
+
+        results.append(assets)
+
+    increment("assets_rendered_total", len(seen) * len(names) * variants)
+    return results
@@ -0,0 +1,260 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from asset_renderer import MAX_VARIANTS, render_batch
+from campaign_store import get_campaign_store
+from perf_stats import format_latencies, summarize_latencies
+from pipeline import CHANNEL_ASSETS, CONFIG_OPTIONS, config_key, run_campaign_pipeline
+from rate_limiter import TokenBucket
+
+
+# -----------------------------------------
+# Batch Settings
+# -----------------------------------------
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_CAMPAIGNS_PER_MINUTE = 30
+PROGRESS_EVERY = 10
+
+
+# -----------------------------------------
+# Config Sources
+# -----------------------------------------
+
+def iter_jsonl_configs(path: str):
+    """Yields configs from a JSONL file; a line may be a bare config or {"config": {...}}."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            record = json.loads(line)
+            yield record.get("config", record)
+
+
+def iter_grid_configs(grid: dict = None):
+    """
+    Cartesian product over the sidebar options. Fields missing from `grid`
+    use every option from CONFIG_OPTIONS; scalar values are fixed.
+    """
+    grid = grid or {}
+    fields = list(CONFIG_OPTIONS)
+
+    axes = []
+    for field in fields:
+        values = grid.get(field, CONFIG_OPTIONS[field])
+        axes.append(values if isinstance(values, list) else [values])
+
+    extras = {k: v for k, v in grid.items() if k not in CONFIG_OPTIONS}
+
+    for combo in itertools.product(*axes):
+        config = dict(zip(fields, combo))
+        config.update(extras)
+        yield config
+
+
+def record_key(config: dict) -> str:
+    raw = json.dumps(config_key(config))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+# -----------------------------------------
+# Resume Support
+# -----------------------------------------
+
+def load_completed_keys(output_path: str) -> set:
+    completed = set()
+
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Partial line from an interrupted run
+                continue
+
+            if record.get("status") == "ok":
+                completed.add(record["key"])
+
+    return completed
+
+
+# -----------------------------------------
+# Single Campaign Job
+# -----------------------------------------
+
+def generate_one(config: dict, limiter: TokenBucket = None, variants: int = 1) -> dict:
+    if limiter:
+        limiter.acquire()
+
+    start = time.perf_counter()
+    record = {"key": record_key(config), "config": config}
+
+    try:
+        result = run_campaign_pipeline(config)
+        strategy = result["strategy"]
+
+        if "error" in strategy:
+            # Failed generation: recorded as an error so resume retries it, and no assets from empty fields
+            raise RuntimeError(strategy["error"])
+
+        names = CHANNEL_ASSETS.get(config.get("channel_focus"), [])
+        rendered = render_batch([strategy], names, variants)[0] if names else {}
+        assets = {name: texts[0] for name, texts in rendered.items()}
+
+        if variants > 1:
+            record["asset_variants"] = rendered
+
+        record.update({
+            # A refinement that raised leaves a usable but unfinished campaign (app.py shows it as failed):
+            # kept in the output, but counted apart and retried on resume like an error
+            "status": "partial" if result["errors"] else "ok",
+            "strategy": strategy,
+            "score_result": result["score_result"],
+            "refinement_count": result["refinement_count"],
+            "assets": assets,
+            "errors": result["errors"]
+        })
+
+        if "candidates_evaluated" in result:
+            record["candidates_evaluated"] = result["candidates_evaluated"]
+    except Exception as e:
+        record.update({"status": "error", "error": str(e)})
+
+    record["latency_s"] = round(time.perf_counter() - start, 4)
+    return record
+
+
+# -----------------------------------------
+# Batch Runner
+# -----------------------------------------
+
+def run_batch(configs, output_path: str, concurrency: int = DEFAULT_CONCURRENCY,
+              campaigns_per_minute: float = DEFAULT_CAMPAIGNS_PER_MINUTE, limit: int = None, variants: int = 1,
+              store=None):
+    """
+    Runs the full campaign pipeline over `configs` with bounded concurrency
+    and a rate limit, appending one JSON line per campaign to output_path.
+    Configs already completed in output_path are skipped (resume).
+
+    With a CampaignStore (the precompute job app.py serves from),
+    successful campaigns are also written to the store and resume is by
+    store freshness instead: only configs without a fresh entry run.
+    """
+    completed = load_completed_keys(output_path)
+    limiter = TokenBucket.per_minute(campaigns_per_minute, burst=concurrency) if campaigns_per_minute else None
+
+    latencies = []
+    counts = {"ok": 0, "partial": 0, "error": 0, "skipped": 0}
+    write_lock = threading.Lock()
+    start = time.perf_counter()
+
+    def report(final: bool = False):
+        elapsed = time.perf_counter() - start
+        done = counts["ok"] + counts["partial"] + counts["error"]
+        rate = done / elapsed * 60 if elapsed else 0.0
+        prefix = "Finished" if final else "Progress"
+        print(f"{prefix}: {counts['ok']} ok, {counts['partial']} partial, {counts['error']} failed, "
+              f"{counts['skipped']} skipped | "
+              f"{rate:.1f} campaigns/min | {format_latencies(summarize_latencies(latencies))}")
+
+    def pending_configs():
+        submitted = 0
+        for config in configs:
+            if limit is not None and submitted >= limit:
+                return
+            done = store.has_fresh(config) if store else record_key(config) in completed
+            if done:
+                counts["skipped"] += 1
+                continue
+            submitted += 1
+            yield config
+
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as executor:
+
+        source = pending_configs()
+        in_flight = set()
+
+        def top_up():
+            # Keep at most 2x concurrency jobs queued so huge grids stay lazy
+            while len(in_flight) < concurrency * 2:
+                config = next(source, None)
+                if config is None:
+                    return
+                in_flight.add(executor.submit(generate_one, config, limiter, variants))
+
+        top_up()
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                in_flight.discard(future)
+                record = future.result()
+
+                with write_lock:
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+
+                if store and record["status"] == "ok":
+                    store.put(record["config"], record, source="precompute")
+
+                counts[record["status"]] += 1
+                latencies.append(record["latency_s"])
+
+                if (counts["ok"] + counts["partial"] + counts["error"]) % PROGRESS_EVERY == 0:
+                    report()
+
+            top_up()
+
+    report(final=True)
+
+    return {
+        "counts": counts,
+        "elapsed_s": time.perf_counter() - start,
+        "latency": summarize_latencies(latencies)
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Headless bulk campaign generation")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--configs", help="JSONL file with one campaign config per line")
+    source.add_argument("--grid", help="JSON grid spec (field -> list of values), or 'full' for every combination")
+    parser.add_argument("--output", default="../batch_results.jsonl", help="JSONL output (appended, used for resume)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=DEFAULT_CAMPAIGNS_PER_MINUTE, help="Max campaigns started per minute (0 = unlimited)")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many new campaigns")
+    parser.add_argument("--variants", type=int, default=1, choices=range(1, MAX_VARIANTS + 1), help="A/B variants per asset")
+    parser.add_argument("--store", action="store_true",
+                        help="Precompute: also write campaigns to the campaign store and skip configs already fresh there")
+    args = parser.parse_args()
+
+    if args.configs:
+        configs = iter_jsonl_configs(args.configs)
+    elif args.grid == "full":
+        configs = iter_grid_configs()
+    else:
+        with open(args.grid, "r", encoding="utf-8") as f:
+            configs = iter_grid_configs(json.load(f))
+
+    store = get_campaign_store() if args.store else None
+    summary = run_batch(configs, args.output, args.concurrency, args.rate, args.limit, args.variants, store)
+
+    if store:
+        print(f"Campaign store: {json.dumps(store.stats())}")
+
+    sys.exit(0 if summary["counts"]["error"] == summary["counts"]["partial"] == 0 else 1)
@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# -----------------------------------------
+# API Load Test
+# -----------------------------------------
+# Starts a local OpenAI-style fake LLM endpoint, points the Groq SDK at it
+# (GROQ_BASE_URL) and runs api_server.py in a subprocess against it, then
+# fires concurrent /strategy requests and reports throughput, latency and
+# the Server-Timing stage breakdown. No network or API key needed.
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def configure_env(args, llm_port: int):
+    os.environ["LLM_BACKEND"] = "groq"
+    os.environ["GROQ_API_KEY"] = "load-test-key"
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{llm_port}"
+    os.environ["LLM_REQUESTS_PER_MINUTE"] = "0"
+    os.environ["LLM_TOKENS_PER_MINUTE"] = "0"
+    os.environ["EMBEDDING_PROVIDER"] = args.embedder
+    os.environ["RESPONSE_CACHE_ENABLED"] = "1" if args.response_cache else "0"
+    os.environ["API_LLM_CONCURRENCY"] = str(args.llm_concurrency)
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.llm_concurrency)
+
+    workdir = tempfile.mkdtemp(prefix="nexflow_api_bench_")
+    os.environ["CHROMA_DIR"] = os.path.join(workdir, "chroma_db")
+    os.environ["RESPONSE_CACHE_PATH"] = os.path.join(workdir, "response_cache.sqlite")
+
+
+# -----------------------------------------
+# Fake OpenAI-style LLM Endpoint
+# -----------------------------------------
+
+async def start_fake_llm(port: int, latency: float, jitter: float, rate_limit_rate: float, seed: int):
+    from aiohttp import web
+    from llm_backends import FakeLLMBackend
+
+    fake = FakeLLMBackend(latency=latency, jitter=jitter, rate_limit_rate=rate_limit_rate, seed=seed)
+
+    async def chat_completions(request):
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        fake._record_call()
+
+        if fake.sample_rate_limited():
+            return web.json_response({"error": {"message": "Rate limit reached"}}, status=429,
+                                     headers={"retry-after": "0.5"})
+
+        content = fake.complete_text(prompt)
+        await asyncio.sleep(fake.sample_delay() + fake.decode_delay(content))
+
+        return web.json_response({
+            "id": f"chatcmpl-{fake.call_count}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4
+            }
+        })
+
+    app = web.Application()
+    app.router.add_post("/openai/v1/chat/completions", chat_completions)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner, fake
+
+
+# -----------------------------------------
+# Load Generator
+# -----------------------------------------
+
+def random_config(rng: random.Random) -> dict:
+    from pipeline import CONFIG_OPTIONS
+
+    config = {field: rng.choice(options) for field, options in CONFIG_OPTIONS.items()}
+    config["customer_details"] = ""
+    return config
+
+
+def parse_server_timing(header: str) -> dict:
+    stages = {}
+    for part in header.split(","):
+        name, _, duration = part.strip().partition(";dur=")
+        if duration:
+            stages[name] = float(duration)
+    return stages
+
+
+async def wait_until_healthy(session, base_url: str, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(f"{base_url}/health") as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError("API server did not become healthy")
+
+
+async def run_load(base_url: str, requests: int, concurrency: int, seed: int) -> list:
+    import aiohttp
+
+    rng = random.Random(seed)
+    configs = [random_config(rng) for _ in range(requests)]
+    slots = asyncio.Semaphore(concurrency)
+    rows = []
+
+    async with aiohttp.ClientSession() as session:
+        await wait_until_healthy(session, base_url)
+
+        async def one(config):
+            async with slots:
+                start = time.perf_counter()
+                async with session.post(f"{base_url}/strategy", json={"config": config}) as response:
+                    await response.read()
+                    rows.append({
+                        "status": response.status,
+                        "latency_s": time.perf_counter() - start,
+                        "stages": parse_server_timing(response.headers.get("Server-Timing", ""))
+                    })
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(config) for config in configs))
+        wall_s = time.perf_counter() - start
+
+    return rows, wall_s
+
+
+async def main(args):
+    llm_port, api_port = free_port(), free_port()
+    configure_env(args, llm_port)
+
+    from build_vectorstore import build_index
+    from perf_stats import format_latencies, summarize_latencies
+
+    build_index()
+
+    runner, fake = await start_fake_llm(llm_port, args.latency, args.jitter, args.rate_limit_rate, args.seed)
+    server = subprocess.Popen(
+        [sys.executable, "api_server.py", "--host", "127.0.0.1", "--port", str(api_port)],
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+
+    try:
+        rows, wall_s = await run_load(f"http://127.0.0.1:{api_port}", args.requests, args.concurrency, args.seed)
+    finally:
+        server.terminate()
+        server.wait()
+        await runner.cleanup()
+
+    ok = [r for r in rows if r["status"] == 200]
+    print(f"\n{len(ok)}/{len(rows)} requests OK in {wall_s:.2f}s -> {len(rows) / wall_s:.1f} req/s "
+          f"(client concurrency {args.concurrency}, LLM slots {args.llm_concurrency}, "
+          f"fake LLM {args.latency:.2f}s +/- {args.jitter:.2f}s, {fake.call_count} LLM calls)")
+    print(f"Latency: {format_latencies(summarize_latencies([r['latency_s'] for r in rows]))}")
+
+    stage_names = sorted({name for r in ok for name in r["stages"]})
+    for name in stage_names:
+        values = [r["stages"][name] / 1000 for r in ok if name in r["stages"]]
+        print(f"  {name:24s} {format_latencies(summarize_latencies(values), 'ms', 1000)}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"wall_s": wall_s, "rows": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Load test api_server.py against a local fake LLM endpoint")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent client connections")
+    parser.add_argument("--llm-concurrency", type=int, default=16, help="API_LLM_CONCURRENCY / LLM_MAX_CONCURRENCY for the server")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM mean latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of fake LLM calls answered with 429")
+    parser.add_argument("--embedder", default="hashing")
+    parser.add_argument("--response-cache", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Write per-request rows to this JSON file")
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
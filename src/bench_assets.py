@@ -0,0 +1,207 @@
+import argparse
+import random
+import time
+
+from asset_renderer import ASSET_NAMES, MAX_VARIANTS, asset_cache, render_asset, render_batch
+
+
+# -----------------------------------------
+# Reference: original per-asset generators
+# -----------------------------------------
+# Copies of the campaign_generator functions before asset_renderer (the
+# later, active definitions of the duplicated landing hero / paid ad).
+
+def format_proof_points_reference(strategy: dict, max_points: int = None):
+    proofs = strategy.get("supporting_proof_points", [])
+
+    if not proofs:
+        return "- Strong strategic foundation\n"
+
+    if max_points:
+        proofs = proofs[:max_points]
+
+    formatted = ""
+    for p in proofs:
+        formatted += f"- {p}\n"
+
+    return formatted
+
+
+def linkedin_post_reference(strategy: dict):
+    key_insight = strategy.get("key_insight", "")
+    value_prop = strategy.get("value_proposition", "")
+    strategic_angle = strategy.get("strategic_campaign_angle", "")
+    proof_text = format_proof_points_reference(strategy)
+
+    return f"""
+{key_insight}
+
+{value_prop}
+
+Why this matters:
+{proof_text}
+
+Strategic Focus:
+{strategic_angle}
+
+#B2BMarketing #SaaS #Growth
+""".strip()
+
+
+def cold_email_reference(strategy: dict):
+    key_insight = strategy.get("key_insight", "")
+    value_prop = strategy.get("value_proposition", "")
+    proof_text = format_proof_points_reference(strategy, max_points=2)
+
+    return f"""
+Subject: Strategic Growth Opportunity
+
+Hi [Name],
+
+{key_insight}
+
+{value_prop}
+
+Here’s what makes this powerful:
+{proof_text}
+
+Let’s connect and explore how this can drive measurable results.
+
+Best,
+[Your Name]
+""".strip()
+
+
+def landing_hero_reference(strategy: dict):
+    key_insight = strategy.get("key_insight", "Unlock Your Growth Potential")
+    value_prop = strategy.get("value_proposition", "AI-powered marketing automation")
+    return f"""
+Headline: {key_insight[:70].rstrip(' .,!?')} – Powered by NexFlow
+Subheadline: {value_prop}. Join 150+ companies with 38% better leads.
+CTA: Start Free Trial Today
+"""
+
+
+def paid_ad_reference(strategy: dict):
+    angle = strategy.get("strategic_campaign_angle", "AI-Driven Growth")
+    proof_text = format_proof_points_reference(strategy, max_points=1).strip('- \n')
+    return f"""
+Headline: {angle[:50]}... – Scale Smarter
+Description: {proof_text} 38% more qualified leads. Proven in DACH region.
+CTA: Get Started – Free Trial
+"""
+
+
+REFERENCE = {
+    "LinkedIn Post": linkedin_post_reference,
+    "Cold Email": cold_email_reference,
+    "Landing Hero": landing_hero_reference,
+    "Paid Ad": paid_ad_reference,
+}
+
+
+# -----------------------------------------
+# Synthetic Strategies
+# -----------------------------------------
+
+INSIGHTS = [
+    "Enterprise CMO teams face a clear growth opportunity: pipeline attribution is fragmented across tools.",
+    "Startup founders lose qualified leads because follow-up is manual and slow.",
+    "Marketing managers spend 40% of their week on reporting instead of campaigns.",
+    "",
+]
+PROPS = [
+    "NexFlow helps increase qualified leads and improve conversion by combining AI lead scoring with automation.",
+    "NexFlow reduces cost per lead by 19% with predictive audience targeting.",
+]
+PROOFS = [
+    "38% average increase in qualified lead conversion",
+    "19% lower cost per acquisition in DACH campaigns",
+    "150+ B2B companies onboarded in 18 months",
+    "2.4x faster campaign launch with AI templates",
+    "Native HubSpot and Salesforce sync",
+]
+ANGLES = [
+    "Run a focused campaign positioning NexFlow around measurable pipeline impact.",
+    "Focus the campaign on speed-to-lead for lean teams.",
+]
+
+
+def synthetic_strategies(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    strategies = []
+
+    for i in range(count):
+        strategy = {
+            "persona": rng.choice(["Enterprise CMO", "Startup Founder", "Marketing Manager"]),
+            "key_insight": f"{rng.choice(INSIGHTS)} (#{i})",
+            "value_proposition": rng.choice(PROPS),
+            "supporting_proof_points": rng.sample(PROOFS, rng.randint(0, 4)),
+            "strategic_campaign_angle": rng.choice(ANGLES),
+        }
+        if rng.random() < 0.05:
+            del strategy["strategic_campaign_angle"]
+        strategies.append(strategy)
+
+    return strategies
+
+
+# -----------------------------------------
+# Runner
+# -----------------------------------------
+
+def timed(fn, repeats: int = 5, setup=None) -> float:
+    # Best of `repeats` runs, to keep GC / scheduler noise out of the comparison
+    best = float("inf")
+    for _ in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(count: int, variants: int, seed: int):
+    strategies = synthetic_strategies(count, seed)
+    renders = count * len(ASSET_NAMES)
+
+    # Variant 0 must match the original generators byte for byte
+    batch = render_batch(strategies)
+    mismatches = sum(
+        batch[i][name][0] != REFERENCE[name](strategy)
+        for i, strategy in enumerate(strategies) for name in ASSET_NAMES
+    )
+    print(f"{count} strategies x {len(ASSET_NAMES)} assets, variant 0 mismatches vs reference: {mismatches}\n")
+
+    reference_s = timed(lambda: [REFERENCE[name](s) for s in strategies for name in ASSET_NAMES])
+    batch_s = timed(lambda: render_batch(strategies))
+    batch_k_s = timed(lambda: render_batch(strategies, variants=variants))
+
+    cold_s = timed(lambda: [render_asset(name, s) for s in strategies for name in ASSET_NAMES],
+                   setup=asset_cache.clear)
+    warm_subset = strategies[: asset_cache.maxsize // len(ASSET_NAMES)]
+    warm_s = timed(lambda: [render_asset(name, s) for s in warm_subset for name in ASSET_NAMES])
+
+    rows = [
+        ("reference generators", reference_s, renders),
+        ("render_batch (1 variant)", batch_s, renders),
+        (f"render_batch ({variants} variants)", batch_k_s, renders * variants),
+        ("render_asset (cold)", cold_s, renders),
+        ("render_asset (memo hit)", warm_s, len(warm_subset) * len(ASSET_NAMES)),
+    ]
+
+    for label, seconds, count_rendered in rows:
+        print(f"{label:28s} {seconds * 1000:9.1f} ms  {count_rendered / seconds:12,.0f} assets/s  "
+              f"{seconds / count_rendered * 1e6:7.2f} us/asset")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Asset rendering: original generators vs asset_renderer")
+    parser.add_argument("--strategies", type=int, default=5000)
+    parser.add_argument("--variants", type=int, default=MAX_VARIANTS)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    run_benchmark(args.strategies, args.variants, args.seed)
@@ -0,0 +1,103 @@
+import argparse
+import json
+import random
+import time
+
+import ephemeral_index
+from embedding_providers import build_embeddings
+from perf_stats import format_latencies, summarize_latencies
+from pipeline import build_query
+from rag_pipeline import EMBEDDING_MODEL
+
+
+# -----------------------------------------
+# Customer Details Overhead Benchmark
+# -----------------------------------------
+# What the ephemeral customer-notes index adds to a request: chunking,
+# embedding the (prefiltered) chunks and the cosine search, for notes of
+# growing size. "cold" clears both caches before every run (a new paste),
+# "warm" is the same notes again (refinement, best-of-N, rerun). Each
+# note set has one planted line that matches the campaign config; hit
+# rate is how often it is among the returned chunks.
+#
+#   python bench_customer_details.py --sizes 500,5000,50000 --embedder onnx
+
+FILLER = [
+    "Call {i}: discussed onboarding timeline and invoicing contacts.",
+    "Account owner changed in Q{q}; renewal conversation scheduled.",
+    "Support ticket #{i} about SSO configuration was resolved.",
+    "Procurement asked for the security questionnaire again (round {q}).",
+    "Quarterly review agenda item {i}: usage of reporting dashboards.",
+]
+
+PLANTED = "The customer runs lead generation in the DACH region and wants FinTech pipeline growth on LinkedIn."
+
+CONFIG = {
+    "campaign_type": "Lead Generation", "industry": "FinTech", "region": "DACH",
+    "budget_level": "Low Budget", "channel_focus": "LinkedIn Only", "tone_preference": "Conversational"
+}
+
+
+def synthetic_notes(chars: int, rng: random.Random) -> str:
+    lines = []
+    while sum(len(line) + 1 for line in lines) < chars:
+        lines.append(rng.choice(FILLER).format(i=rng.randint(1, 999), q=rng.randint(1, 4)))
+
+    lines.insert(rng.randrange(len(lines) + 1), PLANTED)
+    return "\n".join(lines)
+
+
+def run_size(chars: int, embeddings, query: str, args) -> dict:
+    rng = random.Random(args.seed + chars)
+    space = f"bench:{args.embedder}"
+    cold, warm = [], []
+    hits = 0
+
+    for _ in range(args.repeats):
+        notes = synthetic_notes(chars, rng)
+
+        ephemeral_index.chunk_embedding_cache.clear()
+        ephemeral_index.index_cache.clear()
+
+        for latencies in (cold, warm):
+            start = time.perf_counter()
+            index = ephemeral_index.build_index(notes, query, embeddings, space)
+            docs = index.search(embeddings.embed_query(query))
+            latencies.append(time.perf_counter() - start)
+
+        hits += any(PLANTED in doc.page_content for doc in docs)
+
+    chunks = len(ephemeral_index.split_details(notes))
+    print(f"{chars:>7,} chars  {chunks:>4} chunks ({len(index)} embedded)  planted hit rate {hits / args.repeats:.2f}")
+    print(f"          cold  {format_latencies(summarize_latencies(cold), 'ms', 1000)}")
+    print(f"          warm  {format_latencies(summarize_latencies(warm), 'ms', 1000)}")
+
+    return {
+        "chunks": chunks,
+        "embedded": len(index),
+        "hit_rate": hits / args.repeats,
+        "cold": summarize_latencies(cold),
+        "warm": summarize_latencies(warm)
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Ephemeral customer-details index: per-request overhead")
+    parser.add_argument("--sizes", default="500,5000,50000", help="Comma-separated note sizes (chars)")
+    parser.add_argument("--embedder", default="hashing")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    embeddings = build_embeddings(args.embedder, EMBEDDING_MODEL)
+    query = build_query(CONFIG)
+    embeddings.embed_query(query)       # model load / warm-up outside the timings
+    ephemeral_index.build_index(PLANTED, query, embeddings, "bench:warm-up").search(embeddings.embed_query(query))
+
+    report = {size: run_size(size, embeddings, query, args) for size in map(int, args.sizes.split(","))}
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,121 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+
+# -----------------------------------------
+# Offline Environment (set before pipeline imports)
+# -----------------------------------------
+# Fake LLM, hashing embeddings and a throwaway Chroma directory, so the
+# whole campaign flow runs with no network and no API key.
+
+def configure_offline_env(args):
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = str(args.latency)
+    os.environ["FAKE_LLM_JITTER"] = str(args.jitter)
+    os.environ["FAKE_LLM_MALFORMED_RATE"] = str(args.malformed_rate)
+    os.environ["FAKE_LLM_RATE_LIMIT_RATE"] = str(args.rate_limit_rate)
+    os.environ["FAKE_LLM_LOW_QUALITY_RATE"] = str(args.low_quality_rate)
+    os.environ["FAKE_LLM_SEED"] = str(args.seed)
+    os.environ["EMBEDDING_PROVIDER"] = args.embedder
+    os.environ["RESPONSE_CACHE_ENABLED"] = "1" if args.response_cache else "0"
+
+    workdir = tempfile.mkdtemp(prefix="nexflow_e2e_")
+    os.environ["CHROMA_DIR"] = os.path.join(workdir, "chroma_db")
+    os.environ["RESPONSE_CACHE_PATH"] = os.path.join(workdir, "response_cache.sqlite")
+
+
+def sample_configs(count: int, seed: int, generation_mode: str):
+    from pipeline import CONFIG_OPTIONS
+
+    rng = random.Random(seed)
+    configs = []
+
+    for _ in range(count):
+        config = {field: rng.choice(options) for field, options in CONFIG_OPTIONS.items()}
+        config["customer_details"] = ""
+        config["generation_mode"] = generation_mode
+        configs.append(config)
+
+    return configs
+
+
+# -----------------------------------------
+# Harness
+# -----------------------------------------
+
+def run_harness(configs: list) -> list:
+    from build_vectorstore import build_index
+    from pipeline import run_campaign_pipeline
+    from rag_pipeline import get_llm_backend
+
+    build_index()
+    backend = get_llm_backend()
+
+    rows = []
+
+    for config in configs:
+        calls_before = backend.call_count
+        start = time.perf_counter()
+
+        try:
+            result = run_campaign_pipeline(config)
+            row = {
+                "status": "ok",
+                "score": result["score_result"]["total_score"],
+                "refinements": result["refinement_count"],
+                "candidates": result.get("candidates_evaluated"),
+                "errors": len(result["errors"])
+            }
+        except Exception as e:
+            row = {"status": "error", "error": str(e)}
+
+        row["latency_s"] = time.perf_counter() - start
+        row["llm_calls"] = backend.call_count - calls_before
+        row["persona"] = config["persona"]
+        rows.append(row)
+
+        print(f"{row['status']:5s} {config['persona']:18s} {row['latency_s']:.3f}s  "
+              f"llm_calls={row['llm_calls']}  score={row.get('score', '-')}  "
+              f"refinements={row.get('refinements', '-')}")
+
+    return rows
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="End-to-end campaign latency harness with a fake LLM")
+    parser.add_argument("--campaigns", type=int, default=20)
+    parser.add_argument("--mode", default="Serial Refinement", help="Generation mode from pipeline.GENERATION_MODES")
+    parser.add_argument("--latency", type=float, default=0.8, help="Fake LLM mean latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--malformed-rate", type=float, default=0.05)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--low-quality-rate", type=float, default=0.3, help="Share of outputs that trigger refinement")
+    parser.add_argument("--embedder", default="hashing")
+    parser.add_argument("--response-cache", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Write per-request rows to this JSON file")
+    args = parser.parse_args()
+
+    configure_offline_env(args)
+
+    from perf_stats import format_latencies, summarize_latencies
+
+    rows = run_harness(sample_configs(args.campaigns, args.seed, args.mode))
+
+    ok = [r for r in rows if r["status"] == "ok"]
+    calls = [r["llm_calls"] for r in rows]
+
+    print(f"\n{len(ok)}/{len(rows)} campaigns succeeded")
+    print(f"Latency: {format_latencies(summarize_latencies([r['latency_s'] for r in rows]))}")
+    print(f"LLM calls per campaign: mean {sum(calls) / len(calls):.2f}, max {max(calls)}")
+    if ok:
+        print(f"Refinements per campaign: mean {sum(r['refinements'] for r in ok) / len(ok):.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
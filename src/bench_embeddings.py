@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+# -----------------------------------------
+# Embedding Provider Benchmark & Drift Check
+# -----------------------------------------
+# Each provider runs in a fresh interpreter (so RSS and cold start are its
+# own) and embeds the same chunk corpus and query set. The parent compares
+# the vectors with the reference provider: per-text cosine similarity and
+# top-k retrieval agreement.
+#
+#   python bench_embeddings.py --providers huggingface,onnx,onnx:int8
+
+RECALL_K = 5
+DRIFT_MIN_COSINE = 0.98     # per-text cosine below this counts as drift
+
+
+def rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(label: str, corpus_path: str, output_path: str, repeats: int):
+    provider, _, variant = label.partition(":")
+    os.environ["ONNX_QUANTIZED"] = "1" if variant == "int8" else "0"
+
+    start = time.perf_counter()
+    from embedding_providers import build_embeddings
+    from rag_pipeline import EMBEDDING_MODEL
+
+    embeddings = build_embeddings(provider, EMBEDDING_MODEL)
+    embeddings.embed_query("warm up")
+    load_s = time.perf_counter() - start
+    load_rss = rss_mb()
+
+    with open(corpus_path, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    start = time.perf_counter()
+    doc_vectors = embeddings.embed_documents(corpus["documents"])
+    embed_s = time.perf_counter() - start
+
+    query_latencies = []
+    query_vectors = []
+    for query in corpus["queries"]:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            vector = embeddings.embed_query(query)
+            query_latencies.append(time.perf_counter() - start)
+        query_vectors.append(vector)
+
+    np.savez(output_path, documents=np.asarray(doc_vectors, dtype=np.float32),
+             queries=np.asarray(query_vectors, dtype=np.float32))
+
+    print(json.dumps({
+        "load_s": load_s,
+        "load_rss_mb": load_rss,
+        "peak_rss_mb": rss_mb(),
+        "embed_s": embed_s,
+        "docs_per_s": len(corpus["documents"]) / embed_s,
+        "query_latencies": query_latencies
+    }))
+
+
+def measure(label: str, corpus_path: str, workdir: str, repeats: int) -> dict:
+    output_path = os.path.join(workdir, label.replace(":", "_") + ".npz")
+
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", label,
+         "--corpus", corpus_path, "--output", output_path, "--repeats", str(repeats)],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "worker failed"}
+
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    stats["vectors"] = dict(np.load(output_path))
+    return stats
+
+
+# -----------------------------------------
+# Drift
+# -----------------------------------------
+
+def row_cosines(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def top_k_overlap(reference: dict, candidate: dict, k: int = RECALL_K) -> float:
+    """Mean share of the reference top-k chunks each query also retrieves with the candidate."""
+    def top_k(vectors):
+        scores = vectors["queries"] @ vectors["documents"].T
+        return np.argsort(-scores, axis=1)[:, :k]
+
+    ref_top, cand_top = top_k(reference), top_k(candidate)
+    return float(np.mean([len(set(r) & set(c)) / k for r, c in zip(ref_top, cand_top)]))
+
+
+def drift_report(reference: dict, candidate: dict) -> dict:
+    docs = row_cosines(reference["documents"], candidate["documents"])
+    queries = row_cosines(reference["queries"], candidate["queries"])
+    cosines = np.concatenate([docs, queries])
+
+    return {
+        "mean_cosine": float(cosines.mean()),
+        "min_cosine": float(cosines.min()),
+        "below_threshold": int((cosines < DRIFT_MIN_COSINE).sum()),
+        f"top{RECALL_K}_overlap": top_k_overlap(reference, candidate)
+    }
+
+
+# -----------------------------------------
+# Runner
+# -----------------------------------------
+
+def build_corpus_file(path: str, scale: int):
+    from bench_retrieval import QUERY_SET
+    from build_vectorstore import CHUNK_OVERLAP, CHUNK_SIZE, load_documents, split_documents
+
+    chunks = split_documents(load_documents(), CHUNK_SIZE, CHUNK_OVERLAP)
+    documents = [chunk.page_content for chunk in chunks] * scale
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"documents": documents, "queries": [item["query"] for item in QUERY_SET]}, f)
+
+    return len(documents)
+
+
+def run_benchmark(labels: list, reference: str, scale: int, repeats: int) -> dict:
+    from perf_stats import format_latencies, summarize_latencies
+
+    workdir = tempfile.mkdtemp(prefix="nexflow_embed_bench_")
+    corpus_path = os.path.join(workdir, "corpus.json")
+    count = build_corpus_file(corpus_path, scale)
+    print(f"Corpus: {count} chunks, {repeats} timed runs per query\n")
+
+    results = {}
+    for label in dict.fromkeys([reference] + labels):
+        results[label] = measure(label, corpus_path, workdir, repeats)
+
+    report = {}
+
+    for label, stats in results.items():
+        if "error" in stats:
+            print(f"{label:14s} FAILED: {stats['error']}")
+            report[label] = {"error": stats["error"]}
+            continue
+
+        latency = summarize_latencies(stats["query_latencies"])
+        print(f"{label:14s} load {stats['load_s']:.2f}s  RSS {stats['load_rss_mb']:.0f} MB "
+              f"(peak {stats['peak_rss_mb']:.0f} MB)  {stats['docs_per_s']:.1f} chunks/s  "
+              f"query {format_latencies(latency, 'ms', 1000)}")
+
+        report[label] = {key: value for key, value in stats.items() if key not in ("vectors", "query_latencies")}
+        report[label]["query_latency"] = latency
+
+    if "error" not in results[reference]:
+        print(f"\nDrift vs {reference} (per-text cosine threshold {DRIFT_MIN_COSINE}):")
+        for label, stats in results.items():
+            if label == reference or "error" in stats:
+                continue
+            if stats["vectors"]["documents"].shape != results[reference]["vectors"]["documents"].shape:
+                print(f"{label:14s} different embedding space, skipped")
+                continue
+
+            drift = drift_report(results[reference]["vectors"], stats["vectors"])
+            print(f"{label:14s} mean {drift['mean_cosine']:.4f}  min {drift['min_cosine']:.4f}  "
+                  f"below threshold {drift['below_threshold']}  top{RECALL_K} overlap {drift[f'top{RECALL_K}_overlap']:.2f}")
+            report[label]["drift"] = drift
+
+    return report
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Embedding provider throughput, latency, memory and drift")
+    parser.add_argument("--providers", default="onnx,onnx:int8",
+                        help="Comma-separated provider[:int8] labels to compare with the reference")
+    parser.add_argument("--reference", default="huggingface")
+    parser.add_argument("--scale", type=int, default=4, help="Copies of the chunk corpus to embed")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.corpus, args.output, args.repeats)
+        sys.exit(0)
+
+    report = run_benchmark(args.providers.split(","), args.reference, args.scale, args.repeats)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+
+# -----------------------------------------
+# Ingestion Benchmark
+# -----------------------------------------
+# Writes a synthetic knowledge base (perturbed copies of ../data files)
+# and indexes it from scratch in a fresh interpreter, either with the
+# streaming build_index or eagerly (everything loaded, split and embedded
+# in one go, like the original build; both also build BM25). Reports chunks/s and peak RSS of
+# the indexing process as the corpus grows.
+#
+#   python bench_ingest.py --files 200,1000,4000 --workers 1,4
+
+INGEST_SNIPPET = """
+import json, sys, time
+mode, data_dir, workers = sys.argv[1], sys.argv[2], int(sys.argv[3])
+from build_vectorstore import assign_chunk_ids, build_index, load_documents, peak_rss_mb, split_documents
+from bm25_index import BM25Index
+from rag_pipeline import BM25_INDEX_PATH, get_vectorstore
+
+start = time.perf_counter()
+if mode == "streaming":
+    stats = build_index(data_dir, workers=workers)
+    chunks = stats["added"] + stats["unchanged"]
+else:
+    all_chunks = assign_chunk_ids(split_documents(load_documents(data_dir)))
+    get_vectorstore().add_documents(all_chunks, ids=[chunk.id for chunk in all_chunks])
+    BM25Index.from_documents(all_chunks).save(BM25_INDEX_PATH)
+    chunks = len(all_chunks)
+elapsed = time.perf_counter() - start
+print(json.dumps({"chunks": chunks, "elapsed_s": elapsed, "peak_rss_mb": peak_rss_mb()}))
+"""
+
+
+def write_corpus(directory: str, files: int, seed: int) -> int:
+    from build_vectorstore import load_documents
+
+    documents = [doc for doc in load_documents() if doc.page_content.strip()]
+    vocabulary = sorted({word for doc in documents for word in doc.page_content.split()})
+    rng = random.Random(seed)
+
+    for i in range(files):
+        doc = documents[i % len(documents)]
+        words = doc.page_content.split()
+        for _ in range(max(len(words) // 10, 1)):
+            words[rng.randrange(len(words))] = rng.choice(vocabulary)
+
+        # Repeat each copy so files are a few KB, like real case studies
+        name = f"{doc.metadata['category']}_{i:05d}.txt"
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write("\n\n".join(" ".join(words) for _ in range(3)))
+
+    return files
+
+
+def run_ingest(mode: str, data_dir: str, workers: int, args) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "CHROMA_DIR": tempfile.mkdtemp(prefix="nexflow_ingest_"),
+        "EMBEDDING_PROVIDER": args.embedder,
+        "VECTOR_BACKEND": args.backend,
+        "PERSONA_PARTITIONS": "0"
+    })
+
+    result = subprocess.run(
+        [sys.executable, "-c", INGEST_SNIPPET, mode, data_dir, str(workers)],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        # e.g. Chroma refuses a one-shot add above its max batch size
+        return {"error": result.stderr.strip().splitlines()[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Streaming vs eager ingestion: throughput and peak memory")
+    parser.add_argument("--files", default="200,1000,4000", help="Comma-separated corpus sizes (files)")
+    parser.add_argument("--workers", default="1,4", help="Comma-separated parse/split worker counts")
+    parser.add_argument("--backend", default="numpy")
+    parser.add_argument("--embedder", default="hashing")
+    parser.add_argument("--skip-eager", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = {}
+
+    for files in map(int, args.files.split(",")):
+        data_dir = tempfile.mkdtemp(prefix="nexflow_corpus_")
+        write_corpus(data_dir, files, args.seed)
+
+        runs = [("streaming", int(workers)) for workers in args.workers.split(",")]
+        if not args.skip_eager:
+            runs.append(("eager", 1))
+
+        for mode, workers in runs:
+            stats = run_ingest(mode, data_dir, workers, args)
+            label = f"{files} files {mode}" + (f" x{workers}" if mode == "streaming" else "")
+            report[label] = stats
+            if "error" in stats:
+                print(f"{label:28s} failed: {stats['error']}")
+                continue
+            print(f"{label:28s} {stats['chunks']:>8,} chunks  {stats['chunks'] / stats['elapsed_s']:8.1f} chunks/s  "
+                  f"peak RSS {stats['peak_rss_mb']:.0f} MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
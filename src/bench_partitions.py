@@ -0,0 +1,145 @@
+import argparse
+import json
+import random
+import tempfile
+import time
+
+from bench_vector_backends import QUERIES, build_corpus
+from embedding_providers import build_embeddings
+from perf_stats import format_latencies, summarize_latencies
+from rag_pipeline import EMBEDDING_MODEL, PERSONA_FILTERS, PERSONA_STRATEGY, RETRIEVAL_FETCH_K, RETRIEVAL_K, partition_name
+from vector_backends import build_vector_backend, copy_vectors, upsert_embeddings
+
+
+# -----------------------------------------
+# Persona Partition Benchmark
+# -----------------------------------------
+# Filtered MMR over the whole index vs unfiltered MMR over the persona's
+# pre-partitioned collection, as the corpus grows. A share of the scaled
+# chunks is moved to categories no persona uses (archives, other
+# products), as in a real multi-team knowledge base.
+#
+#   python bench_partitions.py --sizes 5000,20000,50000 --backends numpy,chroma
+
+def synthetic_corpus(size: int, other_share: float, seed: int) -> list:
+    base = build_corpus(1)
+    corpus = build_corpus(max(size // len(base), 1), seed)[:size]
+
+    rng = random.Random(seed)
+    for chunk in corpus[len(base):]:
+        if rng.random() < other_share:
+            chunk.metadata["category"] = f"archive_{chunk.metadata['category']}"
+
+    return corpus
+
+
+def add_corpus(store, corpus: list, vectors: list, batch_size: int = 1000):
+    for start in range(0, len(corpus), batch_size):
+        batch = corpus[start:start + batch_size]
+        ids = [chunk.id for chunk in batch]
+        texts = [chunk.page_content for chunk in batch]
+        metadatas = [chunk.metadata for chunk in batch]
+        upsert_embeddings(store, ids, texts, vectors[start:start + batch_size], metadatas)
+
+
+def build_stores(backend: str, directory: str, embeddings, corpus: list) -> tuple:
+    vectors = embeddings.embed_documents([chunk.page_content for chunk in corpus])
+
+    main = build_vector_backend(backend, directory, embeddings)
+    add_corpus(main, corpus, vectors)
+
+    start = time.perf_counter()
+    stores = {}
+    for persona, strategy in PERSONA_STRATEGY.items():
+        categories = set(strategy["filters"])
+        ids = [chunk.id for chunk in corpus if chunk.metadata["category"] in categories]
+        stores[persona] = build_vector_backend(backend, directory, embeddings, collection=partition_name(persona))
+        copy_vectors(main, stores[persona], ids)
+
+    return main, stores, time.perf_counter() - start
+
+
+def time_queries(search, query_vectors: list, repeats: int) -> tuple:
+    latencies = []
+    results = []
+
+    for vector in query_vectors:
+        search(vector)      # warm
+        for _ in range(repeats):
+            start = time.perf_counter()
+            docs = search(vector)
+            latencies.append(time.perf_counter() - start)
+        results.append({doc.id for doc in docs})
+
+    return latencies, results
+
+
+def run_size(backend: str, size: int, embeddings, args) -> dict:
+    corpus = synthetic_corpus(size, args.other_share, args.seed)
+    directory = tempfile.mkdtemp(prefix=f"nexflow_partitions_{backend}_")
+
+    main, stores, partition_build_s = build_stores(backend, directory, embeddings, corpus)
+    query_vectors = [embeddings.embed_query(query) for query in QUERIES]
+
+    filtered_all, partition_all = [], []
+    overlaps = []
+    partition_sizes = {}
+
+    for persona, store in stores.items():
+        partition_sizes[persona] = len(store.get(include=[])["ids"])
+        metadata_filter = PERSONA_FILTERS[persona]
+
+        filtered, filtered_ids = time_queries(
+            lambda v: main.max_marginal_relevance_search_by_vector(
+                v, k=RETRIEVAL_K, fetch_k=RETRIEVAL_FETCH_K, filter=metadata_filter
+            ), query_vectors, args.repeats
+        )
+        partitioned, partition_ids = time_queries(
+            lambda v: store.max_marginal_relevance_search_by_vector(v, k=RETRIEVAL_K, fetch_k=RETRIEVAL_FETCH_K),
+            query_vectors, args.repeats
+        )
+
+        filtered_all += filtered
+        partition_all += partitioned
+        overlaps += [len(a & b) / max(len(a), 1) for a, b in zip(filtered_ids, partition_ids)]
+
+    filtered_stats = summarize_latencies(filtered_all)
+    partition_stats = summarize_latencies(partition_all)
+
+    print(f"{backend:7s} {len(corpus):>7,} chunks  partitions {partition_sizes} (built in {partition_build_s:.2f}s)")
+    print(f"        filtered main index  {format_latencies(filtered_stats, 'ms', 1000)}")
+    print(f"        persona partition    {format_latencies(partition_stats, 'ms', 1000)}  "
+          f"top-{RETRIEVAL_K} agreement {sum(overlaps) / len(overlaps):.2f}")
+
+    return {
+        "chunks": len(corpus),
+        "partition_sizes": partition_sizes,
+        "partition_build_s": partition_build_s,
+        "filtered": filtered_stats,
+        "partition": partition_stats,
+        "agreement": sum(overlaps) / len(overlaps)
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Filtered whole-index retrieval vs per-persona partitions")
+    parser.add_argument("--sizes", default="2000,10000,30000")
+    parser.add_argument("--backends", default="numpy,chroma")
+    parser.add_argument("--embedder", default="hashing")
+    parser.add_argument("--other-share", type=float, default=0.5, help="Share of scaled chunks in non-persona categories")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    embeddings = build_embeddings(args.embedder, EMBEDDING_MODEL)
+    report = {}
+
+    for backend in args.backends.split(","):
+        for size in map(int, args.sizes.split(",")):
+            report[f"{backend}:{size}"] = run_size(backend, size, embeddings, args)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
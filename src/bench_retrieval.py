@@ -0,0 +1,237 @@
+import argparse
+import gc
+import json
+import resource
+import time
+import tracemalloc
+
+from langchain_chroma import Chroma
+
+from bm25_index import BM25Index, reciprocal_rank_fusion
+from build_vectorstore import assign_chunk_ids, load_documents, split_documents
+from embedding_providers import build_embeddings
+from perf_stats import format_latencies, summarize_latencies
+from rag_pipeline import EMBEDDING_MODEL, is_keyword_heavy, PERSONA_FILTERS, RETRIEVAL_FETCH_K, RETRIEVAL_K
+
+
+# -----------------------------------------
+# Fixed Query Set (labeled relevant categories)
+# -----------------------------------------
+
+QUERY_SET = [
+    {"query": "What CRM integrations does NexFlow support?", "relevant": ["product_features"]},
+    {"query": "How much does the Growth plan cost per month?", "relevant": ["pricing_plans"]},
+    {"query": "Is there a free trial available?", "relevant": ["pricing_plans"]},
+    {"query": "Unlimited contacts, dedicated account manager and SLA-backed support", "relevant": ["pricing_plans"]},
+    {"query": "Where is NexFlow based and how much seed funding has it raised?", "relevant": ["company_info"]},
+    {"query": "Is the platform GDPR compliant and hosted in the EU?", "relevant": ["company_info", "product_features"]},
+    {"query": "Customer retention rate and satisfaction rating", "relevant": ["company_info"]},
+    {"query": "What increase in qualified leads do customers report?", "relevant": ["company_info", "pricing_plans"]},
+    {"query": "AI lead scoring from behavioral signals and email engagement", "relevant": ["product_features"]},
+    {"query": "LinkedIn outreach automation workflows", "relevant": ["product_features", "pricing_plans"]},
+    {"query": "Real-time analytics dashboard with revenue attribution", "relevant": ["product_features"]},
+    {"query": "What pain points do marketing managers have?", "relevant": ["target_personas"]},
+    {"query": "Which CTA style works best for executives?", "relevant": ["target_personas"]},
+    {
+        "query": "Campaign Type: Lead Generation\nTarget Industry: Manufacturing\nTarget Region: DACH\n"
+                 "Budget Level: Mid-Range Budget\nPrimary Channel Focus: Multi-Channel",
+        "relevant": ["company_info", "pricing_plans", "product_features"]
+    },
+]
+
+DEFAULT_CHUNK_SETTINGS = [(300, 50), (500, 100), (800, 150)]
+RECALL_KS = [1, 3, 5]
+
+
+# -----------------------------------------
+# Retrieval Methods Under Test
+# -----------------------------------------
+
+def search_similarity(index: dict, query: str, metadata_filter: dict, k: int):
+    return index["vectorstore"].similarity_search(query, k=k, filter=metadata_filter)
+
+
+def search_mmr(index: dict, query: str, metadata_filter: dict, k: int):
+    return index["vectorstore"].max_marginal_relevance_search(
+        query, k=k, fetch_k=max(RETRIEVAL_FETCH_K, k), filter=metadata_filter
+    )
+
+
+def search_bm25(index: dict, query: str, metadata_filter: dict, k: int):
+    hits = index["bm25"].search(query, k=k, categories=filter_categories(metadata_filter))
+    return [doc for doc, _ in hits]
+
+
+def search_hybrid(index: dict, query: str, metadata_filter: dict, k: int):
+    fetch_k = max(RETRIEVAL_FETCH_K, k)
+    vector_docs = index["vectorstore"].similarity_search(query, k=fetch_k, filter=metadata_filter)
+    return reciprocal_rank_fusion([vector_docs, search_bm25(index, query, metadata_filter, fetch_k)], k=k)
+
+
+def search_auto(index: dict, query: str, metadata_filter: dict, k: int):
+    # Same routing as rag_pipeline.retrieve(mode="auto"), against the bench index
+    if is_keyword_heavy(query, index["bm25"]):
+        return search_bm25(index, query, metadata_filter, k)
+    return search_hybrid(index, query, metadata_filter, k)
+
+
+METHODS = {
+    "similarity": search_similarity,
+    "mmr": search_mmr,
+    "bm25": search_bm25,
+    "hybrid": search_hybrid,
+    "auto": search_auto,
+}
+
+
+# -----------------------------------------
+# Index Build
+# -----------------------------------------
+
+def rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def build_bench_index(documents, embeddings, chunk_size: int, chunk_overlap: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    chunks = assign_chunk_ids(split_documents(documents, chunk_size, chunk_overlap))
+
+    vectorstore = Chroma(
+        collection_name=f"bench_{chunk_size}_{chunk_overlap}_{int(start * 1000)}",
+        embedding_function=embeddings
+    )
+    vectorstore.add_documents(chunks, ids=[chunk.id for chunk in chunks])
+    bm25 = BM25Index.from_documents(chunks)
+
+    build_s = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "vectorstore": vectorstore,
+        "bm25": bm25,
+        "chunks": chunks,
+        "build_s": build_s,
+        "python_peak_mb": peak / (1024 * 1024),
+    }
+
+
+# -----------------------------------------
+# Metrics
+# -----------------------------------------
+
+def filter_categories(metadata_filter: dict):
+    if not metadata_filter:
+        return None
+    return set(metadata_filter["category"]["$in"])
+
+
+def recall_at_k(docs, chunks, relevant: set, allowed: set, k: int):
+    """
+    Share of the top-k slots that could hold a relevant chunk and do.
+    None when no relevant chunk exists under the persona filter.
+    """
+    in_scope = [c for c in chunks if allowed is None or c.metadata["category"] in allowed]
+    relevant_available = sum(1 for c in in_scope if c.metadata["category"] in relevant)
+
+    if relevant_available == 0:
+        return None
+
+    hits = sum(1 for d in docs[:k] if d.metadata["category"] in relevant)
+    return hits / min(k, relevant_available)
+
+
+def evaluate(index: dict, method: str, metadata_filter: dict, k: int, repeats: int) -> dict:
+    search = METHODS[method]
+    allowed = filter_categories(metadata_filter)
+
+    latencies = []
+    recalls = {rk: [] for rk in RECALL_KS}
+
+    for item in QUERY_SET:
+        relevant = set(item["relevant"])
+
+        for _ in range(repeats):
+            start = time.perf_counter()
+            docs = search(index, item["query"], metadata_filter, k)
+            latencies.append(time.perf_counter() - start)
+
+        for rk in RECALL_KS:
+            top = docs if rk >= k else search(index, item["query"], metadata_filter, rk)
+            value = recall_at_k(top, index["chunks"], relevant, allowed, rk)
+            if value is not None:
+                recalls[rk].append(value)
+
+    return {
+        "latency": summarize_latencies(latencies),
+        "recall": {rk: (sum(v) / len(v) if v else None) for rk, v in recalls.items()}
+    }
+
+
+# -----------------------------------------
+# Runner
+# -----------------------------------------
+
+def run_benchmark(embedder: str, chunk_settings, k: int, repeats: int, methods=None) -> list:
+    embeddings = build_embeddings(embedder, EMBEDDING_MODEL)
+    documents = load_documents()
+    filters = {"no filter": None, **PERSONA_FILTERS}
+    methods = methods or list(METHODS)
+
+    rows = []
+
+    for chunk_size, chunk_overlap in chunk_settings:
+        index = build_bench_index(documents, embeddings, chunk_size, chunk_overlap)
+
+        print(f"\n== chunk_size={chunk_size} overlap={chunk_overlap}: {len(index['chunks'])} chunks, "
+              f"build {index['build_s']:.2f}s, python peak {index['python_peak_mb']:.1f} MB, "
+              f"max RSS {rss_mb():.0f} MB")
+
+        for method in methods:
+            for filter_name, metadata_filter in filters.items():
+                result = evaluate(index, method, metadata_filter, k, repeats)
+                recall = "  ".join(
+                    f"R@{rk} {value:.2f}" if value is not None else f"R@{rk}  n/a"
+                    for rk, value in result["recall"].items()
+                )
+                print(f"{method:10s} {filter_name:18s} {format_latencies(result['latency'], 'ms', 1000)}  {recall}")
+
+                rows.append({
+                    "embedder": embedder,
+                    "chunk_size": chunk_size,
+                    "chunk_overlap": chunk_overlap,
+                    "chunks": len(index["chunks"]),
+                    "build_s": index["build_s"],
+                    "python_peak_mb": index["python_peak_mb"],
+                    "method": method,
+                    "filter": filter_name,
+                    **result
+                })
+
+    return rows
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Offline retrieval benchmark over ../data")
+    parser.add_argument("--embedder", default="hashing",
+                        help="'hashing' (deterministic, no network) or 'huggingface' (cached local MiniLM)")
+    parser.add_argument("--chunks", default=",".join(f"{s}:{o}" for s, o in DEFAULT_CHUNK_SETTINGS),
+                        help="Comma-separated chunk_size:chunk_overlap pairs")
+    parser.add_argument("--k", type=int, default=RETRIEVAL_K)
+    parser.add_argument("--repeats", type=int, default=20, help="Timed runs per query")
+    parser.add_argument("--methods", default=",".join(METHODS))
+    parser.add_argument("--json", help="Write all result rows to this JSON file")
+    args = parser.parse_args()
+
+    settings = [tuple(int(x) for x in pair.split(":")) for pair in args.chunks.split(",")]
+
+    rows = run_benchmark(args.embedder, settings, args.k, args.repeats, args.methods.split(","))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
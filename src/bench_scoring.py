@@ -0,0 +1,109 @@
+import os
+import random
+import time
+
+from scoring_engine import score_campaign, score_campaign_batch
+
+
+# -----------------------------------------
+# Reference: original per-item scorer
+# -----------------------------------------
+
+def score_campaign_reference(strategy: dict, config: dict):
+    score = 0
+    breakdown = {
+        "persona": 0, "key_insight": 0, "value_proposition": 0, "proof_points": 0,
+        "strategic_angle": 0, "sources": 0, "total": 0
+    }
+
+    if config.get("persona") and config["persona"].lower() in str(strategy).lower():
+        score += 20
+        breakdown["persona"] = 20
+
+    insight = strategy.get("key_insight", "")
+    if len(insight) > 60 and "opportunity" in insight.lower() or "growth" in insight.lower():
+        score += 15
+        breakdown["key_insight"] = 15
+    else:
+        breakdown["key_insight"] = 5 if len(insight) > 30 else 0
+
+    prop = strategy.get("value_proposition", "")
+    if len(prop) > 60 and ("increase" in prop.lower() or "improve" in prop.lower()):
+        score += 15
+        breakdown["value_proposition"] = 15
+    else:
+        breakdown["value_proposition"] = 5 if len(prop) > 30 else 0
+
+    proofs = strategy.get("supporting_proof_points", [])
+    if len(proofs) >= 3:
+        score += 20
+        breakdown["proof_points"] = 20
+    elif len(proofs) >= 1:
+        score += 10
+        breakdown["proof_points"] = 10
+
+    angle = strategy.get("strategic_campaign_angle", "")
+    if len(angle) > 50 and ("campaign" in angle.lower() or "focus" in angle.lower()):
+        score += 15
+        breakdown["strategic_angle"] = 15
+    else:
+        breakdown["strategic_angle"] = 5 if len(angle) > 20 else 0
+
+    if len(strategy.get("sources", [])) > 0:
+        score += 15
+        breakdown["sources"] = 15
+
+    breakdown["total"] = min(score, 100)
+    return {"total_score": breakdown["total"], "breakdown": breakdown}
+
+
+# -----------------------------------------
+# Synthetic Strategies
+# -----------------------------------------
+
+PERSONAS = ["Enterprise CMO", "Startup Founder", "Marketing Manager"]
+WORDS = ["pipeline", "leads", "Growth", "opportunity", "increase", "improve", "campaign",
+         "focus", "ROI", "automation", "DACH", "Enterprise CMO", "founder", "it's", "\n"]
+
+
+def random_text(rng: random.Random, max_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, max_words)))
+
+
+def make_strategy(rng: random.Random) -> dict:
+    return {
+        "persona": rng.choice(PERSONAS + [""]),
+        "key_insight": random_text(rng, 20),
+        "value_proposition": random_text(rng, 20),
+        "supporting_proof_points": [random_text(rng, 8) for _ in range(rng.randint(0, 4))],
+        "strategic_campaign_angle": random_text(rng, 20),
+        "sources": [{"source": "pricing_plans.txt", "category": "pricing_plans"}] * rng.randint(0, 5)
+    }
+
+
+def timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+
+    n = int(os.getenv("BENCH_STRATEGIES", 20000))
+    rng = random.Random(42)
+
+    strategies = [make_strategy(rng) for _ in range(n)]
+    configs = [{"persona": rng.choice(PERSONAS), "industry": "FinTech"} for _ in range(n)]
+
+    # Parity with the original scorer is covered by tests/test_scoring_parity.py
+    reference_s = timed(lambda: [score_campaign_reference(s, c) for s, c in zip(strategies, configs)])
+    per_item_s = timed(lambda: [score_campaign(s, c) for s, c in zip(strategies, configs)])
+    batch_s = timed(lambda: score_campaign_batch(strategies, configs))
+
+    for label, seconds in [("original per-item", reference_s), ("score_campaign", per_item_s),
+                           ("score_campaign_batch", batch_s)]:
+        print(f"{label:22s} {seconds * 1000:8.1f} ms  {n / seconds:10.0f} strategies/s  "
+              f"({reference_s / seconds:.2f}x vs original)")
@@ -0,0 +1,39 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+# -----------------------------------------
+# Import-time Benchmark
+# -----------------------------------------
+# Compares a bare `import rag_pipeline` (lazy resources) with import +
+# warm_up(), which is what the old module paid eagerly at import time.
+
+RUNS = int(os.getenv("BENCH_RUNS", 5))
+
+SNIPPETS = {
+    "import only (lazy)": "import rag_pipeline",
+    "import + warm_up (old eager cost)": "import rag_pipeline; rag_pipeline.warm_up()",
+    "import app deps (pipeline, scoring, assets)": "import pipeline, scoring_engine, campaign_generator",
+}
+
+
+def time_snippet(snippet: str) -> float:
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "benchmark-placeholder")
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", snippet], check=True, env=env,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+
+    print(f"Running each snippet {RUNS} times in a fresh interpreter...\n")
+
+    for label, snippet in SNIPPETS.items():
+        timings = [time_snippet(snippet) for _ in range(RUNS)]
+        print(f"{label:45s} median {statistics.median(timings):.3f}s  min {min(timings):.3f}s")
@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from build_vectorstore import CHUNK_OVERLAP, CHUNK_SIZE, assign_chunk_ids, load_documents, split_documents
+from embedding_providers import build_embeddings
+from perf_stats import format_latencies, summarize_latencies
+from rag_pipeline import EMBEDDING_MODEL, PERSONA_FILTERS, RETRIEVAL_FETCH_K, RETRIEVAL_K
+from vector_backends import build_vector_backend
+
+
+# -----------------------------------------
+# Corpus
+# -----------------------------------------
+# The real corpus is a few dozen chunks; --scale adds perturbed copies
+# (a few random words swapped in) to see how each backend grows.
+
+QUERIES = [
+    "What CRM integrations does NexFlow support?",
+    "How much does the Growth plan cost per month?",
+    "Is the platform GDPR compliant and hosted in the EU?",
+    "AI lead scoring from behavioral signals and email engagement",
+    "What pain points do marketing managers have?",
+]
+
+
+def build_corpus(scale: int, seed: int = 7) -> list:
+    chunks = assign_chunk_ids(split_documents(load_documents(), CHUNK_SIZE, CHUNK_OVERLAP))
+    if scale <= 1:
+        return chunks
+
+    rng = random.Random(seed)
+    vocabulary = sorted({word for chunk in chunks for word in chunk.page_content.split()})
+    corpus = list(chunks)
+
+    for copy in range(1, scale):
+        for chunk in chunks:
+            words = chunk.page_content.split()
+            for _ in range(max(len(words) // 10, 1)):
+                words[rng.randrange(len(words))] = rng.choice(vocabulary)
+
+            clone = chunk.model_copy(deep=True)
+            clone.page_content = " ".join(words)
+            clone.id = f"{chunk.id}#{copy}"
+            corpus.append(clone)
+
+    return corpus
+
+
+# -----------------------------------------
+# Cold Start (fresh interpreter)
+# -----------------------------------------
+
+COLD_START_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+from embedding_providers import build_embeddings
+from vector_backends import build_vector_backend
+imported = time.perf_counter()
+store = build_vector_backend(sys.argv[1], sys.argv[2], build_embeddings(sys.argv[3], sys.argv[4]), dtype=sys.argv[5])
+opened = time.perf_counter()
+store.similarity_search("What CRM integrations does NexFlow support?", k=5)
+queried = time.perf_counter()
+print(json.dumps({"import_s": imported - start, "open_s": opened - imported, "first_query_s": queried - opened}))
+"""
+
+
+def cold_start(backend: str, directory: str, embedder: str, dtype: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", COLD_START_SNIPPET, backend, directory, embedder, EMBEDDING_MODEL, dtype],
+        check=True, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+# -----------------------------------------
+# Warm Query Latency
+# -----------------------------------------
+
+def time_queries(store, query_vectors: list, method: str, metadata_filter: dict, repeats: int) -> dict:
+    latencies = []
+
+    for vector in query_vectors:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            if method == "similarity":
+                store.similarity_search_by_vector(vector, k=RETRIEVAL_K, filter=metadata_filter)
+            else:
+                store.max_marginal_relevance_search_by_vector(
+                    vector, k=RETRIEVAL_K, fetch_k=RETRIEVAL_FETCH_K, filter=metadata_filter
+                )
+            latencies.append(time.perf_counter() - start)
+
+    return summarize_latencies(latencies)
+
+
+def run_benchmark(backends: list, embedder: str, scale: int, repeats: int, cold_runs: int) -> list:
+    embeddings = build_embeddings(embedder, EMBEDDING_MODEL)
+    corpus = build_corpus(scale)
+    query_vectors = [embeddings.embed_query(q) for q in QUERIES]
+    filters = {"no filter": None, "Startup Founder": PERSONA_FILTERS["Startup Founder"]}
+
+    print(f"Corpus: {len(corpus)} chunks (scale {scale}), embedder {embedder}")
+
+    rows = []
+
+    for label in backends:
+        backend, _, dtype = label.partition(":")
+        dtype = dtype or "float32"
+        directory = tempfile.mkdtemp(prefix=f"nexflow_{backend}_")
+
+        start = time.perf_counter()
+        store = build_vector_backend(backend, directory, embeddings, dtype=dtype)
+        for i in range(0, len(corpus), 1000):
+            batch = corpus[i:i + 1000]
+            store.add_documents(batch, ids=[chunk.id for chunk in batch])
+        build_s = time.perf_counter() - start
+
+        cold = [cold_start(backend, directory, embedder, dtype) for _ in range(cold_runs)]
+        cold_summary = {key: min(run[key] for run in cold) for key in cold[0]}
+
+        print(f"\n== {label}: build {build_s:.2f}s, cold start (best of {cold_runs}): "
+              f"import {cold_summary['import_s'] * 1000:.0f}ms, open {cold_summary['open_s'] * 1000:.1f}ms, "
+              f"first query {cold_summary['first_query_s'] * 1000:.1f}ms")
+
+        for method in ["similarity", "mmr"]:
+            for filter_name, metadata_filter in filters.items():
+                latency = time_queries(store, query_vectors, method, metadata_filter, repeats)
+                print(f"{method:10s} {filter_name:16s} {format_latencies(latency, 'ms', 1000)}")
+
+                rows.append({
+                    "backend": label,
+                    "chunks": len(corpus),
+                    "build_s": build_s,
+                    "cold_start": cold_summary,
+                    "method": method,
+                    "filter": filter_name,
+                    "latency": latency
+                })
+
+    return rows
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Chroma vs memory-mapped NumPy vector backend")
+    parser.add_argument("--backends", default="chroma,numpy:float32,numpy:float16",
+                        help="Comma-separated backend[:dtype] labels")
+    parser.add_argument("--embedder", default="hashing")
+    parser.add_argument("--scale", type=int, default=1, help="Copies of the corpus (perturbed) to index")
+    parser.add_argument("--repeats", type=int, default=50, help="Timed runs per query")
+    parser.add_argument("--cold-runs", type=int, default=3)
+    parser.add_argument("--json", help="Write result rows to this JSON file")
+    args = parser.parse_args()
+
+    rows = run_benchmark(args.backends.split(","), args.embedder, args.scale, args.repeats, args.cold_runs)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
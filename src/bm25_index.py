@@ -0,0 +1,188 @@
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+
+from langchain_core.documents import Document
+
+
+# -----------------------------------------
+# Tokenizer
+# -----------------------------------------
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset("""
+a an and are as at be by for from has have how in is it its of on or that the this to was what
+which with your you our we can do does
+""".split())
+
+
+def tokenize(text: str) -> list:
+    return [t for t in _TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+# -----------------------------------------
+# In-memory BM25 Inverted Index
+# -----------------------------------------
+
+class BM25Index:
+    """
+    Okapi BM25 over the chunk corpus. Postings map term -> [(doc, tf)],
+    and per-category doc sets make persona filtering a set lookup.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids = []
+        self.texts = []
+        self.metadatas = []
+        self.doc_lengths = []
+        self.postings = {}
+        self.idf = {}
+        self.categories = {}
+        self.avg_doc_length = 0.0
+
+    @classmethod
+    def from_documents(cls, docs: list, **kwargs):
+        index = cls(**kwargs)
+
+        for doc in docs:
+            index.ids.append(doc.id)
+            index.texts.append(doc.page_content)
+            index.metadatas.append(dict(doc.metadata))
+
+        index._build()
+        return index
+
+    def _build(self):
+        postings = defaultdict(list)
+        categories = defaultdict(list)
+        self.doc_lengths = []
+
+        for i, text in enumerate(self.texts):
+            tokens = tokenize(text)
+            self.doc_lengths.append(len(tokens))
+
+            for term, tf in Counter(tokens).items():
+                postings[term].append((i, tf))
+
+            categories[self.metadatas[i].get("category")].append(i)
+
+        n = len(self.texts)
+        self.postings = dict(postings)
+        self.categories = {c: frozenset(ids) for c, ids in categories.items()}
+        self.avg_doc_length = sum(self.doc_lengths) / n if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    def allowed_docs(self, categories):
+        if categories is None:
+            return None
+
+        allowed = set()
+        for category in categories:
+            allowed |= self.categories.get(category, frozenset())
+        return allowed
+
+    def score(self, query: str, categories=None) -> dict:
+        allowed = self.allowed_docs(categories)
+        scores = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+
+            for i, tf in self.postings[term]:
+                if allowed is not None and i not in allowed:
+                    continue
+
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[i] / self.avg_doc_length)
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return scores
+
+    def search(self, query: str, k: int = 5, categories=None) -> list:
+        """Top-k (Document, score) pairs, optionally limited to categories."""
+        scores = self.score(query, categories)
+        top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+        return [
+            (Document(id=self.ids[i], page_content=self.texts[i], metadata=dict(self.metadatas[i])), score)
+            for i, score in top
+        ]
+
+    def known_terms(self, query: str) -> list:
+        return [t for t in tokenize(query) if t in self.idf]
+
+    # -----------------------------------------
+    # Persistence
+    # -----------------------------------------
+
+    def save(self, path: str):
+        save_columns(path, self.ids, self.texts, self.metadatas, k1=self.k1, b=self.b)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        index = cls(k1=data["k1"], b=data["b"])
+        index.ids = data["ids"]
+        index.texts = data["texts"]
+        index.metadatas = data["metadatas"]
+        index._build()
+        return index
+
+
+def save_columns(path: str, ids, texts, metadatas, k1: float = 1.5, b: float = 0.75):
+    """
+    Writes the file BM25Index.load reads from three iterables, one value
+    at a time, so an index build never needs the corpus in memory. Each
+    iterable is consumed in turn (ids, then texts, then metadatas).
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(f'{{"k1": {json.dumps(k1)}, "b": {json.dumps(b)}')
+
+        for name, values in (("ids", ids), ("texts", texts), ("metadatas", metadatas)):
+            f.write(f', "{name}": [')
+            for i, value in enumerate(values):
+                f.write((", " if i else "") + json.dumps(value))
+            f.write("]")
+
+        f.write("}")
+
+    os.replace(tmp_path, path)
+
+
+# -----------------------------------------
+# Rank Fusion
+# -----------------------------------------
+
+def reciprocal_rank_fusion(rankings: list, k: int = 5, rrf_k: int = 60) -> list:
+    """
+    Fuses several ranked Document lists: score(d) = sum 1 / (rrf_k + rank).
+    Documents are matched by id (or source + text); the first copy seen is returned.
+    """
+    scores = defaultdict(float)
+    docs = {}
+
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc.id or (doc.metadata.get("source"), doc.page_content)
+            scores[key] += 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+
+    fused = sorted(scores, key=lambda key: scores[key], reverse=True)[:k]
+    return [docs[key] for key in fused]
@@ -1,86 +1,479 @@
+import argparse
+import fnmatch
+import hashlib
+import json
 import os
-from langchain_community.document_loaders import DirectoryLoader
+import resource
+import sqlite3
+import tempfile
+import time
+import uuid
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
 from langchain_core.documents import Document
 
+from bm25_index import save_columns
+from rag_pipeline import (
+    BM25_INDEX_PATH, INDEX_MANIFEST_PATH, PERSONA_PARTITIONS, PERSONA_STRATEGY, VECTOR_BACKEND, VECTOR_DTYPE,
+    embedding_id, get_embeddings, get_vectorstore, invalidate_retrieval_cache, open_partition, partition_name,
+    persona_fingerprint
+)
+from vector_backends import copy_vectors, upsert_embeddings
+
+
+DATA_DIR = "../data"
+MANIFEST_PATH = INDEX_MANIFEST_PATH
 
-print("Loading documents...")
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 100
 
-# Load all .txt files
-loader = DirectoryLoader("../data", glob="*.txt")
-documents = loader.load()
+# Streaming ingestion
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", os.cpu_count() or 1))     # parse/split processes
+INGEST_EMBED_BATCH = int(os.getenv("INGEST_EMBED_BATCH", 256))              # chunks per embedding call
+INGEST_UPSERT_BATCH = int(os.getenv("INGEST_UPSERT_BATCH", 4096))           # embedded chunks per store write
+INGEST_PREFETCH = 4                                                          # files in flight per worker
+SPOOL_FETCH_BATCH = 1024                                                     # spooled chunks read per fetch
+PROGRESS_SECONDS = 5
 
-print(f"Loaded {len(documents)} documents")
 
 # -------------------------------------------------
-# 🔥 ADD CLEAN METADATA (IMPORTANT PART)
+# Load documents with clean metadata
 # -------------------------------------------------
 
-cleaned_docs = []
+def iter_files(data_dir: str = DATA_DIR, pattern: str = "*.txt"):
+    """Yields matching files in a stable order without loading any of them."""
+    with os.scandir(data_dir) as entries:
+        names = sorted(entry.name for entry in entries if entry.is_file() and fnmatch.fnmatch(entry.name, pattern))
+
+    for name in names:
+        yield os.path.join(data_dir, name)
+
+
+def read_document(path: str) -> Document:
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
 
-for doc in documents:
-    # Extract clean filename from path
-    source_path = doc.metadata.get("source", "")
-    filename = os.path.basename(source_path)
+    filename = os.path.basename(path)
 
-    new_doc = Document(
-        page_content=doc.page_content,
+    return Document(
+        page_content=text,
         metadata={
             "source": filename,          # file name only
             "category": filename.replace(".txt", "")  # optional future filtering
         }
     )
 
-    cleaned_docs.append(new_doc)
 
-print("Metadata attached to documents.")
+def load_documents(data_dir: str = DATA_DIR):
+    return [read_document(path) for path in iter_files(data_dir)]
+
 
 # -------------------------------------------------
-# Split documents into chunks
+# Split documents into chunks with stable IDs
 # -------------------------------------------------
 
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=500,
-    chunk_overlap=100
-)
+def split_documents(documents, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP):
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
+    )
+
+    return text_splitter.split_documents(documents)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
 
-docs = text_splitter.split_documents(cleaned_docs)
 
-print(f"Split into {len(docs)} chunks")
+def assign_chunk_ids(chunks):
+    """
+    Content-addressed IDs: the same chunk text in the same file always gets
+    the same ID, so an edit only changes the IDs of the chunks it touches.
+    """
+    seen = Counter()
+
+    for chunk in chunks:
+        digest = content_hash(chunk.page_content)
+        base_id = f"{chunk.metadata['source']}:{digest[:16]}"
+
+        # Identical chunks inside one file get an occurrence suffix
+        seen[base_id] += 1
+        chunk.id = base_id if seen[base_id] == 1 else f"{base_id}:{seen[base_id]}"
+        chunk.metadata["chunk_hash"] = digest
+
+    return chunks
+
 
 # -------------------------------------------------
-# Create embeddings
+# Streaming parse + split
 # -------------------------------------------------
+# Files are parsed and split in a process pool, a bounded number at a
+# time, and come back in order as plain (id, text, metadata) tuples.
 
-embeddings = HuggingFaceEmbeddings(
-    model_name="all-MiniLM-L6-v2"
-)
+def parse_file(path: str, chunk_size: int, chunk_overlap: int) -> list:
+    chunks = assign_chunk_ids(split_documents([read_document(path)], chunk_size, chunk_overlap))
+    return [(chunk.id, chunk.page_content, chunk.metadata) for chunk in chunks]
 
-print("Creating vector store...")
 
-vectorstore = Chroma.from_documents(
-    documents=docs,
-    embedding=embeddings,
-    persist_directory="../chroma_db"
-)
+def iter_file_chunks(paths, chunk_size: int, chunk_overlap: int, workers: int = INGEST_WORKERS):
+    if workers <= 1:
+        for path in paths:
+            yield parse_file(path, chunk_size, chunk_overlap)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        for path in paths:
+            pending.append(executor.submit(parse_file, path, chunk_size, chunk_overlap))
+
+            # Keep only a few files per worker in flight so memory stays flat
+            if len(pending) >= workers * INGEST_PREFETCH:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+class EmbeddingWriter:
+    """
+    Embeds chunks in fixed-size batches and writes them to the store in
+    larger upserts (the numpy backend rewrites its file per write).
+    Holds at most INGEST_UPSERT_BATCH + INGEST_EMBED_BATCH chunks.
+    """
 
-vectorstore.persist()
+    def __init__(self, vectorstore, embeddings, embed_batch: int = INGEST_EMBED_BATCH,
+                 upsert_batch: int = INGEST_UPSERT_BATCH):
+        self.vectorstore = vectorstore
+        self.embeddings = embeddings
+        self.embed_batch = embed_batch
+        self.upsert_batch = upsert_batch
+        self.written = 0
+        self._queued = []
+        self._embedded = []
+
+    def add(self, record: tuple):
+        self._queued.append(record)
+        if len(self._queued) >= self.embed_batch:
+            self._embed()
+
+    def _embed(self):
+        if not self._queued:
+            return
+
+        vectors = self.embeddings.embed_documents([text for _, text, _ in self._queued])
+        self._embedded.extend(zip(self._queued, vectors))
+        self._queued = []
+
+        if len(self._embedded) >= self.upsert_batch:
+            self._upsert()
+
+    def _upsert(self):
+        if not self._embedded:
+            return
+
+        records = [record for record, _ in self._embedded]
+        upsert_embeddings(
+            self.vectorstore,
+            [record[0] for record in records],
+            [record[1] for record in records],
+            [vector for _, vector in self._embedded],
+            [record[2] for record in records]
+        )
+        self.written += len(records)
+        self._embedded = []
+
+    def flush(self):
+        self._embed()
+        self._upsert()
+
+
+class ChunkSpool:
+    """
+    Every chunk seen by a build, spooled to a scratch SQLite file. The
+    manifest, the BM25 file and the partitions are written from it in
+    batches afterwards, so peak memory doesn't grow with the corpus.
+    """
+
+    def __init__(self):
+        fd, self.path = tempfile.mkstemp(prefix="nexflow_chunks_", suffix=".sqlite")
+        os.close(fd)
+
+        self.count = 0
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE chunks (id TEXT PRIMARY KEY, source TEXT, hash TEXT, category TEXT, text TEXT, metadata TEXT)"
+        )
+
+    def add(self, records: list):
+        self._conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?)", [
+            (chunk_id, metadata["source"], metadata["chunk_hash"], metadata["category"], text, json.dumps(metadata))
+            for chunk_id, text, metadata in records
+        ])
+        self.count += len(records)
+
+    def rows(self, columns: str, where: str = "", params: list = ()):
+        """Yields rows in insertion order, SPOOL_FETCH_BATCH at a time."""
+        cursor = self._conn.execute(f"SELECT {columns} FROM chunks {where} ORDER BY rowid", list(params))
+        while True:
+            batch = cursor.fetchmany(SPOOL_FETCH_BATCH)
+            if not batch:
+                return
+            yield from batch
+
+    def column(self, name: str):
+        return (row[0] for row in self.rows(name))
+
+    def ids_in(self, categories) -> list:
+        categories = sorted(categories)
+        placeholders = ", ".join("?" for _ in categories)
+        return [row[0] for row in self.rows("id", f"WHERE category IN ({placeholders})", categories)]
+
+    def close(self):
+        self._conn.close()
+        os.remove(self.path)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
 
-print("Vector store successfully built.")
 
 # -------------------------------------------------
-# 🔎 TEST RETRIEVAL (WITH METADATA CHECK)
+# Index manifest
 # -------------------------------------------------
 
-print("\nTesting retrieval...\n")
+def load_manifest(path: str = MANIFEST_PATH):
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict, path: str = MANIFEST_PATH, chunks=None):
+    """`chunks`, if given, is an iterable of (chunk_id, entry) pairs written one at a time."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        if chunks is None:
+            json.dump(manifest, f, indent=2)
+        else:
+            f.write("{\n")
+            for key, value in manifest.items():
+                f.write(f"  {json.dumps(key)}: {json.dumps(value)},\n")
+
+            f.write('  "chunks": {')
+            for i, (chunk_id, entry) in enumerate(chunks):
+                f.write(("," if i else "") + f"\n    {json.dumps(chunk_id)}: {json.dumps(entry)}")
+            f.write("\n  }\n}\n")
+
+    os.replace(tmp_path, path)
+
+
+# -------------------------------------------------
+# Per-persona partitions
+# -------------------------------------------------
+
+def build_partitions(vectorstore, spool: ChunkSpool, previous: dict = None, full_rebuild: bool = False):
+    """
+    One collection per persona holding only its categories' chunks, so
+    persona queries skip the metadata filter. Vectors are copied from the
+    main store (no re-embedding). Rebuilt from scratch when the persona ->
+    category mapping changes, otherwise synced incrementally. Returns the
+    manifest entry and whether anything changed.
+    """
+    previous = previous or {}
+    fingerprint = persona_fingerprint()
+
+    rebuild = full_rebuild or previous.get("fingerprint") != fingerprint
+    if rebuild and previous:
+        print("Persona strategy changed, rebuilding persona partitions.")
+
+    changed = False
+    personas = {}
+
+    for persona, strategy in PERSONA_STRATEGY.items():
+        categories = set(strategy["filters"])
+        ids = spool.ids_in(categories)
+
+        store = open_partition(persona)
+        indexed_ids = set(store.get(include=[])["ids"])
+
+        removed_ids = sorted(indexed_ids) if rebuild else sorted(indexed_ids - set(ids))
+        new_ids = ids if rebuild else [chunk_id for chunk_id in ids if chunk_id not in indexed_ids]
+
+        if removed_ids:
+            store.delete(ids=removed_ids)
+        if new_ids:
+            copy_vectors(vectorstore, store, new_ids)
+
+        changed = changed or bool(removed_ids or new_ids)
+        personas[persona] = {
+            "collection": partition_name(persona),
+            "categories": sorted(categories),
+            "chunks": len(ids)
+        }
+
+    # Personas dropped from PERSONA_STRATEGY: empty their partitions
+    for persona in set(previous.get("personas", {})) - set(personas):
+        store = open_partition(persona)
+        stale_ids = store.get(include=[])["ids"]
+        if stale_ids:
+            store.delete(ids=stale_ids)
+            changed = True
+
+    return {"fingerprint": fingerprint, "personas": personas}, changed
+
+
+# -------------------------------------------------
+# Incremental index build
+# -------------------------------------------------
+
+def build_index(data_dir: str = DATA_DIR, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP,
+                workers: int = INGEST_WORKERS):
+    """
+    Streams files through parse/split workers, embeds only new or changed
+    chunks in fixed-size batches and deletes vectors for chunks that no
+    longer exist. Returns counts of added / removed / unchanged chunks
+    plus throughput.
+    """
+    settings = {
+        "embedding_model": embedding_id(),
+        "vector_backend": VECTOR_BACKEND if VECTOR_BACKEND != "numpy" else f"numpy:{VECTOR_DTYPE}",
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap
+    }
+
+    vectorstore = get_vectorstore()
+    manifest = load_manifest()
+
+    settings_changed = manifest is None or manifest.get("settings") != settings
+
+    if settings_changed:
+        # No usable manifest: reconcile against whatever the store holds
+        # (this also clears duplicates left by older full rebuilds)
+        indexed_ids = set(vectorstore.get(include=[])["ids"])
+        if manifest is not None and indexed_ids:
+            print("Embedding or chunk settings changed, rebuilding all chunks.")
+            # Same ids come back with new vectors, so clear them before streaming
+            stale_ids = sorted(indexed_ids)
+            for start in range(0, len(stale_ids), INGEST_UPSERT_BATCH):
+                vectorstore.delete(ids=stale_ids[start:start + INGEST_UPSERT_BATCH])
+            indexed_ids = set()
+    else:
+        # Only the ids are needed; drop the previous chunk entries right away
+        indexed_ids = set(manifest.pop("chunks"))
+
+    writer = EmbeddingWriter(vectorstore, get_embeddings())
+    spool = ChunkSpool()
+
+    try:
+        start = time.perf_counter()
+        last_report = start
+        files = 0
+
+        def report(final: bool = False):
+            elapsed = time.perf_counter() - start
+            rate = spool.count / elapsed if elapsed else 0.0
+            prefix = "Indexed" if final else "Progress"
+            print(f"{prefix}: {files} files, {spool.count} chunks ({writer.written} embedded) | "
+                  f"{rate:.1f} chunks/s | peak RSS {peak_rss_mb():.0f} MB")
+
+        for records in iter_file_chunks(iter_files(data_dir), chunk_size, chunk_overlap, workers):
+            files += 1
+
+            spool.add(records)
+
+            for record in records:
+                if record[0] not in indexed_ids:
+                    writer.add(record)
+
+            if time.perf_counter() - last_report >= PROGRESS_SECONDS:
+                report()
+                last_report = time.perf_counter()
+
+        writer.flush()
+
+        # Whatever the previous build indexed and this one didn't see is gone
+        for chunk_id in spool.column("id"):
+            indexed_ids.discard(chunk_id)
+
+        removed_ids = sorted(indexed_ids)
+        for start_row in range(0, len(removed_ids), INGEST_UPSERT_BATCH):
+            vectorstore.delete(ids=removed_ids[start_row:start_row + INGEST_UPSERT_BATCH])
+
+        # Lexical index file is rewritten from the spool: no embeddings, so it's cheap
+        save_columns(BM25_INDEX_PATH, spool.column("id"), spool.column("text"),
+                     (json.loads(metadata) for metadata in spool.column("metadata")))
+
+        changed = bool(removed_ids or writer.written)
+
+        partitions = None
+        if PERSONA_PARTITIONS:
+            partitions, partitions_changed = build_partitions(
+                vectorstore, spool, (manifest or {}).get("partitions"), full_rebuild=settings_changed
+            )
+            changed = changed or partitions_changed
+
+        if changed:
+            invalidate_retrieval_cache()
+
+        save_manifest({
+            "settings": settings,
+            "index_version": uuid.uuid4().hex if changed or manifest is None else manifest["index_version"],
+            "partitions": partitions
+        }, chunks=(
+            (chunk_id, {"source": source, "hash": chunk_hash})
+            for chunk_id, source, chunk_hash in spool.rows("id, source, hash")
+        ))
+
+        report(final=True)
+        elapsed = time.perf_counter() - start
+
+        return {
+            "added": writer.written,
+            "removed": len(removed_ids),
+            "unchanged": spool.count - writer.written,
+            "files": files,
+            "elapsed_s": elapsed,
+            "chunks_per_s": spool.count / elapsed if elapsed else 0.0
+        }
+
+    finally:
+        spool.close()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Incremental, streaming index build")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="Parse/split processes (1 = inline)")
+    args = parser.parse_args()
+
+    print("Indexing documents...")
+
+    stats = build_index(args.data_dir, workers=args.workers)
+
+    print(f"Vector store up to date: {stats['added']} added, "
+          f"{stats['removed']} removed, {stats['unchanged']} unchanged.")
+
+    # -------------------------------------------------
+    # 🔎 TEST RETRIEVAL (WITH METADATA CHECK)
+    # -------------------------------------------------
+
+    print("\nTesting retrieval...\n")
 
-test_query = "What CRM integrations are available in NexFlow?"
+    test_query = "What CRM integrations are available in NexFlow?"
 
-results = vectorstore.similarity_search(test_query, k=5)
+    results = get_vectorstore().similarity_search(test_query, k=5)
 
-for r in results:
-    print("-----")
-    print("Source:", r.metadata)
-    print(r.page_content[:300])
+    for r in results:
+        print("-----")
+        print("Source:", r.metadata)
+        print(r.page_content[:300])
@@ -0,0 +1,392 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from pipeline import CONFIG_FIELDS, CONFIG_OPTIONS, GENERATION_MODES, config_key
+from rag_pipeline import LLM_MODEL, current_index_version
+from tracing import increment, span
+
+
+# -----------------------------------------
+# Store Settings
+# -----------------------------------------
+
+STORE_PATH = os.getenv("CAMPAIGN_STORE_PATH", "../cache/campaign_store.sqlite")
+STORE_TTL_SECONDS = int(os.getenv("CAMPAIGN_STORE_TTL_SECONDS", 7 * 24 * 3600))
+STORE_ENABLED = os.getenv("CAMPAIGN_STORE_ENABLED", "1") == "1"
+STORE_MAX_ENTRIES = int(os.getenv("CAMPAIGN_STORE_MAX_ENTRIES", 50000))    # size-based retention: newest kept
+STORE_PURGE_EVERY = int(os.getenv("CAMPAIGN_STORE_PURGE_EVERY", 200))       # puts between purges
+
+# Strategy fields searchable by text (proof points are joined into one column)
+TEXT_FIELDS = ["key_insight", "value_proposition", "strategic_campaign_angle", "proof_points"]
+
+# Parts of a pipeline result kept in the store (what app.py renders)
+RESULT_FIELDS = ["strategy", "score_result", "refinement_count", "candidates_evaluated", "errors"]
+
+
+def normalize_config(config: dict) -> dict:
+    """Config as stored: every field a stripped string; no mode means the default serial loop."""
+    normalized = dict(config_key(config))
+    normalized["generation_mode"] = normalized["generation_mode"] or GENERATION_MODES[0]
+    return normalized
+
+
+def storable(config: dict) -> bool:
+    return not str(config.get("customer_details") or "").strip()
+
+
+def campaign_key(config: dict) -> str:
+    raw = json.dumps(list(normalize_config(config).items()))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def fts_query(text: str) -> str:
+    # Quoted terms, implicitly ANDed; user input never reaches FTS syntax
+    return " ".join(f'"{term}"' for term in re.findall(r"\w+", text.lower()))
+
+
+# -----------------------------------------
+# SQLite Campaign Store
+# -----------------------------------------
+
+class CampaignStore:
+    """
+    Precomputed (and previously served) campaigns keyed by normalized
+    sidebar config. Config fields and the score are indexed columns, the
+    strategy text is in an FTS5 table (LIKE scan if SQLite lacks FTS5).
+
+    An entry is fresh while it is younger than ttl_seconds and was
+    generated with the current LLM model and index version, so a model
+    switch or a re-index retires the whole store at once. Freshness only
+    gates serving (get / has_fresh / search(fresh_only=True)): stale
+    entries stay searchable as past campaigns. Storage is bounded by
+    size instead, trimming to the newest max_entries on open and every
+    purge_every puts.
+
+    Configs with customer details are never stored: the notes are private
+    to one request and would make every entry unique.
+    """
+
+    def __init__(self, path: str = STORE_PATH, ttl_seconds: int = STORE_TTL_SECONDS,
+                 max_entries: int = STORE_MAX_ENTRIES, purge_every: int = STORE_PURGE_EVERY):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.purge_every = purge_every
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        config_columns = ",\n".join(f"                {field} TEXT NOT NULL" for field in CONFIG_FIELDS)
+        text_columns = ",\n".join(f"                {field} TEXT NOT NULL" for field in TEXT_FIELDS)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS campaigns (
+                key TEXT PRIMARY KEY,
+{config_columns},
+                total_score INTEGER NOT NULL,
+{text_columns},
+                result TEXT NOT NULL,
+                model TEXT NOT NULL,
+                index_version TEXT,
+                source TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_campaigns_config ON campaigns({', '.join(CONFIG_OPTIONS)})")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_campaigns_score ON campaigns(total_score)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_campaigns_created ON campaigns(created_at)")
+
+        try:
+            self._conn.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS campaigns_fts USING fts5({', '.join(TEXT_FIELDS)})"
+            )
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+
+        self._conn.commit()
+        self.purge()
+
+    # -----------------------------------------
+    # Freshness
+    # -----------------------------------------
+
+    def _fresh_clause(self, alias: str = "") -> tuple:
+        prefix = f"{alias}." if alias else ""
+        return (
+            f"{prefix}model = ? AND {prefix}index_version IS ? AND {prefix}created_at >= ?",
+            [LLM_MODEL, current_index_version(), time.time() - self.ttl_seconds]
+        )
+
+    # -----------------------------------------
+    # Read / Write
+    # -----------------------------------------
+
+    def get(self, config: dict):
+        """The stored pipeline result for this config if a fresh one exists, else None."""
+        if not storable(config):
+            return None
+
+        fresh_sql, fresh_params = self._fresh_clause()
+
+        with span("store.lookup") as lookup_span:
+            with self._lock:
+                row = self._conn.execute(
+                    f"SELECT result, created_at FROM campaigns WHERE key = ? AND {fresh_sql}",
+                    [campaign_key(config)] + fresh_params
+                ).fetchone()
+
+            lookup_span["hit"] = row is not None
+
+        if row is None:
+            self.misses += 1
+            increment("campaign_store_misses_total")
+            return None
+
+        self.hits += 1
+        increment("campaign_store_hits_total")
+
+        result = json.loads(row["result"])
+        result["stored_at"] = row["created_at"]
+        return result
+
+    def has_fresh(self, config: dict) -> bool:
+        if not storable(config):
+            return False
+
+        fresh_sql, fresh_params = self._fresh_clause()
+
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT 1 FROM campaigns WHERE key = ? AND {fresh_sql}", [campaign_key(config)] + fresh_params
+            ).fetchone()
+
+        return row is not None
+
+    def put(self, config: dict, result: dict, source: str = "precompute") -> bool:
+        """
+        Stores a pipeline result. Failed generations and results with
+        (usually transient) refinement errors are skipped, returning False,
+        so the next precompute run retries them; so are configs with
+        customer details.
+        """
+        strategy = result.get("strategy") or {}
+        if "error" in strategy or result.get("errors") or not storable(config):
+            return False
+
+        key = campaign_key(config)
+        config = normalize_config(config)
+        texts = {
+            "key_insight": strategy.get("key_insight", ""),
+            "value_proposition": strategy.get("value_proposition", ""),
+            "strategic_campaign_angle": strategy.get("strategic_campaign_angle", ""),
+            "proof_points": "\n".join(strategy.get("supporting_proof_points", [])),
+        }
+        stored = {field: result[field] for field in RESULT_FIELDS if field in result}
+
+        row = {
+            "key": key,
+            **config,
+            "total_score": result["score_result"]["total_score"],
+            **texts,
+            "result": json.dumps(stored),
+            "model": LLM_MODEL,
+            "index_version": current_index_version(),
+            "source": source,
+            "created_at": time.time()
+        }
+        columns = ", ".join(row)
+        placeholders = ", ".join("?" for _ in row)
+
+        with self._lock:
+            # FTS rows share the campaign's rowid, which REPLACE changes
+            previous = self._conn.execute("SELECT rowid FROM campaigns WHERE key = ?", (key,)).fetchone()
+            cursor = self._conn.execute(
+                f"INSERT OR REPLACE INTO campaigns ({columns}) VALUES ({placeholders})", list(row.values())
+            )
+
+            if self.fts:
+                if previous is not None:
+                    self._conn.execute("DELETE FROM campaigns_fts WHERE rowid = ?", (previous[0],))
+                self._conn.execute(
+                    f"INSERT INTO campaigns_fts (rowid, {', '.join(TEXT_FIELDS)}) VALUES (?, {', '.join('?' for _ in TEXT_FIELDS)})",
+                    [cursor.lastrowid] + [texts[field] for field in TEXT_FIELDS]
+                )
+
+            self._conn.commit()
+            self._puts += 1
+            due = self.purge_every and self._puts % self.purge_every == 0
+
+        if due:
+            self.purge()
+
+        return True
+
+    # -----------------------------------------
+    # Search
+    # -----------------------------------------
+
+    def search(self, text: str = None, min_score: int = None, max_score: int = None, fresh_only: bool = False,
+               limit: int = 20, **filters) -> list:
+        """
+        Past campaigns matching every given config filter (e.g.
+        persona="Enterprise CMO"), score range and strategy text, best
+        score first. Returns summary dicts (config, score, strategy text).
+        """
+        unknown = set(filters) - set(CONFIG_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown config filter(s): {sorted(unknown)}")
+
+        where = []
+        params = []
+        joins = ""
+        order = "c.total_score DESC, c.created_at DESC"
+
+        for field, value in filters.items():
+            if value is not None:
+                where.append(f"c.{field} = ?")
+                params.append(value)
+
+        if min_score is not None:
+            where.append("c.total_score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            where.append("c.total_score <= ?")
+            params.append(max_score)
+
+        if fresh_only:
+            fresh_sql, fresh_params = self._fresh_clause("c")
+            where.append(fresh_sql)
+            params += fresh_params
+
+        if text and fts_query(text):
+            if self.fts:
+                joins = "JOIN campaigns_fts ON campaigns_fts.rowid = c.rowid"
+                where.append("campaigns_fts MATCH ?")
+                params.append(fts_query(text))
+                order = "c.total_score DESC, bm25(campaigns_fts)"
+            else:
+                combined = " || ' ' || ".join(f"c.{field}" for field in TEXT_FIELDS)
+                where.append(f"LOWER({combined}) LIKE ?")
+                params.append(f"%{text.lower().strip()}%")
+
+        columns = ", ".join(f"c.{field}" for field in ["key"] + CONFIG_FIELDS + ["total_score"] + TEXT_FIELDS + ["source", "created_at"])
+        sql = f"SELECT {columns} FROM campaigns c {joins}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order} LIMIT ?"
+        params.append(limit)
+
+        with span("store.search", text=bool(text)):
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+
+        return [dict(row) for row in rows]
+
+    # -----------------------------------------
+    # Maintenance
+    # -----------------------------------------
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM campaigns")
+            if self.fts:
+                self._conn.execute("DELETE FROM campaigns_fts")
+            self._conn.commit()
+
+    def purge(self) -> int:
+        """
+        Size-based retention: deletes the oldest entries beyond max_entries
+        (and any stored with customer details by older versions). Stale
+        entries are kept for search. Returns the number of entries removed.
+        """
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM campaigns WHERE customer_details != ''").rowcount
+
+            if self.max_entries:
+                removed += self._conn.execute(
+                    "DELETE FROM campaigns WHERE rowid NOT IN "
+                    "(SELECT rowid FROM campaigns ORDER BY created_at DESC LIMIT ?)", (self.max_entries,)
+                ).rowcount
+
+            if self.fts and removed:
+                self._conn.execute("DELETE FROM campaigns_fts WHERE rowid NOT IN (SELECT rowid FROM campaigns)")
+
+            self._conn.commit()
+
+        if removed:
+            increment("campaign_store_purged_total", removed)
+        return removed
+
+    def stats(self) -> dict:
+        fresh_sql, fresh_params = self._fresh_clause()
+
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM campaigns").fetchone()[0]
+            fresh = self._conn.execute(f"SELECT COUNT(*) FROM campaigns WHERE {fresh_sql}", fresh_params).fetchone()[0]
+
+        lookups = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "fresh_entries": fresh,
+            "full_text": self.fts
+        }
+
+
+# -----------------------------------------
+# Shared Instance
+# -----------------------------------------
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_campaign_store():
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CampaignStore()
+
+    return _store
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Search stored campaigns by config, score and strategy text")
+    parser.add_argument("--text", help="Words that must all appear in the strategy text")
+    parser.add_argument("--min-score", type=int)
+    parser.add_argument("--max-score", type=int)
+    parser.add_argument("--fresh-only", action="store_true")
+    parser.add_argument("--limit", type=int, default=20)
+    for field in CONFIG_FIELDS:
+        parser.add_argument(f"--{field.replace('_', '-')}", dest=field)
+    args = parser.parse_args()
+
+    store = get_campaign_store()
+    filters = {field: getattr(args, field) for field in CONFIG_FIELDS if getattr(args, field) is not None}
+
+    for row in store.search(args.text, args.min_score, args.max_score, args.fresh_only, args.limit, **filters):
+        print(f"{row['total_score']:>3}/100  {row['persona']} | {row['campaign_type']} | {row['industry']} | "
+              f"{row['region']} | {row['channel_focus']}  [{row['source']}]")
+        print(f"         {row['key_insight'][:110]}")
+
+    print(json.dumps(store.stats()))
@@ -0,0 +1,157 @@
+import math
+import os
+import re
+
+
+# -----------------------------------------
+# Settings
+# -----------------------------------------
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 900))
+MIN_OVERLAP_CHARS = 20          # shorter shared prefixes/suffixes are kept
+MIN_DEDUPE_LINE_CHARS = 12      # short structural lines ("Includes:") are never deduped
+MIN_PARTIAL_TOKENS = 40         # don't squeeze in tiny chunk fragments
+
+
+# -----------------------------------------
+# Local Tokenizer
+# -----------------------------------------
+# BPE-style estimate that needs no vocabulary download: every word piece
+# of up to 4 characters is one token, longer words cost one token per 4
+# characters, and each punctuation mark is its own token.
+
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    return sum(math.ceil(len(piece) / 4) for piece in _TOKEN_PIECES.findall(text))
+
+
+# -----------------------------------------
+# Overlap Removal
+# -----------------------------------------
+
+def _normalize_line(line: str) -> str:
+    return re.sub(r"\s+", " ", line).strip().lower()
+
+
+def _trim_shared_prefix(text: str, kept_texts: list) -> str:
+    """
+    Drops the start of `text` when it repeats the end of an already kept
+    chunk (what chunk_overlap produces between neighbouring chunks).
+    """
+    best = 0
+
+    for kept in kept_texts:
+        limit = min(len(kept), len(text))
+        for size in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+            if size <= best:
+                break
+            if kept.endswith(text[:size]):
+                best = size
+                break
+
+    return text[best:].lstrip() if best else text
+
+
+def _unique_lines(text: str, seen: set) -> list:
+    """Lines of `text` not already present in earlier chunks; updates `seen`."""
+    lines = []
+    new_keys = []
+
+    for line in text.splitlines():
+        key = _normalize_line(line)
+
+        if not key:
+            # Keep paragraph breaks, but never two in a row
+            if lines and lines[-1] != "":
+                lines.append("")
+            continue
+
+        if len(key) >= MIN_DEDUPE_LINE_CHARS:
+            if key in seen:
+                continue
+            new_keys.append(key)
+
+        lines.append(line.rstrip())
+
+    # Repeats inside one chunk are intentional, so mark lines seen afterwards
+    seen.update(new_keys)
+
+    while lines and lines[-1] == "":
+        lines.pop()
+
+    return lines
+
+
+# -----------------------------------------
+# Context Assembly
+# -----------------------------------------
+
+def assemble_context(docs: list, token_budget: int = CONTEXT_TOKEN_BUDGET, relevance: list = None) -> dict:
+    """
+    Dedupes overlapping text across chunks, orders chunks by relevance
+    (retrieval rank unless scores are given) and packs them into the
+    token budget. Returns the context text, the docs that made it in, and
+    token counts before/after.
+    """
+    if relevance is not None:
+        order = sorted(range(len(docs)), key=lambda i: relevance[i], reverse=True)
+    else:
+        order = list(range(len(docs)))
+
+    original_tokens = count_tokens("\n\n".join(doc.page_content for doc in docs))
+
+    seen_lines = set()
+    kept_texts = []
+    kept_docs = []
+    parts = []
+    used_tokens = 0
+
+    for i in order:
+        doc = docs[i]
+
+        text = _trim_shared_prefix(doc.page_content, kept_texts)
+        lines = _unique_lines(text, seen_lines)
+
+        if not lines:
+            continue
+
+        piece = "\n".join(lines)
+        piece_tokens = count_tokens(piece)
+        remaining = token_budget - used_tokens
+
+        if piece_tokens > remaining:
+            if remaining < MIN_PARTIAL_TOKENS:
+                break
+
+            # Fill what's left with whole lines from the top of the chunk
+            partial = []
+            for line in lines:
+                line_tokens = count_tokens(line)
+                if line_tokens > remaining:
+                    break
+                partial.append(line)
+                remaining -= line_tokens
+
+            if not partial:
+                break
+
+            piece = "\n".join(partial)
+            piece_tokens = count_tokens(piece)
+
+        parts.append(piece)
+        kept_texts.append(doc.page_content)
+        kept_docs.append(doc)
+        used_tokens += piece_tokens
+
+    text = "\n\n".join(parts)
+    tokens = count_tokens(text)
+
+    return {
+        "text": text,
+        "docs": kept_docs,
+        "tokens": tokens,
+        "original_tokens": original_tokens,
+        "saved_tokens": max(original_tokens - tokens, 0)
+    }
@@ -0,0 +1,172 @@
+import hashlib
+import math
+import os
+import re
+
+from langchain_core.embeddings import Embeddings
+
+
+# -----------------------------------------
+# Settings
+# -----------------------------------------
+
+ONNX_MODEL_ROOT = os.getenv("ONNX_MODEL_ROOT", "../models/onnx")   # export_onnx.py writes <root>/<model>/
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "1") == "1"           # int8 weights (model_int8.onnx)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", 0))         # 0 = onnxruntime default
+EMBEDDING_MAX_LENGTH = 256                                         # all-MiniLM-L6-v2 max_seq_length
+
+
+# -----------------------------------------
+# Deterministic Stand-in Embedder
+# -----------------------------------------
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Offline, deterministic bag-of-words embedder (signed feature hashing).
+    No model download or network: used for benchmarks and tests where the
+    relative behaviour of the retrieval stack matters more than quality.
+    """
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> list:
+        vector = [0.0] * self.dimensions
+
+        for token in _TOKEN_PATTERN.findall(text.lower()):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def embed_documents(self, texts: list) -> list:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list:
+        return self._embed(text)
+
+
+# -----------------------------------------
+# ONNX Runtime Embedder (no PyTorch)
+# -----------------------------------------
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+def onnx_model_dir(model_name: str) -> str:
+    return os.path.join(ONNX_MODEL_ROOT, model_name.split("/")[-1])
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence-transformers MiniLM pipeline (mean pooling + L2 normalize) on
+    onnxruntime and a `tokenizers` fast tokenizer. Texts are sorted by
+    length before batching so each batch pads to a similar size.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = True, batch_size: int = 32, threads: int = 0,
+                 max_length: int = EMBEDDING_MAX_LENGTH):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_file = ONNX_INT8_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        model_path = os.path.join(model_dir, model_file)
+
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} not found; run export_onnx.py first")
+
+        self.model_path = model_path
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    @classmethod
+    def from_env(cls, model_name: str):
+        return cls(
+            onnx_model_dir(model_name),
+            quantized=ONNX_QUANTIZED,
+            batch_size=EMBEDDING_BATCH_SIZE,
+            threads=EMBEDDING_THREADS
+        )
+
+    def _embed_batch(self, texts: list):
+        import numpy as np
+
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts: list) -> list:
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vector in zip(batch, self._embed_batch([texts[i] for i in batch])):
+                vectors[i] = vector.tolist()
+
+        return vectors
+
+    def embed_query(self, text: str) -> list:
+        return self._embed_batch([text])[0].tolist()
+
+
+# -----------------------------------------
+# Provider Selection
+# -----------------------------------------
+
+EMBEDDING_PROVIDERS = ["huggingface", "onnx", "hashing"]
+
+
+def embedding_space(provider: str, model_name: str) -> str:
+    """Identifies the embedding space, so indexes built with another one are rebuilt."""
+    if provider == "huggingface":
+        return model_name
+    if provider == "onnx" and ONNX_QUANTIZED:
+        return f"onnx:{model_name}:int8"
+    return f"{provider}:{model_name}"
+
+
+def build_embeddings(provider: str, model_name: str):
+    if provider == "huggingface":
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        return HuggingFaceEmbeddings(model_name=model_name)
+
+    if provider == "onnx":
+        return OnnxEmbeddings.from_env(model_name)
+
+    if provider == "hashing":
+        return HashingEmbeddings()
+
+    raise ValueError(f"Unknown embedding provider: {provider} (expected one of {EMBEDDING_PROVIDERS})")
@@ -0,0 +1,190 @@
+import math
+import os
+import re
+from collections import Counter
+
+import numpy as np
+from langchain_core.documents import Document
+
+from bm25_index import BM25Index, tokenize
+from retrieval_cache import LRUCache, text_key
+
+
+# -----------------------------------------
+# Settings
+# -----------------------------------------
+
+CUSTOMER_CHUNK_SIZE = int(os.getenv("CUSTOMER_CHUNK_SIZE", 400))           # chars per chunk
+CUSTOMER_CHUNK_OVERLAP = int(os.getenv("CUSTOMER_CHUNK_OVERLAP", 80))      # last unit carried over if this short
+CUSTOMER_TOP_K = int(os.getenv("CUSTOMER_TOP_K", 2))
+CUSTOMER_MAX_EMBED_CHUNKS = int(os.getenv("CUSTOMER_MAX_EMBED_CHUNKS", 16))  # bounds cold embedding cost
+CUSTOMER_EMBED_CACHE_SIZE = int(os.getenv("CUSTOMER_EMBED_CACHE_SIZE", 4096))
+CUSTOMER_INDEX_CACHE_SIZE = int(os.getenv("CUSTOMER_INDEX_CACHE_SIZE", 64))
+
+CUSTOMER_SOURCE = "customer_details"
+CUSTOMER_PREFIX = "Customer Details: "      # so the strategist can tell the notes from company facts
+
+
+# -----------------------------------------
+# Fast Chunking
+# -----------------------------------------
+# Pasted notes are split on lines, long lines on sentence ends (hard cut
+# as a last resort), then packed into chunks of up to `chunk_size` chars.
+# No tokenizer or splitter objects: this runs on every request.
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+
+
+def _units(text: str, chunk_size: int):
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+
+        if len(line) <= chunk_size:
+            yield line
+            continue
+
+        for sentence in _SENTENCE_END.split(line):
+            for start in range(0, len(sentence), chunk_size):
+                yield sentence[start:start + chunk_size]
+
+
+def split_details(text: str, chunk_size: int = CUSTOMER_CHUNK_SIZE, chunk_overlap: int = CUSTOMER_CHUNK_OVERLAP) -> list:
+    chunks = []
+    current = []
+    length = 0
+
+    for unit in _units(text, chunk_size):
+        if current and length + len(unit) + 1 > chunk_size:
+            chunks.append(" ".join(current))
+
+            # Carry a short trailing unit over, so a fact split across chunks stays findable
+            tail = current[-1]
+            current, length = ([tail], len(tail)) if len(tail) <= chunk_overlap else ([], 0)
+
+        current.append(unit)
+        length += len(unit) + 1
+
+    if current:
+        chunks.append(" ".join(current))
+
+    return chunks
+
+
+def prefilter_chunks(chunks: list, query: str, limit: int) -> list:
+    """
+    Bounds the embedding work for very long notes: keeps the `limit`
+    chunks with the most salient terms, in original order. A term weighs
+    log(chunks / chunks containing it), so boilerplate repeated across the
+    notes counts for little; query terms count double. The form-style
+    campaign query shares few words with free-form notes, so overlap with
+    it alone would drop most details unseen.
+    """
+    if len(chunks) <= limit:
+        return chunks
+
+    query_terms = set(tokenize(query))
+    # Bare numbers (ticket ids, dates) are rare but say nothing about the customer
+    chunk_terms = [{t for t in tokenize(chunk) if not t.isdigit()} for chunk in chunks]
+    counts = Counter(t for terms in chunk_terms for t in terms)
+
+    weights = {
+        term: math.log(len(chunks) / count) * (2 if term in query_terms else 1)
+        for term, count in counts.items()
+    }
+    salience = [sum(weights[t] for t in terms) for terms in chunk_terms]
+
+    keep = sorted(sorted(range(len(chunks)), key=lambda i: salience[i], reverse=True)[:limit])
+    return [chunks[i] for i in keep]
+
+
+# -----------------------------------------
+# In-memory Cosine Index
+# -----------------------------------------
+
+# (embedding space, chunk hash) -> vector. Refinements, best-of-N
+# candidates and reruns with the same notes never re-embed them.
+chunk_embedding_cache = LRUCache(maxsize=CUSTOMER_EMBED_CACHE_SIZE)
+
+# (embedding space, query hash, notes hash) -> EphemeralIndex,
+# ("bm25", notes hash) -> BM25Index
+index_cache = LRUCache(maxsize=CUSTOMER_INDEX_CACHE_SIZE)
+
+
+def customer_document(chunk: str, score: float) -> Document:
+    return Document(
+        id=f"customer-{text_key(chunk)[:16]}",
+        page_content=CUSTOMER_PREFIX + chunk,
+        metadata={"source": CUSTOMER_SOURCE, "category": CUSTOMER_SOURCE, "score": round(float(score), 4)}
+    )
+
+
+class EphemeralIndex:
+    """Exact cosine search over one request's customer notes; lives only in memory."""
+
+    def __init__(self, chunks: list, vectors: np.ndarray):
+        self.chunks = chunks
+        self.vectors = vectors
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def search(self, query_embedding, k: int = CUSTOMER_TOP_K) -> list:
+        if not self.chunks:
+            return []
+
+        from vector_backends import normalize_rows, top_k_indices
+        query = normalize_rows(np.asarray([query_embedding], dtype=np.float32))[0]
+        scores = self.vectors @ query
+
+        return [customer_document(self.chunks[i], scores[i]) for i in top_k_indices(scores, k)]
+
+
+def build_index(text: str, query: str, embeddings, space: str) -> EphemeralIndex:
+    """
+    Chunks `text` and embeds the chunks in one batch call, reusing cached
+    vectors by content hash. `space` identifies the embedding model so
+    cached vectors are never mixed across providers.
+    """
+    key = (space, text_key(query), text_key(text))
+    index = index_cache.get(key)
+    if index is not None:
+        return index
+
+    # Deferred: vector_backends imports langchain's vectorstore stack, which the lexical path never needs
+    from vector_backends import normalize_rows
+
+    chunks = prefilter_chunks(split_details(text), query, CUSTOMER_MAX_EMBED_CHUNKS)
+    vectors = [chunk_embedding_cache.get((space, text_key(chunk))) for chunk in chunks]
+
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        for i, vector in zip(missing, embeddings.embed_documents([chunks[i] for i in missing])):
+            chunk_embedding_cache.set((space, text_key(chunks[i])), vector)
+            vectors[i] = vector
+
+    matrix = normalize_rows(np.asarray(vectors, dtype=np.float32)) if chunks else np.empty((0, 0), dtype=np.float32)
+    index = EphemeralIndex(chunks, matrix)
+    index_cache.set(key, index)
+    return index
+
+
+# -----------------------------------------
+# Lexical Search
+# -----------------------------------------
+
+def lexical_search(text: str, query: str, k: int = CUSTOMER_TOP_K) -> list:
+    """
+    BM25 over every chunk of the notes, for lexical retrieval mode: no
+    embedding model or forward pass, and cheap enough to skip the prefilter.
+    """
+    key = ("bm25", text_key(text))
+    index = index_cache.get(key)
+
+    if index is None:
+        chunks = split_details(text)
+        index = BM25Index.from_documents([Document(page_content=chunk) for chunk in chunks])
+        index_cache.set(key, index)
+
+    return [customer_document(doc.page_content, score) for doc, score in index.search(query, k=k)]
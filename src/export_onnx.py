@@ -0,0 +1,77 @@
+import argparse
+import os
+
+from embedding_providers import ONNX_INT8_MODEL_FILE, ONNX_MODEL_FILE, TOKENIZER_FILE, onnx_model_dir
+from rag_pipeline import EMBEDDING_MODEL
+
+
+# -----------------------------------------
+# Export (one-off, needs the PyTorch stack)
+# -----------------------------------------
+# Writes <ONNX_MODEL_ROOT>/<model>/model.onnx, model_int8.onnx and
+# tokenizer.json. Run once on a machine with sentence-transformers
+# installed; the serving pods then only need onnxruntime + tokenizers.
+
+def export_model(model_name: str, output_dir: str, opset: int = 14):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    hub_name = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+    tokenizer = AutoTokenizer.from_pretrained(hub_name)
+    model = AutoModel.from_pretrained(hub_name)
+    model.eval()
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer.backend_tokenizer.save(os.path.join(output_dir, TOKENIZER_FILE))
+
+    sample = tokenizer(["NexFlow AI lead scoring"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            os.path.join(output_dir, ONNX_MODEL_FILE),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+
+
+def quantize_model(output_dir: str):
+    """Dynamic int8 quantization of the weights; activations stay float."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(
+        os.path.join(output_dir, ONNX_MODEL_FILE),
+        os.path.join(output_dir, ONNX_INT8_MODEL_FILE),
+        weight_type=QuantType.QInt8
+    )
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX (+ int8)")
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--output-dir", help="Defaults to <ONNX_MODEL_ROOT>/<model>")
+    parser.add_argument("--skip-export", action="store_true", help="Only (re)quantize an existing model.onnx")
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or onnx_model_dir(args.model)
+
+    if not args.skip_export:
+        print(f"Exporting {args.model} to {output_dir}...")
+        export_model(args.model, output_dir)
+
+    print("Quantizing to int8...")
+    quantize_model(output_dir)
+
+    for name in (ONNX_MODEL_FILE, ONNX_INT8_MODEL_FILE):
+        path = os.path.join(output_dir, name)
+        print(f"{name:18s} {os.path.getsize(path) / (1024 * 1024):.1f} MB")
+
+    print("Check drift against the PyTorch embeddings with: python bench_embeddings.py")
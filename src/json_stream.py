@@ -0,0 +1,77 @@
+import json
+
+
+# -----------------------------------------
+# Incremental JSON Object Parser
+# -----------------------------------------
+
+_WHITESPACE = " \t\n\r"
+
+
+class IncrementalJSONParser:
+    """
+    Parses a JSON object that arrives in pieces (e.g. streamed LLM tokens)
+    and emits each top-level field as soon as its value is complete.
+    Anything before the first "{" (like a stray markdown fence) is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields = {}
+        self.done = False
+        self._pos = None
+        self._decoder = json.JSONDecoder()
+
+    def _skip(self, i: int, chars: str) -> int:
+        while i < len(self.buffer) and self.buffer[i] in chars:
+            i += 1
+        return i
+
+    def feed(self, text: str) -> list:
+        """Adds text and returns the (key, value) pairs completed by it."""
+        self.buffer += text
+        completed = []
+
+        if self._pos is None:
+            start = self.buffer.find("{")
+            if start == -1:
+                return completed
+            self._pos = start + 1
+
+        while not self.done:
+            i = self._skip(self._pos, _WHITESPACE + ",")
+            if i >= len(self.buffer):
+                break
+
+            if self.buffer[i] == "}":
+                self.done = True
+                self._pos = i + 1
+                break
+
+            try:
+                key, i = self._decoder.raw_decode(self.buffer, i)
+            except json.JSONDecodeError:
+                break
+
+            i = self._skip(i, _WHITESPACE)
+            if i >= len(self.buffer) or self.buffer[i] != ":":
+                break
+
+            i = self._skip(i + 1, _WHITESPACE)
+            if i >= len(self.buffer):
+                break
+
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, i)
+            except json.JSONDecodeError:
+                break
+
+            # A number at the very end of the buffer may still be growing
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and end == len(self.buffer):
+                break
+
+            self.fields[key] = value
+            completed.append((key, value))
+            self._pos = end
+
+        return completed
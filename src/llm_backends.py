@@ -0,0 +1,574 @@
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from rate_limiter import TokenBucket
+from tracing import add_gauge, increment, span
+
+
+# -----------------------------------------
+# Settings
+# -----------------------------------------
+# Limits default to Groq's free tier for llama-3.1-8b-instant; 0 = unlimited.
+# They apply to the whole process, i.e. all Streamlit sessions together.
+
+DEFAULT_LIMITS = {"groq": (30, 6000), "fake": (0, 0)}
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 30))               # seconds per attempt
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))  # in-flight calls / pooled connections
+LLM_BACKOFF_BASE = 0.5                                          # seconds, doubled per retry
+LLM_BACKOFF_MAX = 20.0
+LLM_COMPLETION_TOKEN_ESTIMATE = 400                             # reserved per call until usage is known
+
+
+# -----------------------------------------
+# Backend Interface
+# -----------------------------------------
+
+class LLMBackend:
+    """
+    Pluggable stand-in for `client.chat.completions.create`. create() takes
+    the same arguments and returns the same response shape (or an iterator
+    of delta chunks when stream=True). acreate() is the asyncio variant.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.call_count = 0
+        self._count_lock = threading.Lock()
+
+    def _record_call(self):
+        with self._count_lock:
+            self.call_count += 1
+
+    def create(self, model: str, messages: list, temperature: float = 0.2, stream: bool = False, **kwargs):
+        raise NotImplementedError
+
+    async def acreate(self, model: str, messages: list, temperature: float = 0.2, **kwargs):
+        # Fallback for backends without a native async client
+        return await asyncio.to_thread(self.create, model, messages, temperature, **kwargs)
+
+
+class GroqBackend(LLMBackend):
+
+    name = "groq"
+
+    def __init__(self, api_key: str, timeout: float = LLM_TIMEOUT, max_connections: int = LLM_MAX_CONCURRENCY):
+        super().__init__()
+        import httpx
+        from groq import Groq
+
+        self.api_key = api_key
+        self.timeout = timeout
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+        # Retries live in RateLimitedBackend, so the SDK's own are off;
+        # one pooled HTTP client is shared by every session. GROQ_BASE_URL
+        # (read by the SDK) points both clients at another endpoint.
+        self.client = Groq(
+            api_key=api_key,
+            max_retries=0,
+            timeout=timeout,
+            http_client=httpx.Client(limits=self.limits, timeout=timeout)
+        )
+        self._async_client = None
+
+    def create(self, model: str, messages: list, temperature: float = 0.2, stream: bool = False, **kwargs):
+        self._record_call()
+        return self.client.chat.completions.create(
+            model=model, messages=messages, temperature=temperature, stream=stream, **kwargs
+        )
+
+    async def acreate(self, model: str, messages: list, temperature: float = 0.2, **kwargs):
+        if self._async_client is None:
+            import httpx
+            from groq import AsyncGroq
+
+            # Created on first use, inside the event loop that will use it
+            self._async_client = AsyncGroq(
+                api_key=self.api_key,
+                max_retries=0,
+                timeout=self.timeout,
+                http_client=httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            )
+
+        self._record_call()
+        return await self._async_client.chat.completions.create(
+            model=model, messages=messages, temperature=temperature, **kwargs
+        )
+
+
+# -----------------------------------------
+# Offline Fake Backend
+# -----------------------------------------
+
+class RateLimitError(Exception):
+    """Raised by the fake backend to mimic a 429 from the provider."""
+
+    def __init__(self, message: str = "Rate limit reached", retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMTimeoutError(TimeoutError):
+    """Raised by the fake backend when a call would exceed its timeout."""
+
+
+_PERSONA_LINE = re.compile(r"^Persona: (.*)$", re.MULTILINE)
+_CONTEXT_BLOCK = re.compile(r"Context:\n(.*?)\n\n(?:User Question|Current Draft):", re.DOTALL)
+_REWRITE_FIELDS = re.compile(r"^Rewrite ONLY these fields: (.*)$", re.MULTILINE)
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(len(text) // 4, 1)
+
+
+def _completion(content: str, prompt: str):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content=content), finish_reason="stop")],
+        usage=SimpleNamespace(
+            prompt_tokens=_estimate_tokens(prompt),
+            completion_tokens=_estimate_tokens(content),
+            total_tokens=_estimate_tokens(prompt) + _estimate_tokens(content)
+        )
+    )
+
+
+def _stream_chunks(content: str, chunk_chars: int, chunk_delay: float):
+    for i in range(0, len(content), chunk_chars):
+        if chunk_delay:
+            time.sleep(chunk_delay)
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + chunk_chars]))])
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Local stand-in returning schema-valid CampaignResponse JSON built from
+    the prompt's persona and context. Latency, jitter, malformed output,
+    low-quality (refinement-triggering) output and rate-limit errors are
+    all configurable, and a seed makes runs reproducible.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.8, jitter: float = 0.2, malformed_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, low_quality_rate: float = 0.0, seed: int = None,
+                 stream_chunk_chars: int = 12, token_latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.token_latency = token_latency     # extra seconds per completion token (decode time)
+        self.jitter = jitter
+        self.malformed_rate = malformed_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.low_quality_rate = low_quality_rate
+        self.stream_chunk_chars = stream_chunk_chars
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        seed = os.getenv("FAKE_LLM_SEED")
+        return cls(
+            latency=float(os.getenv("FAKE_LLM_LATENCY", 0.8)),
+            jitter=float(os.getenv("FAKE_LLM_JITTER", 0.2)),
+            malformed_rate=float(os.getenv("FAKE_LLM_MALFORMED_RATE", 0.0)),
+            rate_limit_rate=float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", 0.0)),
+            low_quality_rate=float(os.getenv("FAKE_LLM_LOW_QUALITY_RATE", 0.0)),
+            token_latency=float(os.getenv("FAKE_LLM_TOKEN_LATENCY", 0.0)),
+            seed=int(seed) if seed else None
+        )
+
+    def _random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _build_payload(self, prompt: str, low_quality: bool) -> dict:
+        persona_match = _PERSONA_LINE.search(prompt)
+        persona = persona_match.group(1).strip() if persona_match else "None"
+
+        context_match = _CONTEXT_BLOCK.search(prompt)
+        context = context_match.group(1) if context_match else ""
+        facts = [line.strip("•-* ").strip() for line in context.splitlines() if len(line.strip()) > 25]
+
+        if low_quality:
+            payload = {
+                "persona": persona,
+                "key_insight": "Leads matter.",
+                "value_proposition": "NexFlow helps.",
+                "supporting_proof_points": [],
+                "strategic_campaign_angle": "Run ads."
+            }
+        else:
+            payload = self._good_payload(persona, facts)
+
+        # Targeted refinement prompts ask for a subset of fields
+        fields_match = _REWRITE_FIELDS.search(prompt)
+        if fields_match:
+            fields = [field.strip() for field in fields_match.group(1).split(",")]
+            payload = {field: payload[field] for field in fields if field in payload}
+
+        return payload
+
+    @staticmethod
+    def _good_payload(persona: str, facts: list) -> dict:
+        return {
+            "persona": persona,
+            "key_insight": f"{persona} teams face a clear growth opportunity: "
+                           f"{facts[0] if facts else 'qualified lead conversion lags behind spend'}.",
+            "value_proposition": "NexFlow helps increase qualified leads and improve conversion "
+                                 "by combining AI lead scoring with multi-channel automation.",
+            "supporting_proof_points": facts[1:4] or ["38% average increase in qualified lead conversion"],
+            "strategic_campaign_angle": f"Run a focused campaign positioning NexFlow for {persona} "
+                                        "around measurable pipeline impact."
+        }
+
+    def sample_delay(self) -> float:
+        return max(self.latency + (self._random() * 2 - 1) * self.jitter, 0.0)
+
+    def decode_delay(self, content: str) -> float:
+        return self.token_latency * _estimate_tokens(content)
+
+    def sample_rate_limited(self) -> bool:
+        return self._random() < self.rate_limit_rate
+
+    def complete_text(self, prompt: str) -> str:
+        """The completion text for a prompt, with low-quality / malformed outputs mixed in."""
+        payload = self._build_payload(prompt, low_quality=self._random() < self.low_quality_rate)
+        content = json.dumps(payload, indent=2)
+
+        if self._random() < self.malformed_rate:
+            content = content[: len(content) // 2]
+
+        return content
+
+    def create(self, model: str, messages: list, temperature: float = 0.2, stream: bool = False, **kwargs):
+        self._record_call()
+
+        delay = self.sample_delay()
+        timeout = kwargs.get("timeout")
+
+        if timeout is not None and delay > timeout and not stream:
+            time.sleep(timeout)
+            raise LLMTimeoutError(f"Request timed out after {timeout}s")
+
+        if self.sample_rate_limited():
+            # Providers reject quickly; the caller pays only a round trip
+            time.sleep(min(delay, 0.05))
+            raise RateLimitError(retry_after=1.0)
+
+        prompt = messages[-1]["content"] if messages else ""
+        content = self.complete_text(prompt)
+        delay += self.decode_delay(content)
+
+        if stream:
+            chunk_count = max(len(content) // self.stream_chunk_chars, 1)
+            return _stream_chunks(content, self.stream_chunk_chars, delay / chunk_count)
+
+        time.sleep(delay)
+        return _completion(content, prompt)
+
+    async def acreate(self, model: str, messages: list, temperature: float = 0.2, **kwargs):
+        self._record_call()
+
+        delay = self.sample_delay()
+        timeout = kwargs.get("timeout")
+
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            raise LLMTimeoutError(f"Request timed out after {timeout}s")
+
+        if self.sample_rate_limited():
+            await asyncio.sleep(min(delay, 0.05))
+            raise RateLimitError(retry_after=1.0)
+
+        prompt = messages[-1]["content"] if messages else ""
+        content = self.complete_text(prompt)
+
+        await asyncio.sleep(delay + self.decode_delay(content))
+        return _completion(content, prompt)
+
+
+# -----------------------------------------
+# Rate Limiting, Retries & Timeouts
+# -----------------------------------------
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def _retry_after_header(error) -> float:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error):
+    """(reason, retry_after) for retryable provider errors, None otherwise."""
+    if isinstance(error, RateLimitError):
+        return "rate_limit", error.retry_after
+
+    status = getattr(error, "status_code", None)
+    if status in RETRYABLE_STATUS:
+        return ("rate_limit" if status == 429 else "server_error"), _retry_after_header(error)
+
+    # groq.APITimeoutError subclasses APIConnectionError; checked by name to keep groq optional
+    if isinstance(error, TimeoutError) or any(c.__name__ == "APITimeoutError" for c in type(error).__mro__):
+        return "timeout", None
+    if any(c.__name__ == "APIConnectionError" for c in type(error).__mro__):
+        return "connection", None
+
+    return None
+
+
+def estimate_prompt_tokens(messages: list) -> int:
+    return sum(_estimate_tokens(message.get("content") or "") for message in messages)
+
+
+class RateLimitedBackend(LLMBackend):
+    """
+    Shared wrapper around a backend: global requests/min and tokens/min
+    token buckets, a cap on in-flight calls, per-attempt timeouts, and
+    retries with jittered exponential backoff that honour retry-after.
+    Callers queue instead of failing when the provider pushes back.
+    """
+
+    def __init__(self, backend: LLMBackend, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, timeout: float = LLM_TIMEOUT,
+                 max_retries: int = LLM_MAX_RETRIES, backoff_base: float = LLM_BACKOFF_BASE,
+                 backoff_max: float = LLM_BACKOFF_MAX, seed: int = None):
+        self.backend = backend
+        self.name = backend.name
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # Requests may burst ten seconds' worth; tokens a full minute, so one large prompt always fits
+        self.request_bucket = (
+            TokenBucket.per_minute(requests_per_minute, burst=max(requests_per_minute / 6, 1))
+            if requests_per_minute else None
+        )
+        self.token_bucket = (
+            TokenBucket.per_minute(tokens_per_minute, burst=tokens_per_minute)
+            if tokens_per_minute else None
+        )
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    @property
+    def call_count(self) -> int:
+        # Attempts that reached the provider, retries included
+        return self.backend.call_count
+
+    def _backoff(self, attempt: int, retry_after: float = None) -> float:
+        if retry_after is not None:
+            base = retry_after
+        else:
+            base = min(self.backoff_base * 2 ** attempt, self.backoff_max)
+
+        # Full jitter on top, so queued sessions don't retry in lockstep
+        with self._rng_lock:
+            return base + self._rng.uniform(0, base)
+
+    def _wait_for_capacity(self, tokens: int):
+        add_gauge("llm_queue_depth", 1)
+        try:
+            with span("llm.queue_wait", tokens=tokens):
+                if self.request_bucket:
+                    self.request_bucket.acquire()
+                if self.token_bucket:
+                    self.token_bucket.acquire(tokens)
+                if self._slots:
+                    self._slots.acquire()
+        finally:
+            add_gauge("llm_queue_depth", -1)
+
+    async def _await_capacity(self, tokens: int):
+        # Async path: buckets are polled without blocking the loop; the
+        # thread slots don't apply (async callers bound their own concurrency)
+        add_gauge("llm_queue_depth", 1)
+        try:
+            with span("llm.queue_wait", tokens=tokens):
+                for bucket, amount in ((self.request_bucket, 1), (self.token_bucket, tokens)):
+                    if bucket is None:
+                        continue
+                    while True:
+                        wait_seconds = bucket.try_acquire(min(amount, bucket.capacity))
+                        if wait_seconds <= 0:
+                            break
+                        await asyncio.sleep(wait_seconds)
+        finally:
+            add_gauge("llm_queue_depth", -1)
+
+    def _record_failure(self, error: Exception):
+        retryable = classify_error(error)
+        increment("llm_failures_total", reason=retryable[0] if retryable else "error")
+
+    def _retry_delay(self, error: Exception, attempt: int):
+        """(reason, backoff seconds) before the next attempt, or None when the error should propagate."""
+        retryable = classify_error(error)
+
+        if retryable is None or attempt >= self.max_retries:
+            self._record_failure(error)
+            return None
+
+        reason, retry_after = retryable
+        increment("llm_retries_total", reason=reason)
+        return reason, self._backoff(attempt, retry_after)
+
+    def _backoff_or_raise(self, error: Exception, attempt: int):
+        # Called with no slot held, so other sessions use it while this one waits
+        retry = self._retry_delay(error, attempt)
+        if retry is None:
+            raise error
+
+        reason, delay = retry
+        with span("llm.backoff", reason=reason, attempt=attempt + 1, delay_s=round(delay, 3)):
+            time.sleep(delay)
+
+    def _release(self):
+        add_gauge("llm_in_flight", -1)
+        if self._slots:
+            self._slots.release()
+
+    def _settle_usage(self, reserved: int, response):
+        usage = getattr(response, "usage", None)
+        if self.token_bucket and usage is not None:
+            # Against what acquire() actually took: charge an underestimate, refund an overestimate
+            extra = usage.total_tokens - min(reserved, self.token_bucket.capacity)
+            if extra > 0:
+                self.token_bucket.charge(extra)
+            elif extra < 0:
+                self.token_bucket.refund(-extra)
+
+    def create(self, model: str, messages: list, temperature: float = 0.2, stream: bool = False, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        reserved = estimate_prompt_tokens(messages) + kwargs.get("max_tokens", LLM_COMPLETION_TOKEN_ESTIMATE)
+
+        if stream:
+            return self._stream(model, messages, temperature, reserved, kwargs)
+
+        attempt = 0
+        while True:
+            self._wait_for_capacity(reserved)
+            add_gauge("llm_in_flight", 1)
+
+            try:
+                response = self.backend.create(model=model, messages=messages, temperature=temperature, **kwargs)
+            except Exception as e:
+                error = e
+            else:
+                error = None
+            finally:
+                self._release()
+
+            if error is None:
+                self._settle_usage(reserved, response)
+                return response
+
+            self._backoff_or_raise(error, attempt)
+            attempt += 1
+
+    def _stream(self, model: str, messages: list, temperature: float, reserved: int, kwargs: dict):
+        """
+        Streaming create(): the slot is held until the stream is exhausted
+        or closed. Errors before the first chunk are retried like any call;
+        later ones are counted and raised, as the caller already has
+        partial output. Streams carry no usage, so the reservation stands.
+        """
+        attempt = 0
+        while True:
+            self._wait_for_capacity(reserved)
+            add_gauge("llm_in_flight", 1)
+
+            chunks = None
+            started = False
+            try:
+                chunks = self.backend.create(
+                    model=model, messages=messages, temperature=temperature, stream=True, **kwargs
+                )
+                for chunk in chunks:
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started:
+                    self._record_failure(e)
+                    raise
+                error = e
+            finally:
+                close = getattr(chunks, "close", None)
+                if close is not None:
+                    close()
+                self._release()
+
+            self._backoff_or_raise(error, attempt)
+            attempt += 1
+
+    async def acreate(self, model: str, messages: list, temperature: float = 0.2, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        reserved = estimate_prompt_tokens(messages) + kwargs.get("max_tokens", LLM_COMPLETION_TOKEN_ESTIMATE)
+
+        attempt = 0
+        while True:
+            await self._await_capacity(reserved)
+            add_gauge("llm_in_flight", 1)
+
+            try:
+                response = await self.backend.acreate(model=model, messages=messages, temperature=temperature, **kwargs)
+            except Exception as e:
+                error = e
+            else:
+                error = None
+            finally:
+                add_gauge("llm_in_flight", -1)
+
+            if error is None:
+                self._settle_usage(reserved, response)
+                return response
+
+            retry = self._retry_delay(error, attempt)
+            if retry is None:
+                raise error
+
+            reason, delay = retry
+            with span("llm.backoff", reason=reason, attempt=attempt + 1, delay_s=round(delay, 3)):
+                await asyncio.sleep(delay)
+
+            attempt += 1
+
+
+# -----------------------------------------
+# Backend Selection
+# -----------------------------------------
+
+LLM_BACKENDS = ["groq", "fake"]
+
+
+def build_llm_backend(name: str, api_key: str = None) -> LLMBackend:
+    if name == "groq":
+        if not api_key:
+            raise ValueError("GROQ_API_KEY not found in .env file")
+        backend = GroqBackend(api_key)
+    elif name == "fake":
+        backend = FakeLLMBackend.from_env()
+    else:
+        raise ValueError(f"Unknown LLM backend: {name} (expected one of {LLM_BACKENDS})")
+
+    default_rpm, default_tpm = DEFAULT_LIMITS[name]
+
+    return RateLimitedBackend(
+        backend,
+        requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", default_rpm)),
+        tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", default_tpm))
+    )
@@ -0,0 +1,34 @@
+import math
+
+
+# -----------------------------------------
+# Latency Statistics Helpers
+# -----------------------------------------
+
+def percentile(values, q: float) -> float:
+    """Nearest-rank percentile, q in [0, 100]."""
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize_latencies(values) -> dict:
+    values = list(values)
+
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0
+    }
+
+
+def format_latencies(summary: dict, unit: str = "s", scale: float = 1.0) -> str:
+    return " ".join(
+        f"{name} {summary[name] * scale:.3f}{unit}" for name in ("p50", "p95", "p99", "max")
+    )
@@ -0,0 +1,205 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from rag_pipeline import ask_question, refine_campaign, weak_fields, LLM_TEMPERATURE
+from scoring_engine import score_campaign
+from single_flight import SingleFlight
+
+
+# -----------------------------------------
+# Campaign Configuration Options
+# -----------------------------------------
+
+CONFIG_OPTIONS = {
+    "persona": ["Enterprise CMO", "Startup Founder", "Marketing Manager"],
+    "campaign_type": ["Awareness", "Lead Generation", "Product Launch", "Retargeting", "Event Promotion"],
+    "industry": ["B2B SaaS", "FinTech", "Manufacturing", "Logistics", "Professional Services"],
+    "region": ["DACH", "Europe", "United States", "Global"],
+    "budget_level": ["Low Budget", "Mid-Range Budget", "Enterprise Budget"],
+    "channel_focus": ["LinkedIn Only", "Email Only", "Multi-Channel"],
+    "tone_preference": ["Bold & Aggressive", "Executive & Strategic", "Conversational", "Analytical"],
+}
+
+# Assets produced for each primary channel focus (mirrors the app tabs)
+CHANNEL_ASSETS = {
+    "LinkedIn Only": ["LinkedIn Post"],
+    "Email Only": ["Cold Email"],
+    "Multi-Channel": ["LinkedIn Post", "Cold Email", "Landing Hero", "Paid Ad"],
+}
+
+GENERATION_MODES = ["Serial Refinement", "Parallel Best-of-N"]
+
+CONFIG_FIELDS = list(CONFIG_OPTIONS) + ["customer_details", "generation_mode"]
+
+SCORE_THRESHOLD = int(os.getenv("SCORE_THRESHOLD", 75))
+MAX_REFINEMENTS = 2
+
+# Best-of-N settings. All candidates run at once by default (concurrency
+# = N), so latency stays at about one LLM call. Setting a lower
+# concurrency trades latency for cost: an early exit cancels only the
+# candidates that haven't started, since in-flight calls are paid anyway.
+BEST_OF_N = int(os.getenv("BEST_OF_N", 3))
+BEST_OF_N_CONCURRENCY = int(os.getenv("BEST_OF_N_CONCURRENCY", 0))    # 0 = N
+CANDIDATE_TEMPERATURE_STEP = 0.2
+
+
+# -----------------------------------------
+# Query Builder
+# -----------------------------------------
+
+def build_query(config: dict) -> str:
+    # Customer details are not part of the query: they go to ask_question
+    # separately and are retrieved from their own ephemeral index
+    return f"""
+Campaign Type: {config.get("campaign_type", "")}
+Target Industry: {config.get("industry", "")}
+Target Region: {config.get("region", "")}
+Budget Level: {config.get("budget_level", "")}
+Primary Channel Focus: {config.get("channel_focus", "")}
+Tone Preference: {config.get("tone_preference", "")}
+"""
+
+
+def config_key(config: dict) -> tuple:
+    """Normalized, hashable identity of a campaign configuration."""
+    return tuple((field, str(config.get(field) or "").strip()) for field in CONFIG_FIELDS)
+
+
+# -----------------------------------------
+# Full Campaign Pipeline
+# -----------------------------------------
+
+# Concurrent runs of the same normalized config share one pipeline run
+campaign_flight = SingleFlight("campaign")
+
+
+def run_campaign_pipeline(config: dict):
+    """
+    Retrieval + generation + scoring + refinement for one configuration.
+    Initial generation errors propagate; refinement errors are recorded
+    and the best result so far is kept.
+    """
+    return campaign_flight.do(config_key(config), _run_campaign_pipeline, config)
+
+
+def _run_campaign_pipeline(config: dict):
+    if config.get("generation_mode") == "Parallel Best-of-N":
+        return run_best_of_n(config)
+
+    persona = config.get("persona")
+    query = build_query(config)
+    customer_details = config.get("customer_details")
+
+    strategy = ask_question(user_query=query, persona=persona, customer_details=customer_details)
+
+    campaign_config = {"persona": persona, "industry": config.get("industry")}
+    score_result = score_campaign(strategy, campaign_config)
+
+    refinement_count = 0
+    errors = []
+
+    while score_result["total_score"] < SCORE_THRESHOLD and refinement_count < MAX_REFINEMENTS:
+        try:
+            if "error" in strategy:
+                # Nothing usable to refine: regenerate in full
+                refinement_query = query + f"""
+Previous score low ({score_result['total_score']}/100).
+Improve significantly.
+"""
+                strategy = ask_question(user_query=refinement_query, persona=persona, retrieval_query=query,
+                                        customer_details=customer_details)
+            elif weak_fields(score_result):
+                # Rewrite only the fields that lost points
+                strategy = refine_campaign(strategy, score_result, persona=persona, retrieval_query=query,
+                                           customer_details=customer_details)
+            else:
+                break
+
+            score_result = score_campaign(strategy, campaign_config)
+            refinement_count += 1
+        except Exception as e:
+            errors.append(f"Refinement failed: {str(e)}")
+            break
+
+    return {
+        "strategy": strategy,
+        "score_result": score_result,
+        "refinement_count": refinement_count,
+        "errors": errors
+    }
+
+
+# -----------------------------------------
+# Parallel Best-of-N Generation
+# -----------------------------------------
+
+def candidate_temperature(index: int) -> float:
+    # Spread temperatures so candidates actually differ
+    return min(LLM_TEMPERATURE + index * CANDIDATE_TEMPERATURE_STEP, 1.0)
+
+
+def run_best_of_n(config: dict, n: int = None, threshold: int = None, max_workers: int = None):
+    """
+    Fires n candidate generations concurrently (max_workers at a time,
+    default all n), scores each as it lands and returns the best one. Stops
+    waiting, and cancels candidates not yet started, as soon as one
+    candidate reaches the threshold.
+    """
+    n = n or BEST_OF_N
+    threshold = SCORE_THRESHOLD if threshold is None else threshold
+    max_workers = max_workers or BEST_OF_N_CONCURRENCY or n
+
+    persona = config.get("persona")
+    query = build_query(config)
+    customer_details = config.get("customer_details")
+    campaign_config = {"persona": persona, "industry": config.get("industry")}
+
+    best = None
+    errors = []
+    evaluated = 0
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="best-of-n")
+    try:
+        pending = {
+            # Copied context keeps candidate spans in the caller's trace
+            executor.submit(contextvars.copy_context().run, ask_question, query, persona, candidate_temperature(i),
+                            customer_details=customer_details)
+            for i in range(n)
+        }
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    strategy = future.result()
+                except Exception as e:
+                    errors.append(f"Candidate failed: {str(e)}")
+                    continue
+
+                score_result = score_campaign(strategy, campaign_config)
+                evaluated += 1
+
+                if best is None or score_result["total_score"] > best["score_result"]["total_score"]:
+                    best = {"strategy": strategy, "score_result": score_result}
+
+            if best and best["score_result"]["total_score"] >= threshold:
+                # Queued candidates never start; cancel() is a no-op for running ones
+                for future in pending:
+                    future.cancel()
+                break
+    finally:
+        # In-flight HTTP calls cannot be interrupted; their results are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if best is None:
+        raise RuntimeError(errors[-1] if errors else "No candidates generated")
+
+    return {
+        "strategy": best["strategy"],
+        "score_result": best["score_result"],
+        "refinement_count": 0,
+        "candidates_evaluated": evaluated,
+        "errors": errors
+    }
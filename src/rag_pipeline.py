@@ -1,12 +1,23 @@
 from pydantic import BaseModel, ValidationError
 from typing import List
+import asyncio
+import contextvars
+import hashlib
 import json
 import os
+import re
+import threading
+import time
 from dotenv import load_dotenv
 
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from groq import Groq
+from response_cache import CACHE_ENABLED, ResponseCache, get_response_cache
+from bm25_index import BM25Index, reciprocal_rank_fusion, tokenize as bm25_tokenize
+from context_builder import assemble_context
+from json_stream import IncrementalJSONParser
+from llm_backends import build_llm_backend
+from tracing import increment, span
+from retrieval_cache import LRUCache, IndexVersionWatcher, text_key, embedding_key, filter_key
+from single_flight import SingleFlight
 
 
 # -----------------------------------------
@@ -31,6 +42,22 @@ PERSONA_STRATEGY = {
     }
 }
 
+# Precomputed Chroma metadata filters per persona
+PERSONA_FILTERS = {
+    persona: {"category": {"$in": strategy["filters"]}}
+    for persona, strategy in PERSONA_STRATEGY.items()
+}
+
+
+def persona_fingerprint() -> str:
+    """Changes whenever a persona's category list does; stored in the index manifest."""
+    mapping = {persona: sorted(strategy["filters"]) for persona, strategy in PERSONA_STRATEGY.items()}
+    return hashlib.sha1(json.dumps(mapping, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def partition_name(persona: str) -> str:
+    return "persona_" + re.sub(r"[^a-z0-9]+", "_", persona.lower()).strip("_")
+
 
 # -----------------------------------------
 # Structured Campaign Response Schema
@@ -53,24 +80,105 @@ load_dotenv()
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
-if not GROQ_API_KEY:
-    raise ValueError("GROQ_API_KEY not found in .env file")
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+LLM_MODEL = "llama-3.1-8b-instant"
+LLM_TEMPERATURE = 0.2
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "huggingface")    # huggingface | onnx | hashing
+CHROMA_DIR = os.getenv("CHROMA_DIR", "../chroma_db")
+
+# "chroma" or "numpy" (memory-mapped .npy + exact search); both live under CHROMA_DIR
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float32")     # numpy backend only: float32 or float16
+
+INDEX_MANIFEST_PATH = os.path.join(CHROMA_DIR, "index_manifest.json")
+BM25_INDEX_PATH = os.path.join(CHROMA_DIR, "bm25_index.json")
+
+RETRIEVAL_K = 5
+RETRIEVAL_FETCH_K = 15
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", 512))
+
+# "mmr" (vector only), "hybrid" (BM25 + vector, RRF), "lexical" (BM25 only,
+# no embedding) or "auto" (lexical for keyword-heavy queries, else hybrid)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "mmr")
+
+# Per-persona vector collections built by build_vectorstore; persona
+# queries search their partition instead of filtering the whole index
+PERSONA_PARTITIONS = os.getenv("PERSONA_PARTITIONS", "1") == "1"
 
-client = Groq(api_key=GROQ_API_KEY)
+# Targeted refinement: smaller context and a completion cap, since only
+# the weak fields are rewritten
+REFINE_CONTEXT_TOKEN_BUDGET = int(os.getenv("REFINE_CONTEXT_TOKEN_BUDGET", 250))
+REFINE_MAX_TOKENS = int(os.getenv("REFINE_MAX_TOKENS", 350))
 
 
 # -----------------------------------------
-# Initialize Embeddings & Vectorstore
+# Lazy Shared Resources
 # -----------------------------------------
+# Heavy clients are created on first use (not at import) and shared by
+# every caller in the process, including all Streamlit sessions. Their
+# modules are imported there too: vector_backends and embedding_providers
+# pull in langchain_core's retriever/runnable stack (langsmith), most of
+# the import time of this module.
 
-embeddings = HuggingFaceEmbeddings(
-    model_name="all-MiniLM-L6-v2"
-)
+_embeddings = None
+_vectorstore = None
+_llm_backend = None
+_resource_lock = threading.RLock()
 
-vectorstore = Chroma(
-    persist_directory="../chroma_db",
-    embedding_function=embeddings
-)
+
+def get_embeddings():
+    global _embeddings
+
+    if _embeddings is None:
+        with _resource_lock:
+            if _embeddings is None:
+                from embedding_providers import build_embeddings
+                _embeddings = build_embeddings(EMBEDDING_PROVIDER, EMBEDDING_MODEL)
+
+    return _embeddings
+
+
+def embedding_id() -> str:
+    from embedding_providers import embedding_space
+    return embedding_space(EMBEDDING_PROVIDER, EMBEDDING_MODEL)
+
+
+def get_vectorstore():
+    global _vectorstore
+
+    if _vectorstore is None:
+        with _resource_lock:
+            if _vectorstore is None:
+                from vector_backends import build_vector_backend
+                _vectorstore = build_vector_backend(VECTOR_BACKEND, CHROMA_DIR, get_embeddings(), dtype=VECTOR_DTYPE)
+
+    return _vectorstore
+
+
+def get_llm_backend():
+    global _llm_backend
+
+    if _llm_backend is None:
+        with _resource_lock:
+            if _llm_backend is None:
+                _llm_backend = build_llm_backend(LLM_BACKEND, GROQ_API_KEY)
+
+    return _llm_backend
+
+
+def open_partition(persona: str):
+    from vector_backends import build_vector_backend
+    return build_vector_backend(VECTOR_BACKEND, CHROMA_DIR, get_embeddings(), dtype=VECTOR_DTYPE,
+                                collection=partition_name(persona))
+
+
+def warm_up():
+    """Loads the embedding model, vectorstore and LLM client ahead of the first request."""
+    get_embeddings().embed_query("warm up")
+    get_vectorstore()
+    get_llm_backend()
 
 
 # -----------------------------------------
@@ -82,6 +190,18 @@ def is_greeting(query: str) -> bool:
     return query.lower().strip() in greetings
 
 
+# -----------------------------------------
+# Stable Chunk Identity
+# -----------------------------------------
+
+def chunk_id(doc) -> str:
+    if getattr(doc, "id", None):
+        return doc.id
+
+    raw = doc.metadata.get("source", "") + "\n" + doc.page_content
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
 # -----------------------------------------
 # Build Retriever
 # -----------------------------------------
@@ -89,57 +209,365 @@ def is_greeting(query: str) -> bool:
 def get_retriever(metadata_filter: dict = None):
 
     search_kwargs = {
-        "k": 5,
-        "fetch_k": 15
+        "k": RETRIEVAL_K,
+        "fetch_k": RETRIEVAL_FETCH_K
     }
 
     if metadata_filter:
         search_kwargs["filter"] = metadata_filter
 
-    return vectorstore.as_retriever(
+    return get_vectorstore().as_retriever(
         search_type="mmr",
         search_kwargs=search_kwargs
     )
 
 
+# -----------------------------------------
+# Cached Retrieval
+# -----------------------------------------
+# Query embeddings are cached by query text; retrieval results by
+# (mode, embedding or query hash, filter, k, fetch_k). Caches, the BM25
+# index, the main vectorstore, the persona partitions and the cached
+# index_version are dropped whenever the index manifest changes, i.e.
+# after build_vectorstore runs (in this or another process).
+
+class MainVectorstore:
+    """
+    Watcher hook for the shared get_vectorstore() instance: clear() drops
+    it so the next call reopens the rebuilt index. The numpy backend loads
+    its rows once and a compaction removes the vector file it maps, so a
+    kept instance would serve stale vectors next to a reloaded BM25 index.
+    """
+
+    def clear(self):
+        global _vectorstore
+
+        with _resource_lock:
+            _vectorstore = None
+
+
+class LazyBM25:
+    """Loads the BM25 index written by build_vectorstore on first use; clear() forces a reload."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._index = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    if not os.path.exists(self.path):
+                        raise FileNotFoundError(f"BM25 index not found at {self.path}; run build_vectorstore.py")
+                    self._index = BM25Index.load(self.path)
+
+        return self._index
+
+    def clear(self):
+        with self._lock:
+            self._index = None
+
+
+class PersonaPartitions:
+    """
+    Maps a persona's metadata filter to its partition store. Partitions are
+    only used when the manifest says they were built for the current
+    PERSONA_STRATEGY; otherwise retrieval falls back to the filtered main
+    index. clear() re-reads the manifest and reopens the stores.
+    """
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self._personas = None
+        self._stores = {}
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if not PERSONA_PARTITIONS or not os.path.exists(self.manifest_path):
+            return {}
+
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            partitions = json.load(f).get("partitions") or {}
+
+        if partitions.get("fingerprint") != persona_fingerprint():
+            return {}
+
+        built = partitions.get("personas", {})
+        return {filter_key(PERSONA_FILTERS[persona]): persona for persona in PERSONA_STRATEGY if persona in built}
+
+    def store_for(self, metadata_filter: dict):
+        if not metadata_filter:
+            return None
+
+        with self._lock:
+            if self._personas is None:
+                self._personas = self._load()
+
+            persona = self._personas.get(filter_key(metadata_filter))
+            if persona is None:
+                return None
+
+            if persona not in self._stores:
+                self._stores[persona] = open_partition(persona)
+            return self._stores[persona]
+
+    def clear(self):
+        with self._lock:
+            self._personas = None
+            self._stores = {}
+
+
+class IndexVersion:
+    """The manifest's index_version (None before the first build); clear() forces a re-read."""
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self._version = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if not self._loaded:
+                self._version = None
+                if os.path.exists(self.manifest_path):
+                    with open(self.manifest_path, "r", encoding="utf-8") as f:
+                        self._version = json.load(f).get("index_version")
+                self._loaded = True
+
+            return self._version
+
+    def clear(self):
+        with self._lock:
+            self._loaded = False
+
+
+query_embedding_cache = LRUCache(RETRIEVAL_CACHE_SIZE)
+retrieval_cache = LRUCache(RETRIEVAL_CACHE_SIZE)
+bm25 = LazyBM25(BM25_INDEX_PATH)
+partitions = PersonaPartitions(INDEX_MANIFEST_PATH)
+index_version = IndexVersion(INDEX_MANIFEST_PATH)
+
+index_watcher = IndexVersionWatcher(
+    INDEX_MANIFEST_PATH, [query_embedding_cache, retrieval_cache, bm25, MainVectorstore(), partitions, index_version]
+)
+
+
+def current_index_version():
+    """Changes only when build_vectorstore actually changed the index."""
+    index_watcher.check()
+    return index_version.get()
+
+
+def invalidate_retrieval_cache():
+    index_watcher.invalidate()
+
+
+def embed_query(query: str):
+    key = text_key(query)
+    embedding = query_embedding_cache.get(key)
+
+    if embedding is None:
+        with span("retrieval.embed_query", chars=len(query)):
+            embedding = get_embeddings().embed_query(query)
+        query_embedding_cache.set(key, embedding)
+        increment("cache_lookups_total", cache="query_embedding", result="miss")
+    else:
+        increment("cache_lookups_total", cache="query_embedding", result="hit")
+
+    return embedding
+
+
+def filter_categories(metadata_filter: dict):
+    if not metadata_filter:
+        return None
+    return metadata_filter["category"]["$in"]
+
+
+def is_keyword_heavy(query: str, index: BM25Index = None) -> bool:
+    """
+    Form-style queries ("Target Region: DACH" lines, as built by the app)
+    and short all-known-term queries are exact-term lookups, where BM25
+    alone does well and the embedding forward pass can be skipped.
+    """
+    lines = [line.strip() for line in query.splitlines() if line.strip()]
+    field_lines = [line for line in lines if re.match(r"^[\w &/-]+:(\s|$)", line)]
+
+    if lines and len(field_lines) / len(lines) >= 0.8:
+        return True
+
+    terms = bm25_tokenize(query)
+    index = index or bm25.get()
+    return 0 < len(terms) <= 4 and len(index.known_terms(query)) == len(terms)
+
+
+def retrieval_mode(query: str, mode: str = None) -> str:
+    mode = mode or RETRIEVAL_MODE
+    if mode == "auto":
+        mode = "lexical" if is_keyword_heavy(query) else "hybrid"
+    return mode
+
+
+def lexical_search(query: str, metadata_filter: dict, k: int):
+    with span("retrieval.bm25_search", k=k):
+        hits = bm25.get().search(query, k=k, categories=filter_categories(metadata_filter))
+    return [doc for doc, _ in hits]
+
+
+def retrieve(query: str, metadata_filter: dict = None, k: int = RETRIEVAL_K, fetch_k: int = RETRIEVAL_FETCH_K,
+             mode: str = None):
+    index_watcher.check()
+
+    mode = retrieval_mode(query, mode)
+
+    if mode == "lexical":
+        # Fast path: no embedding forward pass at all
+        key = (mode, text_key(query), filter_key(metadata_filter), k)
+    else:
+        embedding = embed_query(query)
+        key = (mode, embedding_key(embedding), filter_key(metadata_filter), k, fetch_k)
+
+    docs = retrieval_cache.get(key)
+
+    if docs is None and mode != "lexical":
+        # A persona partition holds exactly the filtered chunks: search it unfiltered
+        partition = partitions.store_for(metadata_filter)
+        if partition is not None:
+            store, store_filter = partition, None
+        else:
+            store, store_filter = get_vectorstore(), metadata_filter
+
+    if docs is None:
+        if mode == "lexical":
+            docs = lexical_search(query, metadata_filter, k)
+        elif mode == "hybrid":
+            with span("retrieval.vector_search", k=fetch_k, partition=partition is not None):
+                vector_docs = store.similarity_search_by_vector(embedding, k=fetch_k, filter=store_filter)
+            lexical_docs = lexical_search(query, metadata_filter, fetch_k)
+            docs = reciprocal_rank_fusion([vector_docs, lexical_docs], k=k)
+        else:
+            with span("retrieval.mmr_search", k=k, fetch_k=fetch_k, partition=partition is not None):
+                docs = store.max_marginal_relevance_search_by_vector(
+                    embedding, k=k, fetch_k=fetch_k, filter=store_filter
+                )
+        retrieval_cache.set(key, docs)
+        increment("cache_lookups_total", cache="retrieval", result="miss")
+    else:
+        increment("cache_lookups_total", cache="retrieval", result="hit")
+
+    return list(docs)
+
+
+# -----------------------------------------
+# Customer Details (ephemeral index)
+# -----------------------------------------
+# Pasted customer notes are not part of the retrieval query (they would
+# dilute its embedding). They are chunked into a per-request in-memory
+# index instead and their best chunks join the knowledge base hits. In
+# lexical mode they are ranked with BM25, so no embedding model is loaded.
+
+def customer_context(customer_details: str, query: str, mode: str = None) -> list:
+    if not customer_details or not customer_details.strip():
+        return []
+
+    mode = retrieval_mode(query, mode)
+
+    with span("retrieval.customer_details", chars=len(customer_details), mode=mode) as customer_span:
+        if mode == "lexical":
+            from ephemeral_index import lexical_search
+            docs = lexical_search(customer_details, query)
+        else:
+            from ephemeral_index import build_index as build_ephemeral_index
+            index = build_ephemeral_index(customer_details, query, get_embeddings(), embedding_id())
+            docs = index.search(embed_query(query))
+            customer_span["chunks"] = len(index)
+
+        customer_span["hits"] = len(docs)
+
+    return docs
+
+
+def merge_customer_docs(docs: list, customer_docs: list) -> list:
+    if not customer_docs:
+        return docs
+
+    # Interleaved by rank; the context token budget trims the tail
+    return reciprocal_rank_fusion([docs, customer_docs], k=len(docs) + len(customer_docs))
+
+
 # -----------------------------------------
 # Main Function
 # -----------------------------------------
 
-def ask_question(user_query: str, persona: str = None):
+def prepare_generation(user_query: str, persona: str = None, temperature: float = LLM_TEMPERATURE,
+                       use_cache: bool = CACHE_ENABLED, retrieval_query: str = None, customer_details: str = None):
+    """
+    Everything before the LLM call: greeting check, persona logic,
+    retrieval, prompt assembly and cache lookup. Returns {"result": ...}
+    when no LLM call is needed, otherwise the prompt and its context.
+    """
 
     # Greeting
     if is_greeting(user_query):
-        return {
+        return {"result": {
             "message": "Hello 👋 I'm NexFlow’s AI assistant. How can I help you today?"
-        }
+        }}
 
     # Persona logic
-    metadata_filter = None
-    persona_context = ""
-    tone_instruction = ""
+    metadata_filter, persona_context, tone_instruction = persona_settings(persona)
 
-    if persona and persona in PERSONA_STRATEGY:
-        strategy = PERSONA_STRATEGY[persona]
+    # Retrieval (refinements pass the original query to reuse its results)
+    retrieved_docs = retrieve(retrieval_query or user_query, metadata_filter)
 
-        metadata_filter = {
-            "category": {"$in": strategy["filters"]}
-        }
+    if not retrieved_docs:
+        return {"result": {"error": "No relevant documents found."}}
 
-        persona_context = strategy["focus"]
-        tone_instruction = strategy["tone"]
+    retrieved_docs = merge_customer_docs(retrieved_docs, customer_context(customer_details, retrieval_query or user_query))
 
-    # Retrieval
-    retriever = get_retriever(metadata_filter)
-    retrieved_docs = retriever.invoke(user_query)
+    with span("prompt.assemble", chunks=len(retrieved_docs)) as prompt_span:
+        # Deduped, relevance-ordered context that fits the token budget
+        assembled = assemble_context(retrieved_docs)
+        prompt = build_prompt(user_query, persona, tone_instruction, persona_context, assembled["text"])
 
-    if not retrieved_docs:
-        return {"error": "No relevant documents found."}
+        prompt_span["context_tokens"] = assembled["tokens"]
+        prompt_span["context_tokens_saved"] = assembled["saved_tokens"]
+        prompt_span["chunks_kept"] = len(assembled["docs"])
+        increment("context_tokens_saved_total", assembled["saved_tokens"])
+
+    # Response cache lookup, keyed on the prompt actually sent (budget and settings included)
+    cache_key = None
+    if use_cache:
+        cache_key = ResponseCache.make_key(
+            persona, user_query, [chunk_id(doc) for doc in assembled["docs"]], LLM_MODEL, temperature, prompt=prompt
+        )
+        cached = get_response_cache().get(cache_key)
+        increment("cache_lookups_total", cache="response", result="hit" if cached is not None else "miss")
+        if cached is not None:
+            return {"result": cached}
+
+    return {
+        "prompt": prompt,
+        "persona": persona,
+        "retrieved_docs": assembled["docs"],
+        "context_tokens": assembled["tokens"],
+        "context_tokens_saved": assembled["saved_tokens"],
+        "cache_key": cache_key
+    }
+
+
+def persona_settings(persona: str):
+    """(metadata_filter, focus, tone) for a persona; no filter and empty strings otherwise."""
+    if persona and persona in PERSONA_STRATEGY:
+        strategy = PERSONA_STRATEGY[persona]
+        return PERSONA_FILTERS[persona], strategy["focus"], strategy["tone"]
+
+    return None, "", ""
 
-    context = "\n\n".join([doc.page_content for doc in retrieved_docs])
 
+def build_prompt(user_query: str, persona: str, tone_instruction: str, persona_context: str, context: str):
     # Persona-aware JSON prompt
-    prompt = f"""
+    return f"""
 You are NexFlow’s AI Marketing Strategist.
 
 Persona: {persona}
@@ -170,29 +598,31 @@ No explanations.
 Only raw JSON.
 """
 
-    # Call LLM
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2
-    )
 
-    raw_output = response.choices[0].message.content.strip()
+def validate_output(raw_output: str, request: dict):
+    persona = request["persona"]
+    retrieved_docs = request["retrieved_docs"]
 
     # Validate JSON
     try:
-        parsed_json = json.loads(raw_output)
-
-        validated = CampaignResponse(
-            persona=parsed_json.get("persona", persona),
-            key_insight=parsed_json.get("key_insight", ""),
-            value_proposition=parsed_json.get("value_proposition", ""),
-            supporting_proof_points=parsed_json.get("supporting_proof_points", []),
-            strategic_campaign_angle=parsed_json.get("strategic_campaign_angle", ""),
-            sources=[doc.metadata for doc in retrieved_docs]
-        )
+        with span("llm.parse", chars=len(raw_output)):
+            parsed_json = json.loads(raw_output)
+
+            validated = CampaignResponse(
+                persona=parsed_json.get("persona", persona),
+                key_insight=parsed_json.get("key_insight", ""),
+                value_proposition=parsed_json.get("value_proposition", ""),
+                supporting_proof_points=parsed_json.get("supporting_proof_points", []),
+                strategic_campaign_angle=parsed_json.get("strategic_campaign_angle", ""),
+                sources=[doc.metadata for doc in retrieved_docs]
+            )
+
+        result = validated.model_dump()
 
-        return validated.model_dump()
+        if request["cache_key"]:
+            get_response_cache().set(request["cache_key"], result)
+
+        return result
 
     except (json.JSONDecodeError, ValidationError):
         return {
@@ -201,6 +631,271 @@ Only raw JSON.
         }
 
 
+# Identical prompts in flight at the same time (many sessions, one demo)
+# share a single LLM call
+llm_flight = SingleFlight("llm")
+
+
+def flight_key(request: dict, temperature: float) -> tuple:
+    return (LLM_MODEL, temperature, request["prompt"])
+
+
+def ask_question(user_query: str, persona: str = None, temperature: float = LLM_TEMPERATURE,
+                 use_cache: bool = CACHE_ENABLED, retrieval_query: str = None, customer_details: str = None):
+
+    request = prepare_generation(user_query, persona, temperature, use_cache, retrieval_query, customer_details)
+
+    if "result" in request:
+        return request["result"]
+
+    return llm_flight.do(flight_key(request, temperature), generate, request, temperature)
+
+
+def generate(request: dict, temperature: float = LLM_TEMPERATURE):
+    # Call LLM
+    with span("llm.call", model=LLM_MODEL, temperature=temperature) as llm_span:
+        response = get_llm_backend().create(
+            model=LLM_MODEL,
+            messages=[{"role": "user", "content": request["prompt"]}],
+            temperature=temperature
+        )
+        record_usage(llm_span, response)
+
+    raw_output = response.choices[0].message.content.strip()
+
+    return validate_output(raw_output, request)
+
+
+async def aask_question(user_query: str, persona: str = None, temperature: float = LLM_TEMPERATURE,
+                        use_cache: bool = CACHE_ENABLED, retrieval_query: str = None, customer_details: str = None):
+    """
+    ask_question for asyncio callers (api_server): retrieval and cache I/O
+    run on the default executor, the LLM call itself is awaited.
+    """
+    loop = asyncio.get_running_loop()
+
+    # Copied context keeps executor spans in the caller's trace
+    request = await loop.run_in_executor(
+        None, contextvars.copy_context().run,
+        prepare_generation, user_query, persona, temperature, use_cache, retrieval_query, customer_details
+    )
+
+    if "result" in request:
+        return request["result"]
+
+    with span("llm.call", model=LLM_MODEL, temperature=temperature) as llm_span:
+        response = await get_llm_backend().acreate(
+            model=LLM_MODEL,
+            messages=[{"role": "user", "content": request["prompt"]}],
+            temperature=temperature
+        )
+        record_usage(llm_span, response)
+
+    raw_output = response.choices[0].message.content.strip()
+
+    return await loop.run_in_executor(None, contextvars.copy_context().run, validate_output, raw_output, request)
+
+
+def record_usage(llm_span: dict, response):
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+
+    llm_span["prompt_tokens"] = usage.prompt_tokens
+    llm_span["completion_tokens"] = usage.completion_tokens
+    increment("llm_prompt_tokens_total", usage.prompt_tokens, model=LLM_MODEL)
+    increment("llm_completion_tokens_total", usage.completion_tokens, model=LLM_MODEL)
+
+
+# -----------------------------------------
+# Streaming Variant
+# -----------------------------------------
+
+def stream_question(user_query: str, persona: str = None, temperature: float = LLM_TEMPERATURE,
+                    use_cache: bool = CACHE_ENABLED, retrieval_query: str = None, customer_details: str = None):
+    """
+    Same as ask_question but streams the completion. Yields
+    ("field", name, value) as each top-level JSON field completes, then
+    ("result", None, validated_dict) once the full output is validated.
+    """
+    request = prepare_generation(user_query, persona, temperature, use_cache, retrieval_query, customer_details)
+
+    if "result" not in request:
+        flight = llm_flight.lead(flight_key(request, temperature))
+
+        if flight is None:
+            # Someone else is already generating this exact prompt: wait for theirs
+            request = {"result": llm_flight.do(flight_key(request, temperature), generate, request, temperature)}
+
+    if "result" in request:
+        result = request["result"]
+        for key in CampaignResponse.model_fields:
+            if key in result:
+                yield ("field", key, result[key])
+        yield ("result", None, result)
+        return
+
+    try:
+        parser = IncrementalJSONParser()
+
+        started = time.perf_counter()
+        stream = get_llm_backend().create(
+            model=LLM_MODEL,
+            messages=[{"role": "user", "content": request["prompt"]}],
+            temperature=temperature,
+            stream=True
+        )
+
+        with span("llm.stream", model=LLM_MODEL, temperature=temperature) as llm_span:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+
+                if "first_token_ms" not in llm_span:
+                    llm_span["first_token_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+                for key, value in parser.feed(delta):
+                    yield ("field", key, value)
+
+        result = validate_output(parser.buffer.strip(), request)
+    except Exception as e:
+        flight.fail(e)
+        raise
+    except BaseException:
+        # Consumer stopped reading (rerun / closed generator): waiters retry on their own
+        flight.abandon()
+        raise
+
+    yield ("result", None, flight.resolve(result))
+
+
+# -----------------------------------------
+# Targeted Refinement
+# -----------------------------------------
+# Instead of regenerating everything, only the fields that lost points in
+# score_campaign are rewritten and merged back into the previous response.
+
+# score breakdown key -> CampaignResponse field the LLM can improve
+REFINABLE_FIELDS = {
+    "key_insight": "key_insight",
+    "value_proposition": "value_proposition",
+    "proof_points": "supporting_proof_points",
+    "strategic_angle": "strategic_campaign_angle",
+}
+
+MAX_POINTS = {"key_insight": 15, "value_proposition": 15, "proof_points": 20, "strategic_angle": 15}
+
+FIELD_GUIDANCE = {
+    "key_insight": "one specific, data-backed insight about the growth opportunity for this persona",
+    "value_proposition": "a concrete value proposition stating how NexFlow will increase, improve or reduce a metric",
+    "supporting_proof_points": "a JSON list of at least 3 short proof points taken from the context",
+    "strategic_campaign_angle": "the campaign positioning and focus, in 1-2 sentences",
+}
+
+
+def weak_fields(score_result: dict) -> list:
+    breakdown = score_result.get("breakdown", {})
+    return [
+        field for key, field in REFINABLE_FIELDS.items()
+        if breakdown.get(key, 0) < MAX_POINTS[key]
+    ]
+
+
+def build_refine_prompt(previous: dict, fields: list, persona: str, tone_instruction: str,
+                        persona_context: str, context: str):
+    # Only the fields being kept are sent back, so the rewrite stays consistent with them
+    kept = {
+        key: previous.get(key) for key in CampaignResponse.model_fields
+        if key not in fields and key not in ("persona", "sources")
+    }
+    guidance = "\n".join(f"- {field}: {FIELD_GUIDANCE[field]}" for field in fields)
+
+    return f"""
+You are NexFlow’s AI Marketing Strategist.
+
+Persona: {persona}
+Communication Tone: {tone_instruction}
+Strategic Focus: {persona_context}
+
+Use only the provided company context.
+
+Context:
+{context}
+
+Current Draft:
+{json.dumps(kept, ensure_ascii=False)}
+
+Rewrite ONLY these fields: {", ".join(fields)}
+{guidance}
+
+Return ONLY a raw JSON object with exactly those keys. No markdown.
+"""
+
+
+def merge_refinement(previous: dict, raw_output: str, fields: list, persona: str) -> dict:
+    """Previous response with the rewritten fields swapped in; raises ValueError on unusable output."""
+    with span("llm.parse", chars=len(raw_output)):
+        try:
+            parsed = json.loads(raw_output)
+        except json.JSONDecodeError as e:
+            raise ValueError("Refinement output validation failed") from e
+
+        if not isinstance(parsed, dict):
+            raise ValueError("Refinement output validation failed")
+
+        merged = dict(previous)
+        merged["persona"] = previous.get("persona") or persona
+
+        for field in fields:
+            value = parsed.get(field)
+            if value:
+                merged[field] = value
+
+        try:
+            return CampaignResponse(**merged).model_dump()
+        except ValidationError as e:
+            raise ValueError("Refinement output validation failed") from e
+
+
+def refine_campaign(previous: dict, score_result: dict, persona: str = None, retrieval_query: str = None,
+                    context: str = None, temperature: float = LLM_TEMPERATURE, customer_details: str = None):
+    """
+    Rewrites only the weak fields of a previous CampaignResponse. The
+    context is rebuilt from the (cached) retrieval for `retrieval_query`
+    plus the customer notes (cached index) under a smaller token budget
+    unless passed in directly.
+    """
+    fields = weak_fields(score_result)
+    if not fields:
+        return previous
+
+    metadata_filter, persona_context, tone_instruction = persona_settings(persona)
+
+    if context is None:
+        docs = merge_customer_docs(retrieve(retrieval_query, metadata_filter),
+                                   customer_context(customer_details, retrieval_query))
+        context = assemble_context(docs, token_budget=REFINE_CONTEXT_TOKEN_BUDGET)["text"]
+
+    with span("prompt.assemble", refine=True, fields=len(fields)):
+        prompt = build_refine_prompt(previous, fields, persona, tone_instruction, persona_context, context)
+
+    with span("llm.call", model=LLM_MODEL, temperature=temperature, refine=True) as llm_span:
+        response = get_llm_backend().create(
+            model=LLM_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=REFINE_MAX_TOKENS
+        )
+        record_usage(llm_span, response)
+
+    increment("refinements_total", fields=len(fields))
+    return merge_refinement(previous, response.choices[0].message.content.strip(), fields, persona)
+
+
 # -----------------------------------------
 # Local Test
 # -----------------------------------------
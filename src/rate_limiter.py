@@ -0,0 +1,62 @@
+import threading
+import time
+
+
+# -----------------------------------------
+# Token Bucket Rate Limiter
+# -----------------------------------------
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens are added per second up to
+    `capacity`. acquire() blocks until enough tokens are available.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, amount: float, burst: float = None):
+        return cls(rate=amount / 60.0, capacity=burst)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """Takes tokens if available; otherwise returns seconds to wait."""
+        with self._lock:
+            self._refill()
+
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+
+            return (amount - self._tokens) / self.rate
+
+    def charge(self, amount: float):
+        """Takes tokens without waiting; the balance may go negative (settles an underestimate)."""
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+
+    def refund(self, amount: float):
+        """Returns unused tokens (settles an overestimate), up to capacity."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+    def acquire(self, amount: float = 1.0):
+        # Requests larger than the bucket would never fit
+        amount = min(amount, self.capacity)
+
+        while True:
+            wait_seconds = self.try_acquire(amount)
+            if wait_seconds <= 0:
+                return
+            time.sleep(wait_seconds)
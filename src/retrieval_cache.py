@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+# -----------------------------------------
+# Thread-safe LRU Cache
+# -----------------------------------------
+
+class LRUCache:
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._data),
+            "maxsize": self.maxsize
+        }
+
+
+# -----------------------------------------
+# Cache Keys
+# -----------------------------------------
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def embedding_key(embedding) -> str:
+    # Rounded so float noise from identical inputs maps to the same key
+    raw = ",".join(f"{x:.6f}" for x in embedding)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def filter_key(metadata_filter: dict) -> str:
+    return json.dumps(metadata_filter or {}, sort_keys=True)
+
+
+# -----------------------------------------
+# Index Version Tracking
+# -----------------------------------------
+
+class IndexVersionWatcher:
+    """
+    Detects vectorstore rebuilds (in this or another process) via the index
+    manifest's mtime and clears the registered caches when it changes.
+    """
+
+    def __init__(self, manifest_path: str, caches: list):
+        self.manifest_path = manifest_path
+        self.caches = caches
+        self._version = self._current_version()
+        self._lock = threading.Lock()
+
+    def _current_version(self):
+        try:
+            return os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def check(self):
+        version = self._current_version()
+
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self.invalidate()
+                    self._version = version
+
+    def invalidate(self):
+        for cache in self.caches:
+            cache.clear()
@@ -1,8 +1,70 @@
+import re
+import time
+
+import numpy as np
+
+from tracing import metrics, span, tracing_active
+
+
+# -----------------------------------------
+# Precompiled Keyword Matchers
+# -----------------------------------------
+
+INSIGHT_OPPORTUNITY = re.compile("opportunity")
+INSIGHT_GROWTH = re.compile("growth")
+PROPOSITION_KEYWORDS = re.compile("increase|improve")
+ANGLE_KEYWORDS = re.compile("campaign|focus")
+
+# Characters that can appear in the repr() structure of a dict
+_STRUCTURAL_CHARS = frozenset("'\"{}[]:,\\")
+
+
+def mentions(strategy: dict, needle: str) -> bool:
+    """
+    Same answer as `needle.lower() in str(strategy).lower()`, but checks
+    field by field and stops at the first hit instead of serializing the
+    whole strategy (sources included) every time.
+    """
+    needle = needle.lower()
+
+    if not needle.isprintable() or not _STRUCTURAL_CHARS.isdisjoint(needle):
+        return needle in str(strategy).lower()
+
+    # Without structural characters a match can never span two fields
+    for key, value in strategy.items():
+        if needle in str(key).lower():
+            return True
+
+        if isinstance(value, str):
+            text = value if value.isprintable() else repr(value)
+        else:
+            text = str(value)
+
+        if needle in text.lower():
+            return True
+
+    return False
+
+
 def score_campaign(strategy: dict, config: dict):
     """
     Scores campaign quality based on multiple factors.
     Returns total score + breakdown for UI.
     """
+    # Scoring takes microseconds; untraced callers (batch loops, /score)
+    # skip the span record but still feed the stage histogram
+    if not tracing_active():
+        start = time.perf_counter()
+        try:
+            return _score_campaign(strategy, config)
+        finally:
+            metrics.observe("score.campaign", time.perf_counter() - start)
+
+    with span("score.campaign"):
+        return _score_campaign(strategy, config)
+
+
+def _score_campaign(strategy: dict, config: dict):
     score = 0
     breakdown = {
         "persona": 0,
@@ -15,7 +77,7 @@ def score_campaign(strategy: dict, config: dict):
     }
 
     # 1. Persona alignment (20 points)
-    if config.get("persona") and config["persona"].lower() in str(strategy).lower():
+    if config.get("persona") and mentions(strategy, config["persona"]):
         score += 20
         breakdown["persona"] = 20
     else:
@@ -23,7 +85,8 @@ def score_campaign(strategy: dict, config: dict):
 
     # 2. Key Insight quality (15 points)
     insight = strategy.get("key_insight", "")
-    if len(insight) > 60 and "opportunity" in insight.lower() or "growth" in insight.lower():
+    insight_lower = insight.lower()
+    if len(insight) > 60 and INSIGHT_OPPORTUNITY.search(insight_lower) or INSIGHT_GROWTH.search(insight_lower):
         score += 15
         breakdown["key_insight"] = 15
     else:
@@ -31,7 +94,7 @@ def score_campaign(strategy: dict, config: dict):
 
     # 3. Value Proposition strength (15 points)
     prop = strategy.get("value_proposition", "")
-    if len(prop) > 60 and ("increase" in prop.lower() or "improve" in prop.lower()):
+    if len(prop) > 60 and PROPOSITION_KEYWORDS.search(prop.lower()):
         score += 15
         breakdown["value_proposition"] = 15
     else:
@@ -50,7 +113,7 @@ def score_campaign(strategy: dict, config: dict):
 
     # 5. Strategic angle quality (15 points)
     angle = strategy.get("strategic_campaign_angle", "")
-    if len(angle) > 50 and ("campaign" in angle.lower() or "focus" in angle.lower()):
+    if len(angle) > 50 and ANGLE_KEYWORDS.search(angle.lower()):
         score += 15
         breakdown["strategic_angle"] = 15
     else:
@@ -69,4 +132,126 @@ def score_campaign(strategy: dict, config: dict):
     return {
         "total_score": breakdown["total"],
         "breakdown": breakdown
-    }
\ No newline at end of file
+    }
+
+
+# -----------------------------------------
+# Batched Scoring
+# -----------------------------------------
+# Same rules as _score_campaign, evaluated column-wise: one NumPy array per
+# length / keyword feature, then the points are np.where over the columns.
+# Keyword scans only run on rows whose length passes the threshold (the
+# per-item `and` short-circuits the same way), so both paths see, and
+# fail on, exactly the same values.
+
+def _rows_where(values: list, mask: np.ndarray, pattern) -> np.ndarray:
+    hits = np.zeros(len(values), dtype=bool)
+    for i in np.flatnonzero(mask).tolist():
+        hits[i] = pattern.search(values[i].lower()) is not None
+    return hits
+
+
+def _extract_features(strategies: list, configs: list) -> dict:
+    """Columnar length / keyword features, one array entry per strategy, in the per-item evaluation order."""
+    n = len(strategies)
+    f = {}
+
+    def lengths(values):
+        return np.fromiter(map(len, values), dtype=np.int64, count=n)
+
+    f["persona_hit"] = np.fromiter(
+        (bool(c.get("persona")) and mentions(s, c["persona"]) for s, c in zip(strategies, configs)),
+        dtype=bool, count=n
+    )
+
+    insights = [s.get("key_insight", "") for s in strategies]
+    insights_lower = [t.lower() for t in insights]
+    f["insight_len"] = lengths(insights)
+    f["insight_opportunity"] = _rows_where(insights_lower, f["insight_len"] > 60, INSIGHT_OPPORTUNITY)
+    f["insight_growth"] = np.fromiter((INSIGHT_GROWTH.search(t) is not None for t in insights_lower),
+                                      dtype=bool, count=n)
+
+    props = [s.get("value_proposition", "") for s in strategies]
+    f["prop_len"] = lengths(props)
+    f["prop_keyword"] = _rows_where(props, f["prop_len"] > 60, PROPOSITION_KEYWORDS)
+
+    f["proof_count"] = lengths(s.get("supporting_proof_points", []) for s in strategies)
+
+    angles = [s.get("strategic_campaign_angle", "") for s in strategies]
+    f["angle_len"] = lengths(angles)
+    f["angle_keyword"] = _rows_where(angles, f["angle_len"] > 50, ANGLE_KEYWORDS)
+
+    f["source_count"] = lengths(s.get("sources", []) for s in strategies)
+    return f
+
+
+def score_campaign_batch(strategies: list, config) -> list:
+    """
+    score_campaign over many strategies at once. `config` is one config
+    shared by every strategy or a list aligned with `strategies`.
+    Returns the same {"total_score", "breakdown"} dicts, in order.
+    """
+    configs = [config] * len(strategies) if isinstance(config, dict) else list(config)
+
+    if len(configs) != len(strategies):
+        raise ValueError("config must be a dict or a list the same length as strategies")
+
+    if not strategies:
+        return []
+
+    if not tracing_active():
+        start = time.perf_counter()
+        try:
+            return _score_batch(strategies, configs)
+        finally:
+            metrics.observe("score.batch", time.perf_counter() - start)
+
+    with span("score.batch", strategies=len(strategies)):
+        return _score_batch(strategies, configs)
+
+
+def _score_batch(strategies: list, configs: list) -> list:
+    f = _extract_features(strategies, configs)
+
+    insight_full = (f["insight_len"] > 60) & f["insight_opportunity"] | f["insight_growth"]
+    prop_full = (f["prop_len"] > 60) & f["prop_keyword"]
+    angle_full = (f["angle_len"] > 50) & f["angle_keyword"]
+
+    persona_pts = np.where(f["persona_hit"], 20, 0)
+    insight_pts = np.where(insight_full, 15, np.where(f["insight_len"] > 30, 5, 0))
+    prop_pts = np.where(prop_full, 15, np.where(f["prop_len"] > 30, 5, 0))
+    proof_pts = np.where(f["proof_count"] >= 3, 20, np.where(f["proof_count"] >= 1, 10, 0))
+    angle_pts = np.where(angle_full, 15, np.where(f["angle_len"] > 20, 5, 0))
+    source_pts = np.where(f["source_count"] > 0, 15, 0)
+
+    # Partial credit shows in the breakdown but only full credit counts
+    total = np.minimum(
+        persona_pts
+        + np.where(insight_full, 15, 0)
+        + np.where(prop_full, 15, 0)
+        + proof_pts
+        + np.where(angle_full, 15, 0)
+        + source_pts,
+        100
+    )
+
+    columns = zip(
+        persona_pts.tolist(), insight_pts.tolist(), prop_pts.tolist(), proof_pts.tolist(),
+        angle_pts.tolist(), source_pts.tolist(), total.tolist()
+    )
+
+    return [
+        {
+            "total_score": total_score,
+            "breakdown": {
+                "persona": persona,
+                "key_insight": insight,
+                "value_proposition": prop,
+                "proof_points": proofs,
+                "strategic_angle": angle,
+                "sources": sources,
+                "total": total_score
+            }
+        }
+        for persona, insight, prop, proofs, angle, sources, total_score in columns
+    ]
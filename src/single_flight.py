@@ -0,0 +1,134 @@
+import copy
+import threading
+
+from tracing import increment
+
+
+# -----------------------------------------
+# Single-flight Request Coalescing
+# -----------------------------------------
+# Concurrent identical requests (same key) share one computation: the
+# first caller leads and runs it, the others wait and get a copy of its
+# result or its exception. Keys are only held while in flight; finished
+# results are the caches' job.
+#
+# If the leader is cancelled (a BaseException such as a Streamlit rerun,
+# KeyboardInterrupt or a closed generator) the call is abandoned and the
+# waiting followers race to lead a fresh attempt instead of failing.
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.abandoned = False
+        self.followers = 0
+
+
+class Flight:
+    """Handle held by the leader; exactly one of resolve/fail/abandon must be called."""
+
+    def __init__(self, group, key, call: _Call):
+        self._group = group
+        self._key = key
+        self._call = call
+
+    def resolve(self, result):
+        self._call.result = result
+        followers = self._group._finish(self._key, self._call)
+
+        if followers:
+            increment("single_flight_calls_saved_total", followers, group=self._group.name)
+            # Followers copy the shared result; the leader gets its own copy too
+            return copy.deepcopy(result)
+        return result
+
+    def fail(self, error: Exception):
+        self._call.error = error
+        self._group._finish(self._key, self._call)
+
+    def abandon(self):
+        self._call.abandoned = True
+        self._group._finish(self._key, self._call)
+
+
+class SingleFlight:
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def lead(self, key):
+        """Returns a Flight if the caller should run the request, None if one is already in flight."""
+        with self._lock:
+            if key in self._calls:
+                return None
+            call = self._calls[key] = _Call()
+
+        increment("single_flight_total", group=self.name, role="leader")
+        return Flight(self, key, call)
+
+    def _finish(self, key, call: _Call) -> int:
+        # Removed before waking followers, so later arrivals start a new flight
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            followers = call.followers
+
+        call.done.set()
+        return followers
+
+    def do(self, key, fn, *args, timeout: float = None, **kwargs):
+        """
+        Runs fn(*args, **kwargs) once per key at a time. Followers give up
+        with TimeoutError after `timeout` seconds without affecting the leader.
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is None:
+                    call = self._calls[key] = _Call()
+                    flight = Flight(self, key, call)
+                else:
+                    call.followers += 1
+                    flight = None
+
+            if flight is not None:
+                increment("single_flight_total", group=self.name, role="leader")
+                return self._run(flight, fn, args, kwargs)
+
+            increment("single_flight_total", group=self.name, role="follower")
+
+            if not call.done.wait(timeout):
+                with self._lock:
+                    call.followers -= 1
+                increment("single_flight_total", group=self.name, role="follower_timeout")
+                raise TimeoutError(f"Timed out waiting for an identical in-flight request ({self.name})")
+
+            if call.abandoned:
+                increment("single_flight_total", group=self.name, role="follower_retry")
+                continue
+
+            if call.error is not None:
+                raise call.error
+
+            return copy.deepcopy(call.result)
+
+    @staticmethod
+    def _run(flight: Flight, fn, args, kwargs):
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            flight.fail(e)
+            raise
+        except BaseException:
+            flight.abandon()
+            raise
+
+        return flight.resolve(result)
@@ -0,0 +1,269 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# -----------------------------------------
+# Settings
+# -----------------------------------------
+
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH")        # JSON lines, one per span / trace
+METRICS_FILE = os.getenv("METRICS_FILE")            # Prometheus text file, rewritten per trace
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))    # Prometheus /metrics endpoint (0 = off)
+
+DURATION_BUCKETS = [0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+logger = logging.getLogger("nexflow.trace")
+
+if TRACE_LOG_PATH:
+    _handler = logging.FileHandler(TRACE_LOG_PATH)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+# -----------------------------------------
+# Metrics Registry
+# -----------------------------------------
+
+class MetricsRegistry:
+    """Counters, gauges and per-stage duration histograms, rendered as Prometheus text."""
+
+    def __init__(self):
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def add_gauge(self, name: str, amount: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + amount
+
+    def observe(self, stage: str, seconds: float):
+        # Per-bucket counts (last slot is +Inf); made cumulative when rendered
+        index = bisect_left(DURATION_BUCKETS, seconds)
+
+        with self._lock:
+            hist = self._histograms.get(stage)
+            if hist is None:
+                hist = self._histograms[stage] = {"count": 0, "sum": 0.0, "buckets": [0] * (len(DURATION_BUCKETS) + 1)}
+            hist["count"] += 1
+            hist["sum"] += seconds
+            hist["buckets"][index] += 1
+
+    def snapshot(self) -> dict:
+        def flat(series: dict) -> dict:
+            return {
+                name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else ""): value
+                for (name, labels), value in series.items()
+            }
+
+        with self._lock:
+            return {
+                "counters": flat(self._counters),
+                "gauges": flat(self._gauges),
+                "stages": {
+                    stage: {"count": h["count"], "sum_s": h["sum"], "mean_s": h["sum"] / h["count"]}
+                    for stage, h in self._histograms.items()
+                }
+            }
+
+    def prometheus_text(self) -> str:
+        lines = []
+
+        with self._lock:
+            for kind, series in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted({name for name, _ in series}):
+                    lines.append(f"# TYPE nexflow_{name} {kind}")
+                    for (series_name, labels), value in sorted(series.items()):
+                        if series_name != name:
+                            continue
+                        label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                        lines.append(f"nexflow_{name}{{{label_text}}} {value}" if labels else f"nexflow_{name} {value}")
+
+            if self._histograms:
+                lines.append("# TYPE nexflow_stage_duration_seconds histogram")
+            for stage, hist in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS, hist["buckets"]):
+                    cumulative += count
+                    lines.append(f'nexflow_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'nexflow_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {hist["count"]}')
+                lines.append(f'nexflow_stage_duration_seconds_sum{{stage="{stage}"}} {hist["sum"]}')
+                lines.append(f'nexflow_stage_duration_seconds_count{{stage="{stage}"}} {hist["count"]}')
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def increment(name: str, amount: float = 1, **labels):
+    metrics.increment(name, amount, **labels)
+
+
+def add_gauge(name: str, amount: float, **labels):
+    metrics.add_gauge(name, amount, **labels)
+
+
+# -----------------------------------------
+# Traces & Spans
+# -----------------------------------------
+
+_current_trace = contextvars.ContextVar("nexflow_trace", default=None)
+
+recent_traces = deque(maxlen=20)
+
+
+class Trace:
+
+    def __init__(self, name: str, **attrs):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        self.spans = []
+        self.started = time.time()
+        self.duration_ms = None
+        self._lock = threading.Lock()
+
+    def add(self, record: dict):
+        with self._lock:
+            self.spans.append(record)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = list(self.spans)
+
+        return {
+            "trace_id": self.id,
+            "name": self.name,
+            "started": self.started,
+            "duration_ms": self.duration_ms,
+            "attrs": self.attrs,
+            "spans": spans
+        }
+
+
+@contextmanager
+def start_trace(name: str, **attrs):
+    """Groups every span opened inside the block (and in copied contexts) into one trace."""
+    trace = Trace(name, **attrs)
+    token = _current_trace.set(trace)
+    start = time.perf_counter()
+
+    try:
+        yield trace
+    finally:
+        trace.duration_ms = (time.perf_counter() - start) * 1000
+        _current_trace.reset(token)
+        recent_traces.append(trace.to_dict())
+
+        logger.info(json.dumps({"type": "trace", **trace.to_dict()}, default=str))
+
+        if METRICS_FILE:
+            write_prometheus_file(METRICS_FILE)
+
+
+def tracing_active() -> bool:
+    """
+    True inside start_trace or with JSON span logging on. Otherwise hot
+    paths skip their span but still call metrics.observe themselves.
+    """
+    return _current_trace.get() is not None or logger.isEnabledFor(logging.INFO)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Times a pipeline stage. The yielded attrs dict can be filled in while
+    the stage runs (token counts, cache hits, ...).
+    """
+    start = time.perf_counter()
+
+    try:
+        yield attrs
+    finally:
+        seconds = time.perf_counter() - start
+        metrics.observe(name, seconds)
+
+        trace = _current_trace.get()
+        logging_enabled = logger.isEnabledFor(logging.INFO)
+
+        # Outside a trace with logging off, the histogram is all we keep
+        if trace is not None or logging_enabled:
+            record = {
+                "type": "span",
+                "trace_id": trace.id if trace else None,
+                "name": name,
+                "duration_ms": round(seconds * 1000, 3),
+                "attrs": attrs
+            }
+
+            if trace:
+                trace.add(record)
+
+            if logging_enabled:
+                logger.info(json.dumps(record, default=str))
+
+
+# -----------------------------------------
+# Prometheus Export
+# -----------------------------------------
+
+def write_prometheus_file(path: str):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(metrics.prometheus_text())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+
+        body = metrics.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = METRICS_PORT):
+    """Serves /metrics on a daemon thread. Safe to call more than once."""
+    global _server
+
+    if not port:
+        return None
+
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+
+    return _server
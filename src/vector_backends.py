@@ -0,0 +1,596 @@
+import json
+import os
+import threading
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+
+# -----------------------------------------
+# Backend Interface
+# -----------------------------------------
+# A vector backend is any langchain VectorStore that also supports the
+# Chroma calls the repo relies on: add_documents(docs, ids=...),
+# delete(ids=...), get(include=[]) -> {"ids": [...]}, and the *_by_vector
+# similarity / MMR searches with a {"category": {"$in": [...]}} filter.
+
+VECTOR_BACKENDS = ["chroma", "numpy"]
+VECTOR_DTYPES = ["float32", "float16"]
+
+CHROMA_DEFAULT_BATCH_SIZE = 5000      # used when the client can't report its limit
+
+
+# -----------------------------------------
+# Vectorized Search Helpers
+# -----------------------------------------
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest finite scores, best first."""
+    k = min(k, int(np.isfinite(scores).sum()))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def matvec(vectors: np.ndarray, query: np.ndarray, block_rows: int = 8192) -> np.ndarray:
+    """vectors @ query in float32. float16 rows are upcast block by block: numpy has no fp16 BLAS."""
+    if vectors.dtype == np.float32:
+        return vectors @ query
+
+    scores = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), block_rows):
+        block = vectors[start:start + block_rows]
+        scores[start:start + len(block)] = block.astype(np.float32) @ query
+
+    return scores
+
+
+def mmr_select(query: np.ndarray, candidates: np.ndarray, k: int, lambda_mult: float = 0.5) -> list:
+    """
+    Maximal marginal relevance over unit-norm candidate rows; same greedy
+    selection as langchain's maximal_marginal_relevance, but the pairwise
+    similarities come from one matrix product.
+    """
+    count = len(candidates)
+    if count == 0 or k <= 0:
+        return []
+
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = pairwise[selected[0]].copy()
+
+    while len(selected) < min(k, count):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[selected] = -np.inf
+
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(max_similarity, pairwise[best], out=max_similarity)
+
+    return selected
+
+
+# -----------------------------------------
+# Memory-mapped NumPy Backend
+# -----------------------------------------
+
+class _StoreState:
+    """
+    Immutable snapshot of the index; writers swap in a new one. Rows are
+    append-only: a deleted or replaced row stays in place, marked dead in
+    `live` (None while every row is live), until the store compacts.
+    """
+
+    def __init__(self, vectors, ids, texts, metadatas, live=None, rows=None, codes=None):
+        self.vectors = vectors
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.live = live
+        self.rows = rows if rows is not None else {doc_id: i for i, doc_id in enumerate(ids)}
+        self.masks = {}
+        self.codes = dict(codes) if codes else {}
+        self._mask_lock = threading.Lock()
+
+        # Category is what every persona filter uses, so encode it up front
+        self.field_codes("category")
+
+    def live_rows(self):
+        return range(len(self.ids)) if self.live is None else np.flatnonzero(self.live).tolist()
+
+    def field_codes(self, field: str) -> tuple:
+        """
+        One pass over the metadata: {value: code} plus an int array of
+        per-row codes. A mask is then a single vectorized compare, so a
+        high-cardinality field (one category per file) stays linear.
+        Codes carried over from the previous snapshot are only extended
+        for the appended rows.
+        """
+        encoded = self.codes.get(field)
+
+        if encoded is None or len(encoded[1]) < len(self.ids):
+            with self._mask_lock:
+                lookup, codes = encoded if encoded else ({}, np.empty(0, dtype=np.int32))
+                lookup = dict(lookup)
+                appended = np.fromiter(
+                    (lookup.setdefault(m.get(field), len(lookup)) for m in self.metadatas[len(codes):]),
+                    dtype=np.int32, count=len(self.ids) - len(codes)
+                )
+                encoded = self.codes[field] = (lookup, np.concatenate([codes, appended]))
+
+        return encoded
+
+    def field_mask(self, field: str, value) -> np.ndarray:
+        key = (field, value)
+        mask = self.masks.get(key)
+
+        if mask is None:
+            lookup, codes = self.field_codes(field)
+            code = lookup.get(value)
+            mask = codes == code if code is not None else np.zeros(len(self.ids), dtype=bool)
+            self.masks[key] = mask
+
+        return mask
+
+    def filter_mask(self, metadata_filter: dict):
+        if not metadata_filter:
+            return None
+
+        mask = np.ones(len(self.ids), dtype=bool)
+
+        for field, condition in metadata_filter.items():
+            if isinstance(condition, dict):
+                if "$in" in condition:
+                    values = condition["$in"]
+                elif "$eq" in condition:
+                    values = [condition["$eq"]]
+                else:
+                    raise ValueError(f"Unsupported filter operator for numpy backend: {condition}")
+            else:
+                values = [condition]
+
+            field_mask = np.zeros(len(self.ids), dtype=bool)
+            for value in values:
+                field_mask |= self.field_mask(field, value)
+            mask &= field_mask
+
+        return mask
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Exact cosine search over normalized embeddings kept in a memory-mapped
+    .npy file (float32 or float16), with ids, texts and metadata in an
+    append-only JSON-lines log. Category filters are precomputed boolean masks.
+
+    Writes are incremental: new rows fill spare capacity in the vector file
+    (grown by doubling) plus one log line each, and deletes or upserts only
+    mark old rows dead. Once dead rows outnumber live ones both files are
+    compacted, so an index build is linear in the number of rows written.
+    """
+
+    LOG_FILE = "records.jsonl"
+    LEGACY_VECTORS_FILE = "vectors.npy"     # single-snapshot format, migrated on load
+    LEGACY_RECORDS_FILE = "records.json"
+    MIN_CAPACITY = 1024
+    COMPACT_MIN_DEAD = 1024
+    COPY_BLOCK_ROWS = 65536
+
+    def __init__(self, persist_directory: str, embedding_function, dtype: str = "float32"):
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unknown vector dtype: {dtype} (expected one of {VECTOR_DTYPES})")
+
+        self.persist_directory = persist_directory
+        self.embedding_function = embedding_function
+        self.dtype = np.dtype(dtype)
+        self._write_lock = threading.Lock()
+        self._vectors_file = None     # current file named by the log
+        self._writer = None           # writable map of it, opened on first write
+        self._state = self._load()
+
+    @property
+    def embeddings(self):
+        return self.embedding_function
+
+    def __len__(self):
+        return len(self._state.rows)
+
+    # -----------------------------------------
+    # Persistence
+    # -----------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.persist_directory, name)
+
+    def _empty_state(self) -> _StoreState:
+        return _StoreState(np.empty((0, 0), dtype=self.dtype), [], [], [])
+
+    def _load(self) -> _StoreState:
+        if not os.path.exists(self._path(self.LOG_FILE)):
+            if os.path.exists(self._path(self.LEGACY_RECORDS_FILE)):
+                return self._migrate_legacy()
+            return self._empty_state()
+
+        ids, texts, metadatas = [], [], []
+        rows = {}
+        dead = []
+
+        with open(self._path(self.LOG_FILE), "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break     # a write still in progress
+
+                record = json.loads(line)
+
+                if "vectors" in record:
+                    self._vectors_file = record["vectors"]
+                elif "delete" in record:
+                    dead.extend(rows.pop(doc_id) for doc_id in record["delete"] if doc_id in rows)
+                else:
+                    if record["id"] in rows:
+                        dead.append(rows[record["id"]])
+                    rows[record["id"]] = len(ids)
+                    ids.append(record["id"])
+                    texts.append(record["text"])
+                    metadatas.append(record["metadata"])
+
+        if self._vectors_file is None:
+            return self._empty_state()
+
+        vectors = np.load(self._path(self._vectors_file), mmap_mode="r")[:len(ids)]
+        if vectors.dtype != self.dtype:
+            vectors = vectors.astype(self.dtype)
+
+        live = None
+        if dead:
+            live = np.ones(len(ids), dtype=bool)
+            live[dead] = False
+
+        return _StoreState(vectors, ids, texts, metadatas, live, rows)
+
+    def _migrate_legacy(self) -> _StoreState:
+        with open(self._path(self.LEGACY_RECORDS_FILE), "r", encoding="utf-8") as f:
+            records = json.load(f)
+
+        vectors = np.load(self._path(self.LEGACY_VECTORS_FILE), mmap_mode="r")
+        self._state = _StoreState(vectors, records["ids"], records["texts"], records["metadatas"])
+        self._compact()
+
+        for name in (self.LEGACY_VECTORS_FILE, self.LEGACY_RECORDS_FILE):
+            os.remove(self._path(name))
+
+        return self._state
+
+    def _new_vectors_file(self, capacity: int, dim: int) -> tuple:
+        os.makedirs(self.persist_directory, exist_ok=True)
+        name = f"vectors-{os.urandom(6).hex()}.npy"
+        return name, np.lib.format.open_memmap(self._path(name), mode="w+", dtype=self.dtype, shape=(capacity, dim))
+
+    def _copy_rows(self, target: np.ndarray, rows):
+        # Block by block, so a compaction never holds the whole index in memory
+        rows = np.asarray(rows, dtype=np.int64)
+        for start in range(0, len(rows), self.COPY_BLOCK_ROWS):
+            block = rows[start:start + self.COPY_BLOCK_ROWS]
+            target[start:start + len(block)] = self._state.vectors[block]
+
+    def _use_vectors_file(self, name: str, writer: np.ndarray):
+        old = self._vectors_file
+        self._vectors_file = name
+        self._writer = writer
+
+        if old and old != name:
+            try:
+                os.remove(self._path(old))     # readers that still map it keep their copy
+            except OSError:
+                pass
+
+    def _reserve(self, rows: int, dim: int):
+        """Makes room for `rows` rows, doubling into a new file when full."""
+        if self._writer is None and self._vectors_file is not None and self._state.vectors.dtype == self.dtype:
+            writer = np.load(self._path(self._vectors_file), mmap_mode="r+")
+            if writer.dtype == self.dtype:
+                self._writer = writer
+
+        if self._writer is not None and rows <= len(self._writer):
+            return
+
+        count = len(self._state.ids)
+        capacity = max(rows, 2 * (len(self._writer) if self._writer is not None else count), self.MIN_CAPACITY)
+        name, writer = self._new_vectors_file(capacity, dim)
+        self._copy_rows(writer, range(count))
+        writer.flush()
+
+        self._append_log([{"vectors": name}])
+        self._use_vectors_file(name, writer)
+
+    def _append_log(self, records: list):
+        os.makedirs(self.persist_directory, exist_ok=True)
+        with open(self._path(self.LOG_FILE), "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records))
+
+    def _compact(self):
+        """Rewrites the vector file and the log with live rows only (temp log + rename)."""
+        state = self._state
+        keep = list(state.live_rows())
+        dim = state.vectors.shape[1] if state.vectors.ndim == 2 else 0
+
+        name, writer = self._new_vectors_file(max(len(keep), self.MIN_CAPACITY), dim)
+        self._copy_rows(writer, keep)
+        writer.flush()
+
+        tmp_log = self._path(self.LOG_FILE + ".tmp")
+        with open(tmp_log, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"vectors": name}) + "\n")
+            for row in keep:
+                f.write(json.dumps({"id": state.ids[row], "text": state.texts[row], "metadata": state.metadatas[row]}) + "\n")
+        os.replace(tmp_log, self._path(self.LOG_FILE))
+
+        self._use_vectors_file(name, writer)
+        self._state = _StoreState(
+            np.load(self._path(name), mmap_mode="r")[:len(keep)],
+            [state.ids[row] for row in keep],
+            [state.texts[row] for row in keep],
+            [state.metadatas[row] for row in keep]
+        )
+
+    def _maybe_compact(self):
+        state = self._state
+        dead = len(state.ids) - len(state.rows)
+        if dead >= self.COMPACT_MIN_DEAD and dead > len(state.rows):
+            self._compact()
+
+    def compact(self):
+        with self._write_lock:
+            self._compact()
+
+    # -----------------------------------------
+    # Writes (Chroma-compatible subset)
+    # -----------------------------------------
+
+    def add_texts(self, texts, metadatas: list = None, ids: list = None, **kwargs) -> list:
+        texts = list(texts)
+        if not texts:
+            return []
+
+        return self.add_embeddings(texts, self.embedding_function.embed_documents(texts), metadatas, ids)
+
+    def add_embeddings(self, texts, embeddings, metadatas: list = None, ids: list = None) -> list:
+        """add_texts with precomputed vectors (e.g. copied from another store)."""
+        texts = list(texts)
+        metadatas = [dict(m) for m in metadatas] if metadatas else [{} for _ in texts]
+        ids = list(ids) if ids else [f"doc-{os.urandom(8).hex()}" for _ in texts]
+
+        if not texts:
+            return []
+
+        embedded = normalize_rows(np.asarray(embeddings, dtype=np.float32))
+
+        with self._write_lock:
+            count = len(self._state.ids)
+            if count and embedded.shape[1] != self._state.vectors.shape[1]:
+                raise ValueError(f"Embedding size {embedded.shape[1]} != index size {self._state.vectors.shape[1]}")
+
+            self._reserve(count + len(ids), embedded.shape[1])
+            state = self._state
+
+            # Vectors first, then the log lines that make them visible
+            self._writer[count:count + len(ids)] = embedded
+            self._writer.flush()
+            self._append_log([
+                {"id": doc_id, "text": text, "metadata": metadata}
+                for doc_id, text, metadata in zip(ids, texts, metadatas)
+            ])
+
+            # Upsert: an existing id's old row goes dead, like Chroma replacing it
+            live = np.ones(count + len(ids), dtype=bool)
+            if state.live is not None:
+                live[:count] = state.live
+
+            rows = dict(state.rows)
+            for row, doc_id in enumerate(ids, start=count):
+                previous = rows.get(doc_id)
+                if previous is not None:
+                    live[previous] = False
+                rows[doc_id] = row
+
+            self._state = _StoreState(
+                np.load(self._path(self._vectors_file), mmap_mode="r")[:count + len(ids)],
+                state.ids + ids, state.texts + texts, state.metadatas + metadatas,
+                None if live.all() else live, rows, state.codes
+            )
+            self._maybe_compact()
+
+        return ids
+
+    def delete(self, ids: list = None, **kwargs):
+        if not ids:
+            return
+
+        with self._write_lock:
+            state = self._state
+            removed = [doc_id for doc_id in dict.fromkeys(ids) if doc_id in state.rows]
+            if not removed:
+                return
+
+            self._append_log([{"delete": removed}])
+
+            live = np.ones(len(state.ids), dtype=bool) if state.live is None else state.live.copy()
+            rows = dict(state.rows)
+            for doc_id in removed:
+                live[rows.pop(doc_id)] = False
+
+            self._state = _StoreState(state.vectors, state.ids, state.texts, state.metadatas, live, rows, state.codes)
+            self._maybe_compact()
+
+    def get(self, ids: list = None, include: list = None, **kwargs) -> dict:
+        include = ["documents", "metadatas"] if include is None else include
+        state = self._state
+
+        rows = state.live_rows() if ids is None else [state.rows[i] for i in ids if i in state.rows]
+
+        result = {"ids": [state.ids[i] for i in rows]}
+        if "documents" in include:
+            result["documents"] = [state.texts[i] for i in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [state.metadatas[i] for i in rows]
+        if "embeddings" in include:
+            result["embeddings"] = np.asarray(state.vectors[list(rows)], dtype=np.float32)
+
+        return result
+
+    # -----------------------------------------
+    # Search
+    # -----------------------------------------
+
+    def _scores(self, state: _StoreState, embedding, metadata_filter: dict) -> np.ndarray:
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        scores = matvec(state.vectors, query)
+
+        mask = state.filter_mask(metadata_filter)
+        if state.live is not None:
+            mask = state.live if mask is None else mask & state.live
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+
+        return scores
+
+    def _document(self, state: _StoreState, row: int) -> Document:
+        return Document(id=state.ids[row], page_content=state.texts[row], metadata=dict(state.metadatas[row]))
+
+    def similarity_search_with_score_by_vector(self, embedding, k: int = 4, filter: dict = None, **kwargs) -> list:
+        state = self._state
+        if not state.rows:
+            return []
+
+        scores = self._scores(state, embedding, filter)
+        return [(self._document(state, row), float(scores[row])) for row in top_k_indices(scores, k)]
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, filter: dict = None, **kwargs) -> list:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k=k, filter=filter)]
+
+    def similarity_search(self, query: str, k: int = 4, filter: dict = None, **kwargs) -> list:
+        return self.similarity_search_by_vector(self.embedding_function.embed_query(query), k=k, filter=filter)
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: dict = None, **kwargs) -> list:
+        return self.similarity_search_with_score_by_vector(
+            self.embedding_function.embed_query(query), k=k, filter=filter
+        )
+
+    def max_marginal_relevance_search_by_vector(self, embedding, k: int = 4, fetch_k: int = 20,
+                                                lambda_mult: float = 0.5, filter: dict = None, **kwargs) -> list:
+        state = self._state
+        if not state.rows:
+            return []
+
+        scores = self._scores(state, embedding, filter)
+        candidates = top_k_indices(scores, fetch_k)
+
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        candidate_vectors = np.asarray(state.vectors[candidates], dtype=np.float32)
+
+        selected = mmr_select(query, candidate_vectors, k, lambda_mult)
+        return [self._document(state, int(candidates[i])) for i in selected]
+
+    def max_marginal_relevance_search(self, query: str, k: int = 4, fetch_k: int = 20,
+                                      lambda_mult: float = 0.5, filter: dict = None, **kwargs) -> list:
+        return self.max_marginal_relevance_search_by_vector(
+            self.embedding_function.embed_query(query), k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter
+        )
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas: list = None, ids: list = None,
+                   persist_directory: str = None, **kwargs):
+        store = cls(persist_directory, embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+
+# -----------------------------------------
+# Backend Selection
+# -----------------------------------------
+
+def build_vector_backend(name: str, persist_directory: str, embedding_function, dtype: str = "float32",
+                         collection: str = None):
+    """`collection` names an extra store next to the main one (e.g. a persona partition)."""
+    if name == "chroma":
+        from langchain_chroma import Chroma
+
+        if collection:
+            return Chroma(collection_name=collection, persist_directory=persist_directory,
+                          embedding_function=embedding_function)
+        return Chroma(persist_directory=persist_directory, embedding_function=embedding_function)
+
+    if name == "numpy":
+        directory = "numpy_index" if not collection else f"numpy_index_{collection}"
+        return NumpyVectorStore(os.path.join(persist_directory, directory), embedding_function, dtype=dtype)
+
+    raise ValueError(f"Unknown vector backend: {name} (expected one of {VECTOR_BACKENDS})")
+
+
+def upsert_embeddings(store, ids: list, texts: list, embeddings, metadatas: list):
+    """Upserts precomputed vectors into either backend."""
+    if isinstance(store, NumpyVectorStore):
+        store.add_embeddings(texts, embeddings, metadatas, ids)
+        return
+
+    # langchain's Chroma only adds via its embedding function, so go to the
+    # collection directly. Both are private attributes: if a langchain-chroma
+    # release drops them, fall back to the public add_texts (which re-embeds).
+    collection = getattr(store, "_collection", None)
+    if collection is None or not hasattr(collection, "upsert"):
+        for start in range(0, len(ids), CHROMA_DEFAULT_BATCH_SIZE):
+            end = start + CHROMA_DEFAULT_BATCH_SIZE
+            store.add_texts(texts[start:end], metadatas=metadatas[start:end], ids=ids[start:end])
+        return
+
+    # Chroma rejects writes above the client's max batch size, so slice to it
+    max_batch_size = getattr(getattr(store, "_client", None), "get_max_batch_size", None)
+    step = max_batch_size() if callable(max_batch_size) else CHROMA_DEFAULT_BATCH_SIZE
+
+    for start in range(0, len(ids), step):
+        end = start + step
+        collection.upsert(
+            ids=ids[start:end],
+            embeddings=[list(map(float, vector)) for vector in embeddings[start:end]],
+            documents=texts[start:end],
+            metadatas=metadatas[start:end]
+        )
+
+
+def copy_vectors(source, target, ids: list, batch_size: int = None):
+    """
+    Copies stored vectors, texts and metadata between stores without
+    re-embedding. A numpy source is copied in one pass (one gather, one
+    append to the target); Chroma reads are batched to its default limit.
+    """
+    if not ids:
+        return
+
+    if batch_size is None:
+        batch_size = len(ids) if isinstance(source, NumpyVectorStore) else CHROMA_DEFAULT_BATCH_SIZE
+
+    for start in range(0, len(ids), batch_size):
+        batch = source.get(ids=ids[start:start + batch_size], include=["embeddings", "documents", "metadatas"])
+        if batch["ids"]:
+            upsert_embeddings(target, batch["ids"], batch["documents"], batch["embeddings"], batch["metadatas"])
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+import api_server
+from api_server import create_app
+
+
+@pytest.fixture(autouse=True)
+def no_warm_up(monkeypatch):
+    # Validation never reaches the models; skip loading them at startup
+    monkeypatch.setattr(api_server, "warm_up", lambda: None)
+
+
+def post(path: str, body) -> tuple:
+    async def run():
+        async with TestClient(TestServer(create_app())) as client:
+            response = await client.post(path, json=body)
+            return response.status, await response.json()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/strategy", {"query": "x", "temperature": "hot"}),
+    ("/strategy", {"query": "x", "temperature": True}),
+    ("/strategy", {"query": "x", "persona": ["a"]}),
+    ("/strategy", {"config": {"persona": {"a": 1}}}),
+    ("/score", {"strategy": {}, "config": "abc"}),
+    ("/score", {"strategy": {}, "config": {"persona": 5}}),
+    ("/score", {"strategy": {"key_insight": 5}}),
+    ("/score", {"strategy": {"supporting_proof_points": 3}}),
+    ("/score", {"strategy": {"supporting_proof_points": ["ok", 3]}}),
+    ("/score", {"strategy": {"sources": ["faq.txt"]}}),
+    ("/assets", {"strategy": {}, "assets": "Cold Email"}),
+    ("/assets", {"strategy": {"key_insight": 5}, "assets": ["Landing Hero"]}),
+    ("/assets", {"strategy": {}, "variants": True}),
+])
+def test_malformed_requests_are_rejected_with_400(path, body):
+    status, payload = post(path, body)
+    assert status == 400
+    assert payload["error"]
+
+
+def test_valid_score_and_assets_still_succeed():
+    strategy = {"key_insight": "Growth for FinTech teams", "supporting_proof_points": ["38% more leads"],
+                "sources": [{"source": "faq.txt"}]}
+
+    status, payload = post("/score", {"strategy": strategy, "config": {"persona": "Enterprise CMO"}})
+    assert status == 200 and payload["total_score"] == 40
+
+    status, payload = post("/assets", {"strategy": strategy, "assets": ["Landing Hero"], "variants": 2})
+    assert status == 200 and len(payload["variants"]["Landing Hero"]) == 2
@@ -0,0 +1,18 @@
+from asset_renderer import ASSET_NAMES, MAX_VARIANTS, render_batch, render_variants
+
+
+def test_unhashable_proof_points_render_and_memoize():
+    strategy = {
+        "key_insight": "Pipeline {stalls} late",
+        "value_proposition": "NexFlow helps",
+        "supporting_proof_points": [{"metric": "38%"}, ["nested"]],
+        "strategic_campaign_angle": "Focus on RevOps"
+    }
+
+    for name in ASSET_NAMES:
+        first = render_variants(name, strategy, MAX_VARIANTS)
+        assert render_variants(name, dict(strategy), MAX_VARIANTS) == first
+        assert len(set(first)) == MAX_VARIANTS
+
+    assert render_batch([strategy, dict(strategy)])[0] == render_batch([strategy])[0]
+    assert "Pipeline {stalls} late" in render_variants("Cold Email", strategy)[0]
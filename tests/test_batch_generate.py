@@ -0,0 +1,38 @@
+import json
+
+import batch_generate
+
+
+STRATEGY = {"key_insight": "Growth", "value_proposition": "More leads", "supporting_proof_points": ["38%"],
+            "strategic_campaign_angle": "Focus", "sources": []}
+
+
+def pipeline_returning(result):
+    return lambda config: {"strategy": STRATEGY, "score_result": {"total_score": 60}, "refinement_count": 1, **result}
+
+
+def test_refinement_errors_are_recorded_as_partial(monkeypatch):
+    monkeypatch.setattr(batch_generate, "run_campaign_pipeline",
+                        pipeline_returning({"errors": ["Refinement failed: timeout"]}))
+
+    record = batch_generate.generate_one({"channel_focus": "Email Only"})
+
+    assert record["status"] == "partial"
+    assert record["errors"] == ["Refinement failed: timeout"]
+    assert "Cold Email" in record["assets"]
+
+
+def test_partial_runs_are_counted_apart_and_retried_on_resume(monkeypatch, tmp_path):
+    results = {"LinkedIn Only": {"errors": []}, "Email Only": {"errors": ["Refinement failed: timeout"]}}
+    monkeypatch.setattr(batch_generate, "run_campaign_pipeline",
+                        lambda config: pipeline_returning(results[config["channel_focus"]])(config))
+
+    output = tmp_path / "out.jsonl"
+    configs = [{"channel_focus": focus} for focus in results]
+
+    summary = batch_generate.run_batch(configs, str(output), concurrency=2, campaigns_per_minute=0)
+    assert summary["counts"] == {"ok": 1, "partial": 1, "error": 0, "skipped": 0}
+
+    rerun = batch_generate.run_batch(configs, str(output), concurrency=2, campaigns_per_minute=0)
+    assert rerun["counts"] == {"ok": 0, "partial": 1, "error": 0, "skipped": 1}
+    assert [json.loads(line)["status"] for line in output.read_text().splitlines()].count("partial") == 2
@@ -0,0 +1,47 @@
+import threading
+import time
+
+import pipeline
+
+
+def scripted(monkeypatch, scores, latencies):
+    """Candidate i sleeps latencies[i] and scores scores[i]; returns (start, end) per candidate."""
+    calls = {}
+    lock = threading.Lock()
+
+    def ask_question(query, persona, temperature, customer_details=None):
+        index = temperature
+        start = time.perf_counter()
+        time.sleep(latencies[index])
+        with lock:
+            calls[index] = (start, time.perf_counter())
+        return {"index": index}
+
+    # The "temperature" each candidate receives is its index
+    monkeypatch.setattr(pipeline, "candidate_temperature", lambda index: index)
+    monkeypatch.setattr(pipeline, "ask_question", ask_question)
+    monkeypatch.setattr(pipeline, "score_campaign", lambda strategy, config: {"total_score": scores[strategy["index"]]})
+    return calls
+
+
+def test_all_candidates_run_concurrently(monkeypatch):
+    calls = scripted(monkeypatch, [10, 60, 30], [0.1, 0.1, 0.1])
+
+    result = pipeline.run_best_of_n({}, n=3, threshold=75)
+
+    assert len(calls) == 3
+    # Every call started before any finished: latency is one LLM call, not three
+    assert max(start for start, _ in calls.values()) < min(end for _, end in calls.values())
+    assert result["score_result"]["total_score"] == 60
+    assert result["candidates_evaluated"] == 3
+
+
+def test_returns_as_soon_as_a_candidate_clears_the_threshold(monkeypatch):
+    scripted(monkeypatch, [90, 10, 10], [0.0, 1.0, 1.0])
+
+    start = time.perf_counter()
+    result = pipeline.run_best_of_n({}, n=3, threshold=75)
+
+    assert time.perf_counter() - start < 0.5
+    assert result["score_result"]["total_score"] == 90
+    assert result["candidates_evaluated"] == 1
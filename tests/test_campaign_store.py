@@ -0,0 +1,48 @@
+import campaign_store
+from campaign_store import CampaignStore
+
+
+def config(industry: str = "FinTech") -> dict:
+    return {"persona": "Enterprise CMO", "campaign_type": "Lead Generation", "industry": industry, "region": "DACH"}
+
+
+def result(score: int = 80) -> dict:
+    return {
+        "strategy": {"key_insight": "Reconciliation drives FinTech growth", "supporting_proof_points": ["38% faster"]},
+        "score_result": {"total_score": score},
+        "errors": []
+    }
+
+
+def test_stale_entries_stay_searchable_but_are_not_served(monkeypatch):
+    store = CampaignStore(":memory:")
+    assert store.put(config(), result())
+
+    # A model switch retires the entry for serving...
+    monkeypatch.setattr(campaign_store, "LLM_MODEL", "another-model")
+    assert store.get(config()) is None
+    assert not store.has_fresh(config())
+    assert store.search(fresh_only=True) == []
+
+    # ...but purging keeps it as a past campaign
+    assert store.purge() == 0
+    assert [row["industry"] for row in store.search("reconciliation", min_score=50)] == ["FinTech"]
+
+
+def test_expired_entries_are_kept_for_search():
+    store = CampaignStore(":memory:", ttl_seconds=-1)
+    store.put(config(), result())
+
+    assert store.get(config()) is None
+    store.purge()
+    assert len(store.search()) == 1
+
+
+def test_purge_trims_to_newest_max_entries():
+    store = CampaignStore(":memory:", max_entries=2, purge_every=0)
+    for industry in ["FinTech", "Logistics", "Manufacturing"]:
+        store.put(config(industry), result())
+
+    assert store.purge() == 1
+    assert sorted(row["industry"] for row in store.search()) == ["Logistics", "Manufacturing"]
+    assert len(store.search("reconciliation")) == 2     # FTS rows of trimmed entries are gone too
@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+import ephemeral_index
+import rag_pipeline
+from ephemeral_index import CUSTOMER_MAX_EMBED_CHUNKS, prefilter_chunks, split_details
+
+
+QUERY = """
+Campaign Type: Lead Generation
+Target Industry: FinTech
+Target Region: DACH
+Budget Level: Low Budget
+Primary Channel Focus: LinkedIn Only
+Tone Preference: Conversational
+"""
+
+FILLER = [
+    "Call {i}: discussed onboarding timeline and invoicing contacts.",
+    "Account owner changed in Q{q}; renewal conversation scheduled.",
+    "Support ticket #{i} about SSO configuration was resolved.",
+    "Procurement asked for the security questionnaire again (round {q}).",
+]
+
+# Shares almost no vocabulary with the form-style query
+DETAIL = "Their treasurer is evaluating a competitor because month-end reconciliation still takes eleven days."
+
+
+def long_notes(chars: int = 50000, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    lines = []
+    while sum(len(line) + 1 for line in lines) < chars:
+        lines.append(rng.choice(FILLER).format(i=rng.randint(1, 999), q=rng.randint(1, 4)))
+
+    lines.insert(len(lines) // 2, DETAIL)
+    return "\n".join(lines)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    ephemeral_index.index_cache.clear()
+    ephemeral_index.chunk_embedding_cache.clear()
+    yield
+
+
+def test_prefilter_keeps_salient_detail_in_long_notes():
+    chunks = split_details(long_notes())
+    assert len(chunks) > CUSTOMER_MAX_EMBED_CHUNKS
+
+    kept = prefilter_chunks(chunks, QUERY, CUSTOMER_MAX_EMBED_CHUNKS)
+    assert len(kept) == CUSTOMER_MAX_EMBED_CHUNKS
+    assert any(DETAIL in chunk for chunk in kept)
+    assert kept == [chunk for chunk in chunks if chunk in kept]      # original order
+
+
+def test_lexical_mode_ranks_notes_without_embeddings(monkeypatch):
+    def no_embeddings():
+        raise AssertionError("lexical mode must not load the embedding model")
+
+    monkeypatch.setattr(rag_pipeline, "get_embeddings", no_embeddings)
+
+    notes = long_notes() + "\nThe customer runs lead generation in the DACH region for FinTech buyers."
+    docs = rag_pipeline.customer_context(notes, QUERY, mode="lexical")
+
+    assert docs and "lead generation in the DACH region" in docs[0].page_content
+    assert all(doc.metadata["source"] == "customer_details" for doc in docs)
+
+    # Form-style queries resolve to lexical in auto mode too
+    assert rag_pipeline.customer_context(notes, QUERY, mode="auto") == docs
@@ -0,0 +1,44 @@
+import json
+import os
+
+import rag_pipeline
+from test_numpy_store import SeededEmbeddings
+from vector_backends import NumpyVectorStore
+
+
+def write_manifest(path, version: str, mtime_ns: int):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"index_version": version}, f)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_watcher_reopens_vectorstore_rebuilt_by_another_process(tmp_path, monkeypatch):
+    embeddings = SeededEmbeddings()
+    manifest = tmp_path / "index_manifest.json"
+
+    monkeypatch.setattr(rag_pipeline, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(rag_pipeline, "CHROMA_DIR", str(tmp_path))
+    monkeypatch.setattr(rag_pipeline, "get_embeddings", lambda: embeddings)
+    monkeypatch.setattr(rag_pipeline, "_vectorstore", None)
+    monkeypatch.setattr(rag_pipeline.index_watcher, "manifest_path", str(manifest))
+
+    index_dir = tmp_path / "numpy_index"
+    NumpyVectorStore(str(index_dir), embeddings).add_texts(["old text"], ids=["old"])
+    write_manifest(manifest, "v1", 1_000_000_000)
+    rag_pipeline.index_watcher.check()
+
+    assert rag_pipeline.get_vectorstore().get()["ids"] == ["old"]
+
+    # Another process rebuilds: the old row is deleted and the store compacted
+    # (which removes the vector file the first instance mapped)
+    rebuilt = NumpyVectorStore(str(index_dir), embeddings)
+    rebuilt.delete(ids=["old"])
+    rebuilt.add_texts(["new text"], ids=["new"])
+    rebuilt.compact()
+    write_manifest(manifest, "v2", 2_000_000_000)
+
+    rag_pipeline.index_watcher.check()
+
+    store = rag_pipeline.get_vectorstore()
+    assert store.get()["ids"] == ["new"]
+    assert store.similarity_search("new text", k=1)[0].id == "new"
@@ -0,0 +1,67 @@
+import json
+import os
+import zlib
+
+import numpy as np
+
+from vector_backends import NumpyVectorStore
+
+
+class SeededEmbeddings:
+    """Deterministic random vectors per text."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        return np.random.default_rng(zlib.crc32(text.encode())).standard_normal(8).tolist()
+
+
+def store(path, **kwargs):
+    return NumpyVectorStore(str(path), SeededEmbeddings(), **kwargs)
+
+
+def test_upsert_and_delete_survive_reload(tmp_path):
+    s = store(tmp_path)
+    s.add_texts(["a", "b", "c"], [{"category": "x"}, {"category": "y"}, {"category": "x"}], ids=["1", "2", "3"])
+    s.add_texts(["b2"], [{"category": "x"}], ids=["2"])
+    s.delete(ids=["3"])
+
+    for current in (s, store(tmp_path)):
+        assert len(current) == 2
+        assert current.get() == {"ids": ["1", "2"], "documents": ["a", "b2"],
+                                 "metadatas": [{"category": "x"}, {"category": "x"}]}
+        assert [doc.id for doc in current.similarity_search("b2", k=5, filter={"category": "x"})] == ["2", "1"]
+
+
+def test_writes_append_and_compact(tmp_path):
+    s = store(tmp_path)
+    ids = [f"r{i}" for i in range(3000)]
+    for start in range(0, len(ids), 500):
+        batch = ids[start:start + 500]
+        s.add_texts(batch, [{"category": str(i % 5)} for i in range(len(batch))], ids=batch)
+
+    # One vector file, grown by doubling rather than rewritten per batch
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".npy")]) == 1
+
+    s.delete(ids=ids[:2500])
+    assert len(s) == len(s._state.ids) == 500     # compacted once dead rows outnumbered live ones
+
+    reloaded = store(tmp_path)
+    assert reloaded.get()["ids"] == ids[2500:]
+    assert reloaded.similarity_search("r2999", k=1)[0].id == "r2999"
+
+
+def test_legacy_snapshot_is_migrated(tmp_path):
+    vectors = np.asarray(SeededEmbeddings().embed_documents(["p", "q"]), dtype=np.float32)
+    np.save(tmp_path / "vectors.npy", vectors / np.linalg.norm(vectors, axis=1, keepdims=True))
+    with open(tmp_path / "records.json", "w", encoding="utf-8") as f:
+        json.dump({"ids": ["p", "q"], "texts": ["p", "q"], "metadatas": [{}, {}]}, f)
+
+    s = store(tmp_path)
+    assert s.get()["ids"] == ["p", "q"]
+    assert not (tmp_path / "records.json").exists()
+
+    s16 = store(tmp_path, dtype="float16")
+    s16.add_texts(["z"], ids=["z"])
+    assert store(tmp_path, dtype="float16").similarity_search("q", k=1)[0].id == "q"
@@ -0,0 +1,88 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from llm_backends import LLMBackend, RateLimitError, RateLimitedBackend
+
+
+class ScriptedBackend(LLMBackend):
+    """Raises the scripted errors in order, then answers (streams yield `chunks` chunks)."""
+
+    name = "scripted"
+
+    def __init__(self, errors=(), chunks=3, total_tokens=100, fail_after=None):
+        super().__init__()
+        self.errors = list(errors)
+        self.chunks = chunks
+        self.total_tokens = total_tokens
+        self.fail_after = fail_after
+
+    def create(self, model, messages, temperature=0.2, stream=False, **kwargs):
+        self._record_call()
+        if self.errors:
+            raise self.errors.pop(0)
+
+        if stream:
+            return self._stream()
+        return SimpleNamespace(usage=SimpleNamespace(total_tokens=self.total_tokens))
+
+    def _stream(self):
+        for i in range(self.chunks):
+            if i == self.fail_after:
+                raise RateLimitError(retry_after=0.0)
+            yield i
+
+
+def limited(backend, **kwargs):
+    return RateLimitedBackend(backend, max_concurrency=1, backoff_base=0.01, seed=1, **kwargs)
+
+
+def test_slot_is_free_while_backing_off():
+    backend = limited(ScriptedBackend(errors=[RateLimitError(retry_after=0.3)]))
+    waiter = threading.Thread(target=backend.create, args=("m", [{"content": "hi"}]))
+    waiter.start()
+    time.sleep(0.1)
+
+    # The first call is sleeping before its retry; its slot must be usable meanwhile
+    start = time.perf_counter()
+    backend.create("m", [{"content": "hi"}])
+    assert time.perf_counter() - start < 0.2
+
+    waiter.join()
+
+
+def test_stream_holds_slot_until_exhausted_or_closed():
+    backend = limited(ScriptedBackend(chunks=3))
+
+    stream = backend.create("m", [{"content": "hi"}], stream=True)
+    assert next(stream) == 0
+    assert not backend._slots.acquire(blocking=False)
+
+    stream.close()
+    assert backend._slots.acquire(blocking=False)
+    backend._slots.release()
+
+    assert list(backend.create("m", [{"content": "hi"}], stream=True)) == [0, 1, 2]
+    assert backend._slots.acquire(blocking=False)
+
+
+def test_stream_retries_errors_before_first_chunk_only():
+    backend = limited(ScriptedBackend(errors=[RateLimitError(retry_after=0.0)], chunks=2))
+    assert list(backend.create("m", [{"content": "hi"}], stream=True)) == [0, 1]
+    assert backend.call_count == 2
+
+    backend = limited(ScriptedBackend(chunks=3, fail_after=1))
+    with pytest.raises(RateLimitError):
+        list(backend.create("m", [{"content": "hi"}], stream=True))
+    assert backend.call_count == 1
+    assert backend._slots.acquire(blocking=False)
+
+
+def test_unused_reservation_is_refunded():
+    backend = limited(ScriptedBackend(total_tokens=50), tokens_per_minute=10_000)
+    backend.create("m", [{"content": "hi"}], max_tokens=1000)
+
+    # Only the 50 tokens actually used stay charged (plus a little refill)
+    assert backend.token_bucket._tokens == pytest.approx(10_000 - 50, abs=5)
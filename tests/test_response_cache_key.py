@@ -0,0 +1,33 @@
+from langchain_core.documents import Document
+
+import context_builder
+import rag_pipeline
+from response_cache import ResponseCache
+
+
+DOCS = [
+    Document(id=f"doc-{i}", page_content=f"Fact {i}: " + "FinTech teams in DACH grow pipeline with NexFlow. " * 20,
+             metadata={"source": f"doc_{i}.txt", "category": "case_studies"})
+    for i in range(6)
+]
+
+
+def test_context_budget_is_part_of_the_response_cache_key(monkeypatch):
+    cache = ResponseCache(":memory:")
+    monkeypatch.setattr(rag_pipeline, "get_response_cache", lambda: cache)
+    monkeypatch.setattr(rag_pipeline, "retrieve", lambda query, metadata_filter: list(DOCS))
+
+    def generate(budget: int) -> dict:
+        monkeypatch.setattr(rag_pipeline, "assemble_context",
+                            lambda docs: context_builder.assemble_context(docs, token_budget=budget))
+        return rag_pipeline.prepare_generation("Lead generation for FinTech", use_cache=True)
+
+    first = generate(900)
+    cache.set(first["cache_key"], {"key_insight": "cached"})
+    assert generate(900) == {"result": {"key_insight": "cached"}}
+
+    # A smaller budget changes what the LLM sees: no stale hit
+    smaller = generate(200)
+    assert "result" not in smaller
+    assert smaller["cache_key"] != first["cache_key"]
+    assert smaller["context_tokens"] < first["context_tokens"]
@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from bench_scoring import PERSONAS, make_strategy, score_campaign_reference
+from scoring_engine import mentions, score_campaign, score_campaign_batch
+from tracing import metrics, start_trace
+
+
+def test_matches_original_scorer_on_synthetic_strategies():
+    rng = random.Random(42)
+
+    for _ in range(2000):
+        strategy = make_strategy(rng)
+        config = {"persona": rng.choice(PERSONAS + [""]), "industry": "FinTech"}
+        assert score_campaign(strategy, config) == score_campaign_reference(strategy, config)
+
+
+@pytest.mark.parametrize("needle", [
+    "enterprise cmo",
+    "ENTERPRISE CMO",
+    "persona",                 # a key, not a value
+    "cmo', 'key",              # spans two fields in str(strategy)
+    "it's",                    # structural character
+    "\\n",                     # escaped newline as it appears in repr()
+    "pricing_plans.txt",       # inside a nested source dict
+    "missing",
+])
+def test_mentions_matches_full_serialization(needle):
+    strategy = {
+        "persona": "Enterprise CMO",
+        "key_insight": "Line one\nit's line two",
+        "supporting_proof_points": ["ROI up 30%"],
+        "sources": [{"source": "pricing_plans.txt", "category": "pricing_plans"}]
+    }
+    assert mentions(strategy, needle) == (needle.lower() in str(strategy).lower())
+
+
+def test_empty_strategy_scores_zero():
+    assert score_campaign({}, {"persona": "Enterprise CMO"})["total_score"] == 0
+
+
+# -----------------------------------------
+# Batched Scoring
+# -----------------------------------------
+
+def outcome(fn, *args):
+    try:
+        return fn(*args)
+    except Exception as e:
+        return type(e)
+
+
+VARIED = [
+    {},                                                             # every field missing
+    {"key_insight": "Growth"},
+    {"value_proposition": "We improve pipeline " * 5, "sources": []},
+    {"strategic_campaign_angle": "A focused campaign " * 4, "supporting_proof_points": ["a", "b", "c"]},
+    {"supporting_proof_points": "three proofs as one string"},      # non-list, len() still works
+    {"sources": ({"source": "faq.txt"},), "supporting_proof_points": ("x",)},
+    {"value_proposition": ["short", "list"]},                       # non-string below the keyword threshold
+    {"strategic_campaign_angle": ["word"] * 60},                    # non-string above it: raises
+    {"key_insight": 5},                                             # raises
+    {"key_insight": None},                                          # raises
+    {"supporting_proof_points": 3},                                 # raises
+    # Persona only inside nested fields
+    {"key_insight": "x", "sources": [{"source": "cases.txt", "note": "Enterprise CMO deck"}]},
+    {"key_insight": "x", "supporting_proof_points": ["Loved by every enterprise cmo we met"]},
+]
+
+
+@pytest.mark.parametrize("strategy", VARIED)
+@pytest.mark.parametrize("persona", ["Enterprise CMO", "", None])
+def test_batch_matches_per_item_on_varied_inputs(strategy, persona):
+    config = {"persona": persona}
+    assert outcome(score_campaign_batch, [strategy], config) == outcome(lambda: [score_campaign(strategy, config)])
+
+
+def test_batch_matches_per_item_on_synthetic_strategies():
+    rng = random.Random(7)
+    strategies = [make_strategy(rng) for _ in range(2000)]
+    configs = [{"persona": rng.choice(PERSONAS + [""])} for _ in strategies]
+
+    assert score_campaign_batch(strategies, configs) == [score_campaign(s, c) for s, c in zip(strategies, configs)]
+    assert score_campaign_batch(strategies, configs[0]) == [score_campaign(s, configs[0]) for s in strategies]
+
+
+def test_batch_config_length_must_match():
+    assert score_campaign_batch([], {}) == []
+    with pytest.raises(ValueError):
+        score_campaign_batch([{}, {}], [{}])
+
+
+# -----------------------------------------
+# Stage Metrics
+# -----------------------------------------
+
+def stage_count(stage: str) -> int:
+    return metrics.snapshot()["stages"].get(stage, {}).get("count", 0)
+
+
+def test_untraced_scoring_still_records_stage_histograms():
+    campaign, batch = stage_count("score.campaign"), stage_count("score.batch")
+
+    score_campaign({}, {})
+    score_campaign_batch([{}, {}], {})
+    assert (stage_count("score.campaign"), stage_count("score.batch")) == (campaign + 1, batch + 1)
+
+    with start_trace("test") as trace:
+        score_campaign({}, {})
+    assert stage_count("score.campaign") == campaign + 2
+    assert [record["name"] for record in trace.spans] == ["score.campaign"]